@@ -0,0 +1,48 @@
+"""add index_jobs table
+
+Revision ID: 4c1f7e2a9b30
+Revises: 10953d0a008d
+Create Date: 2026-10-18 10:12:04.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c1f7e2a9b30'
+down_revision: Union[str, Sequence[str], None] = '10953d0a008d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('index_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('stage', sa.String(length=50), nullable=True),
+    sa.Column('progress', sa.Float(), nullable=False),
+    sa.Column('timings', sa.Text(), nullable=True),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_index_jobs_kind'), 'index_jobs', ['kind'], unique=False)
+    op.create_index(op.f('ix_index_jobs_status'), 'index_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_index_jobs_status'), table_name='index_jobs')
+    op.drop_index(op.f('ix_index_jobs_kind'), table_name='index_jobs')
+    op.drop_table('index_jobs')
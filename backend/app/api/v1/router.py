@@ -5,6 +5,7 @@ from app.modules.scolarite.router import router as scolarite_router
 from app.modules.documents.router import router as documents_router
 from app.modules.rag.api.router import router as rag_router
 from app.modules.timetable.api.router import router as timetable_router
+from app.modules.jobs.router import router as jobs_router
 
 
 
@@ -14,4 +15,5 @@ router.include_router(auth_router)
 router.include_router(scolarite_router)
 router.include_router(documents_router)
 router.include_router(rag_router)
-router.include_router(timetable_router)
\ No newline at end of file
+router.include_router(timetable_router)
+router.include_router(jobs_router)
\ No newline at end of file
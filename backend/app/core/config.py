@@ -1,3 +1,5 @@
+from typing import Any, Dict
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
@@ -15,6 +17,13 @@ class Settings(BaseSettings):
 
     ollama_base_url: str = "http://localhost:11434"
     ollama_model: str = "llama3.1"
+    llm_backend: str = Field(default="http", alias="LLM_BACKEND")  # http (API REST Ollama) | cli (ollama run)
+    ollama_keep_alive: str = Field(default="30m", alias="OLLAMA_KEEP_ALIVE")  # modèle gardé en mémoire ; "-1" = toujours
+    ollama_connect_timeout_s: float = Field(default=5.0, alias="OLLAMA_CONNECT_TIMEOUT_S")
+    ollama_read_timeout_s: float = Field(default=120.0, alias="OLLAMA_READ_TIMEOUT_S")
+    ollama_pool_size: int = Field(default=8, alias="OLLAMA_POOL_SIZE")  # connexions HTTP persistantes
+    ollama_options: Dict[str, Any] = Field(default_factory=dict, alias="OLLAMA_OPTIONS")  # JSON, ex. {"temperature": 0}
+    ollama_preload: bool = Field(default=False, alias="OLLAMA_PRELOAD")  # charge le modèle au démarrage
 
     # --- Database ---
     database_url: str = Field(alias="DATABASE_URL")
@@ -30,6 +39,58 @@ class Settings(BaseSettings):
     jwt_algorithm: str = Field(default="HS256", alias="JWT_ALGORITHM")
     jwt_access_token_expire_minutes: int = Field(default=120, alias="JWT_ACCESS_TOKEN_EXPIRE_MINUTES")
 
+    # --- RAG ---
+    rag_store_cache_max_entries: int = Field(default=16, alias="RAG_STORE_CACHE_MAX_ENTRIES")
+    rag_store_cache_max_mb: int = Field(default=512, alias="RAG_STORE_CACHE_MAX_MB")
+    rag_max_segments: int = Field(default=8, alias="RAG_MAX_SEGMENTS")
+    rag_small_segment_rows: int = Field(default=10_000, alias="RAG_SMALL_SEGMENT_ROWS")
+    rag_index_kind: str = Field(default="auto", alias="RAG_INDEX_KIND")  # auto | flat | hnsw | ivf | fp16 | sq8 | pq
+    rag_ann_kind: str = Field(default="hnsw", alias="RAG_ANN_KIND")
+    rag_ann_threshold: int = Field(default=20_000, alias="RAG_ANN_THRESHOLD")
+    rag_hnsw_m: int = Field(default=32, alias="RAG_HNSW_M")
+    rag_hnsw_ef_search: int = Field(default=64, alias="RAG_HNSW_EF_SEARCH")
+    rag_ivf_nprobe: int = Field(default=16, alias="RAG_IVF_NPROBE")
+    rag_pq_m: int = Field(default=48, alias="RAG_PQ_M")  # octets par vecteur (index "pq")
+    rag_mmap_indexes: bool = Field(default=True, alias="RAG_MMAP_INDEXES")
+    rag_embedding_model: str = Field(default="all-MiniLM-L6-v2", alias="RAG_EMBEDDING_MODEL")
+    rag_embedding_dim: int = Field(default=384, alias="RAG_EMBEDDING_DIM")
+    rag_embedder_warmup: bool = Field(default=False, alias="RAG_EMBEDDER_WARMUP")
+    rag_embedder_backend: str = Field(default="torch", alias="RAG_EMBEDDER_BACKEND")  # torch | onnx
+    rag_embedder_onnx_file: str = Field(default="", alias="RAG_EMBEDDER_ONNX_FILE")  # "" => onnx/model.onnx
+    rag_embedder_min_cosine: float = Field(default=0.98, alias="RAG_EMBEDDER_MIN_COSINE")
+    rag_query_cache_size: int = Field(default=2048, alias="RAG_QUERY_CACHE_SIZE")
+    rag_pdf_workers: int = Field(default=0, alias="RAG_PDF_WORKERS")  # 0 => nombre de cœurs, 1 => séquentiel
+    rag_pdf_parallel_min_pages: int = Field(default=8, alias="RAG_PDF_PARALLEL_MIN_PAGES")
+    rag_chunk_max_tokens: int = Field(default=240, alias="RAG_CHUNK_MAX_TOKENS")  # fenêtre du modèle : 256
+    rag_chunk_overlap_tokens: int = Field(default=40, alias="RAG_CHUNK_OVERLAP_TOKENS")
+    rag_ingest_batch_size: int = Field(default=64, alias="RAG_INGEST_BATCH_SIZE")  # chunks embeddés par lot
+    rag_reindex_workers: int = Field(default=0, alias="RAG_REINDEX_WORKERS")  # CLI reindex ; 0 => nombre de cœurs
+    rag_cpu_workers: int = Field(default=0, alias="RAG_CPU_WORKERS")  # embedding/recherche des routes async ; 0 => cœurs
+    # dense : score = cosinus (0..1) ; hybrid (dense + BM25, opt-in) : score = RRF (~0.016-0.033, ordre seul)
+    rag_retrieval_mode: str = Field(default="dense", alias="RAG_RETRIEVAL_MODE")
+    rag_hybrid_candidates: int = Field(default=20, alias="RAG_HYBRID_CANDIDATES")  # top dense / BM25 avant fusion
+    rag_rrf_k: int = Field(default=60, alias="RAG_RRF_K")
+    rag_rerank: bool = Field(default=False, alias="RAG_RERANK")  # cross-encoder sur les candidats
+    rag_rerank_model: str = Field(default="cross-encoder/mmarco-mMiniLMv2-L12-H384-v1", alias="RAG_RERANK_MODEL")
+    rag_rerank_candidates: int = Field(default=20, alias="RAG_RERANK_CANDIDATES")
+    rag_rerank_budget_ms: float = Field(default=150.0, alias="RAG_RERANK_BUDGET_MS")  # par requête
+    rag_rerank_batch_size: int = Field(default=8, alias="RAG_RERANK_BATCH_SIZE")
+    rag_rerank_cache_size: int = Field(default=4096, alias="RAG_RERANK_CACHE_SIZE")
+    rag_answer_cache: bool = Field(default=True, alias="RAG_ANSWER_CACHE")  # réponses LLM persistées (SQLite)
+    rag_answer_cache_path: str = Field(default="storage/answer_cache.sqlite3", alias="RAG_ANSWER_CACHE_PATH")
+    rag_answer_cache_ttl_s: float = Field(default=86400.0, alias="RAG_ANSWER_CACHE_TTL_S")  # 0 => sans expiration
+    rag_answer_cache_max_entries: int = Field(default=10_000, alias="RAG_ANSWER_CACHE_MAX_ENTRIES")
+    rag_answer_cache_max_mb: int = Field(default=64, alias="RAG_ANSWER_CACHE_MAX_MB")
+    rag_semantic_cache: bool = Field(default=True, alias="RAG_SEMANTIC_CACHE")  # questions reformulées (même fichier)
+    rag_semantic_cache_threshold: float = Field(default=0.9, alias="RAG_SEMANTIC_CACHE_THRESHOLD")  # cosinus min
+    rag_semantic_cache_max_per_namespace: int = Field(default=2000, alias="RAG_SEMANTIC_CACHE_MAX_PER_NAMESPACE")
+
+    # --- Tâches d'indexation (arrière-plan) ---
+    index_jobs_workers: int = Field(default=2, alias="INDEX_JOBS_WORKERS")
+    index_jobs_poll_interval_s: float = Field(default=2.0, alias="INDEX_JOBS_POLL_INTERVAL_S")
+    index_jobs_stale_after_s: float = Field(default=900.0, alias="INDEX_JOBS_STALE_AFTER_S")
+    # Tâche interrompue (crash du worker) : échec définitif après ce nombre de prises
+    index_jobs_max_attempts: int = Field(default=3, alias="INDEX_JOBS_MAX_ATTEMPTS")
 
     # --- Logging ---
     log_level: str = Field(default="INFO", alias="LOG_LEVEL")
@@ -6,3 +6,4 @@ from .groupe import Groupe
 from .module import Module
 from .timetable_session import TimetableSession
 from .document import Document
+from .index_job import IndexJob
@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import String, DateTime, Float, Integer, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+
+class IndexJob(Base):
+    """
+    Tâche d'indexation RAG exécutée en arrière-plan (la table sert aussi de file d'attente).
+    """
+    __tablename__ = "index_jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    kind: Mapped[str] = mapped_column(String(50), index=True)  # rag_document, timetable_pdf
+    status: Mapped[str] = mapped_column(String(20), index=True, default="queued")  # queued, running, succeeded, failed
+    payload: Mapped[str] = mapped_column(Text, default="{}")  # JSON
+
+    stage: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    progress: Mapped[float] = mapped_column(Float, default=0.0)  # 0..1
+    timings: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # JSON {étape: secondes}
+    result: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # JSON
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
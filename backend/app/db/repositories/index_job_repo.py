@@ -0,0 +1,145 @@
+import json
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from app.db.models.index_job import IndexJob
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def create_job(db: Session, kind: str, payload: dict[str, Any]) -> IndexJob:
+    job = IndexJob(kind=kind, status=QUEUED, payload=json.dumps(payload), progress=0.0, attempts=0)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_job(db: Session, job_id: int) -> IndexJob | None:
+    stmt = select(IndexJob).where(IndexJob.id == job_id)
+    return db.execute(stmt).scalars().first()
+
+
+def list_jobs(
+    db: Session,
+    *,
+    status: str | None = None,
+    kind: str | None = None,
+    limit: int = 50,
+) -> list[IndexJob]:
+    stmt = select(IndexJob).order_by(IndexJob.id.desc()).limit(limit)
+    if status:
+        stmt = stmt.where(IndexJob.status == status)
+    if kind:
+        stmt = stmt.where(IndexJob.kind == kind)
+    return list(db.execute(stmt).scalars().all())
+
+
+def claim_next_job(db: Session) -> IndexJob | None:
+    """
+    Passe la plus ancienne tâche "queued" à "running".
+    L'UPDATE conditionnel garantit qu'un seul worker (ou process) la prend.
+    """
+    stmt = select(IndexJob.id).where(IndexJob.status == QUEUED).order_by(IndexJob.id).limit(8)
+    for job_id in db.execute(stmt).scalars().all():
+        now = datetime.utcnow()
+        claimed = db.execute(
+            update(IndexJob)
+            .where(IndexJob.id == job_id, IndexJob.status == QUEUED)
+            .values(
+                status=RUNNING,
+                started_at=now,
+                heartbeat_at=now,
+                attempts=IndexJob.attempts + 1,
+            )
+        )
+        db.commit()
+        if claimed.rowcount == 1:
+            return get_job(db, job_id)
+    return None
+
+
+def update_progress(
+    db: Session,
+    job_id: int,
+    *,
+    stage: str,
+    progress: float,
+    timings: dict[str, float],
+) -> None:
+    db.execute(
+        update(IndexJob)
+        .where(IndexJob.id == job_id)
+        .values(
+            stage=stage,
+            progress=progress,
+            timings=json.dumps(timings),
+            heartbeat_at=datetime.utcnow(),
+        )
+    )
+    db.commit()
+
+
+def touch_job(db: Session, job_id: int) -> None:
+    """
+    Signe de vie d'une tâche "running" pendant une étape sans rapport d'avancement.
+    """
+    db.execute(
+        update(IndexJob)
+        .where(IndexJob.id == job_id, IndexJob.status == RUNNING)
+        .values(heartbeat_at=datetime.utcnow())
+    )
+    db.commit()
+
+
+def finish_job(
+    db: Session,
+    job_id: int,
+    *,
+    result: dict[str, Any] | None = None,
+    error: str | None = None,
+    timings: dict[str, float] | None = None,
+) -> None:
+    values: dict[str, Any] = {
+        "status": FAILED if error else SUCCEEDED,
+        "finished_at": datetime.utcnow(),
+        "error": error,
+        "result": json.dumps(result, default=str) if result is not None else None,
+        "timings": json.dumps(timings or {}),
+    }
+    if not error:
+        values.update(progress=1.0, stage="done")
+    db.execute(update(IndexJob).where(IndexJob.id == job_id).values(**values))
+    db.commit()
+
+
+def requeue_stale_jobs(db: Session, stale_after_s: float, max_attempts: int) -> tuple[int, int]:
+    """
+    Remet en file les tâches "running" sans signe de vie (process arrêté en cours de tâche).
+    Celles déjà prises `max_attempts` fois passent en échec : un PDF qui fait tomber le worker
+    n'est pas repris à chaque redémarrage.
+    Retourne (remises en file, abandonnées).
+    """
+    now = datetime.utcnow()
+    stale = (IndexJob.status == RUNNING, IndexJob.heartbeat_at < now - timedelta(seconds=stale_after_s))
+    failed = db.execute(
+        update(IndexJob)
+        .where(*stale, IndexJob.attempts >= max_attempts)
+        .values(
+            status=FAILED,
+            finished_at=now,
+            error=f"Abandonnée après {max_attempts} tentative(s) interrompue(s)",
+        )
+    )
+    requeued = db.execute(
+        update(IndexJob)
+        .where(*stale)
+        .values(status=QUEUED, stage=None, progress=0.0)
+    )
+    db.commit()
+    return requeued.rowcount, failed.rowcount
@@ -1,4 +1,6 @@
 import os
+import threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
 from app.core.config import settings
@@ -6,6 +8,10 @@ from app.core.logging import setup_logging
 from app.core.cors import add_cors
 from app.shared.exceptions import unhandled_exception_handler
 from app.api.v1.router import router as v1_router
+from app.modules.rag.infrastructure.embedding_service import warm_up_embedder
+from app.modules.jobs.queue import get_job_queue
+from app.modules.rag.infrastructure.llm_gateway import get_llm_gateway
+from app.modules.rag.infrastructure.cpu_executor import shutdown_cpu_executor
 
 from app.db.base import Base
 from app.db.session import engine
@@ -19,10 +25,27 @@ os.environ.setdefault("PYTHONUTF8", "1")
 os.environ.setdefault("PYTHONIOENCODING", "utf-8")
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Workers d'indexation : reprennent aussi les tâches en attente / interrompues
+    queue = get_job_queue()
+    queue.start()
+    # Modèle chargé côté Ollama (optionnel), sans bloquer le démarrage
+    llm = get_llm_gateway()
+    if settings.ollama_preload and hasattr(llm, "preload"):
+        threading.Thread(target=llm.preload, name="llm-preload", daemon=True).start()
+    yield
+    queue.stop()
+    llm.close()
+    await llm.aclose()
+    shutdown_cpu_executor()
+
+
 def create_app() -> FastAPI:
     setup_logging()
 
     app = FastAPI(
+        lifespan=lifespan,
         title=settings.app_name,
         version="0.1.0",
         docs_url="/docs",
@@ -39,6 +62,10 @@ def create_app() -> FastAPI:
     # Routes API
     app.include_router(v1_router, prefix=settings.api_v1_prefix)
 
+    # Chargement anticipé (optionnel) du modèle d'embedding, sans bloquer le démarrage
+    if settings.rag_embedder_warmup:
+        warm_up_embedder(background=True)
+
     return app
 
 
@@ -10,6 +10,7 @@ from app.db.repositories.document_repo import (
     get_document,
     delete_document,
 )
+from app.modules.rag.infrastructure.vector_store_faiss import delete_document as delete_document_vectors
 
 BASE_STORAGE = "storage/documents"
 ALLOWED_EXTENSIONS = {".pdf", ".docx"}
@@ -51,6 +52,9 @@ def remove_document(db: Session, doc_id: int):
     if not doc:
         raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Document not found")
 
+    # Retire ses vecteurs du RAG (sinon ses chunks restent retrouvables)
+    delete_document_vectors(doc.id)
+
     # Delete file
     if os.path.exists(doc.file_path):
         os.remove(doc.file_path)
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from sqlalchemy.orm import Session
+
+from app.modules.jobs.queue import JobHandler, ProgressFn
+from app.modules.rag.application.use_cases import IndexDocumentUseCase
+from app.modules.timetable.rag.indexer import index_timetable_pdf
+
+RAG_DOCUMENT = "rag_document"
+TIMETABLE_PDF = "timetable_pdf"
+
+
+def _index_rag_document(db: Session, payload: Dict[str, Any], progress: ProgressFn) -> Dict[str, Any]:
+    return IndexDocumentUseCase(db=db).execute(payload["document_id"], progress=progress)
+
+
+def _index_timetable_pdf(db: Session, payload: Dict[str, Any], progress: ProgressFn) -> Dict[str, Any]:
+    return index_timetable_pdf(
+        pdf_path=payload["pdf_path"],
+        group_id=payload["group_id"],
+        progress=progress,
+    )
+
+
+HANDLERS: Dict[str, JobHandler] = {
+    RAG_DOCUMENT: _index_rag_document,
+    TIMETABLE_PDF: _index_timetable_pdf,
+}
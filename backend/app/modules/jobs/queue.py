@@ -0,0 +1,242 @@
+"""
+File de tâches d'indexation en arrière-plan.
+
+- La table `index_jobs` EST la file : une tâche est d'abord persistée ("queued"),
+  puis prise par un worker via un UPDATE conditionnel (sûr entre workers uvicorn).
+  Deux tâches du même namespace dans deux processus sont sérialisées par le verrou
+  fichier du namespace (cf. SegmentStore.write_lock).
+- Pool borné de `index_jobs_workers` threads ; au-delà, les tâches attendent en base.
+- Les handlers rapportent leur avancement (étape, fraction) ; les durées par étape
+  sont enregistrées dans `timings`.
+- Un battement de cœur périodique (`heartbeat_at`) couvre les étapes longues sans
+  rapport d'avancement : une tâche vivante n'est jamais remise en file par un autre worker.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.repositories.index_job_repo import (
+    claim_next_job,
+    create_job,
+    finish_job,
+    requeue_stale_jobs,
+    touch_job,
+    update_progress,
+)
+
+logger = logging.getLogger(__name__)
+
+# progress(étape, fraction 0..1)
+ProgressFn = Callable[[str, float], None]
+# handler(db, payload, progress) -> résultat JSON
+JobHandler = Callable[[Session, Dict[str, Any], ProgressFn], Dict[str, Any]]
+
+
+class _ProgressReporter:
+    """
+    Enregistre l'étape courante et les durées par étape ; écritures en base espacées.
+    """
+
+    def __init__(self, db: Session, job_id: int, min_interval_s: float = 0.5) -> None:
+        self.db = db
+        self.job_id = job_id
+        self.min_interval_s = min_interval_s
+        self.timings: Dict[str, float] = {}
+        self._stage: Optional[str] = None
+        self._stage_start = time.perf_counter()
+        self._last_write = 0.0
+
+    def _close_stage(self) -> None:
+        if self._stage is not None:
+            elapsed = time.perf_counter() - self._stage_start
+            self.timings[self._stage] = round(self.timings.get(self._stage, 0.0) + elapsed, 4)
+
+    def __call__(self, stage: str, progress: float) -> None:
+        changed = stage != self._stage
+        if changed:
+            self._close_stage()
+            self._stage = stage
+            self._stage_start = time.perf_counter()
+
+        now = time.monotonic()
+        if changed or now - self._last_write >= self.min_interval_s:
+            self._last_write = now
+            update_progress(
+                self.db,
+                self.job_id,
+                stage=stage,
+                progress=max(0.0, min(1.0, float(progress))),
+                timings=self.timings,
+            )
+
+    def finish(self) -> Dict[str, float]:
+        self._close_stage()
+        self._stage = None
+        return self.timings
+
+
+class _Heartbeat:
+    """
+    Thread qui met à jour `heartbeat_at` toutes les `interval_s` tant que le handler tourne
+    (construction FAISS, commit de segment, compaction : aucun appel à progress).
+    Session dédiée : celle du handler n'est pas partageable entre threads.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], job_id: int, interval_s: float) -> None:
+        self.session_factory = session_factory
+        self.job_id = job_id
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"index-job-heartbeat-{job_id}", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                with self.session_factory() as db:
+                    touch_job(db, self.job_id)
+            except Exception:
+                logger.exception("Tâche d'indexation %s : battement de cœur en échec", self.job_id)
+
+    def __enter__(self) -> "_Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class JobQueue:
+    def __init__(
+        self,
+        handlers: Dict[str, JobHandler],
+        session_factory: Callable[[], Session],
+        *,
+        workers: int = 2,
+        poll_interval_s: float = 2.0,
+        stale_after_s: float = 900.0,
+        max_attempts: int = 3,
+    ) -> None:
+        self.handlers = handlers
+        self.session_factory = session_factory
+        self.workers = max(1, workers)
+        self.poll_interval_s = poll_interval_s
+        self.stale_after_s = stale_after_s
+        self.max_attempts = max(1, max_attempts)
+
+        self._wakeup = threading.Semaphore(0)
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    # ---------- cycle de vie ----------
+    def start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            with self.session_factory() as db:
+                requeued, abandoned = requeue_stale_jobs(db, self.stale_after_s, self.max_attempts)
+            if requeued:
+                logger.warning("%d tâche(s) d'indexation interrompue(s) remise(s) en file", requeued)
+            if abandoned:
+                logger.error(
+                    "%d tâche(s) d'indexation abandonnée(s) après %d tentatives", abandoned, self.max_attempts
+                )
+
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker_loop, name=f"index-job-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        with self._lock:
+            self._stop.set()
+            for _ in self._threads:
+                self._wakeup.release()
+            for t in self._threads:
+                t.join(timeout)
+            self._threads = []
+
+    # ---------- API ----------
+    def enqueue(self, kind: str, payload: Dict[str, Any]) -> int:
+        if kind not in self.handlers:
+            raise ValueError(f"Type de tâche inconnu : {kind}")
+        with self.session_factory() as db:
+            job_id = create_job(db, kind, payload).id
+        self.start()
+        self._wakeup.release()
+        return job_id
+
+    def run_pending(self) -> int:
+        """
+        Exécute les tâches en attente dans le thread courant (CLI, tests). Retourne le nombre traité.
+        """
+        done = 0
+        while self._run_next():
+            done += 1
+        return done
+
+    # ---------- exécution ----------
+    def _worker_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                ran = self._run_next()
+            except Exception:
+                logger.exception("Worker d'indexation : erreur inattendue")
+                ran = False
+            if not ran:
+                # Réveil à l'enqueue ; sinon relève périodique (tâches créées par un autre process)
+                self._wakeup.acquire(timeout=self.poll_interval_s)
+
+    def _run_next(self) -> bool:
+        with self.session_factory() as db:
+            job = claim_next_job(db)
+            if job is None:
+                return False
+
+            reporter = _ProgressReporter(db, job.id)
+            try:
+                handler = self.handlers[job.kind]
+                # ~3 battements par délai d'abandon : un battement manqué ne suffit pas à la remettre en file
+                with _Heartbeat(self.session_factory, job.id, self.stale_after_s / 3):
+                    result = handler(db, json.loads(job.payload or "{}"), reporter)
+            except Exception as e:
+                db.rollback()
+                logger.exception("Tâche d'indexation %s (%s) en échec", job.id, job.kind)
+                finish_job(db, job.id, error=f"{type(e).__name__}: {e}", timings=reporter.finish())
+            else:
+                finish_job(db, job.id, result=result, timings=reporter.finish())
+            return True
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """
+    File process-wide (démarrée au premier enqueue ou au démarrage de l'app).
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            from app.db.session import SessionLocal
+            from app.modules.jobs.handlers import HANDLERS
+
+            _queue = JobQueue(
+                HANDLERS,
+                SessionLocal,
+                workers=settings.index_jobs_workers,
+                poll_interval_s=settings.index_jobs_poll_interval_s,
+                stale_after_s=settings.index_jobs_stale_after_s,
+                max_attempts=settings.index_jobs_max_attempts,
+            )
+        return _queue
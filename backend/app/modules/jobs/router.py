@@ -0,0 +1,61 @@
+import json
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_db
+from app.core.security import get_current_user
+from app.db.models import IndexJob, User
+from app.db.repositories.index_job_repo import get_job, list_jobs
+from app.modules.jobs.schemas import IndexJobOut
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+def _seconds(start, end):
+    if start is None or end is None:
+        return None
+    return round((end - start).total_seconds(), 3)
+
+
+def _to_out(job: IndexJob) -> IndexJobOut:
+    return IndexJobOut(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        payload=json.loads(job.payload or "{}"),
+        stage=job.stage,
+        progress=job.progress or 0.0,
+        timings=json.loads(job.timings or "{}"),
+        result=json.loads(job.result) if job.result else None,
+        error=job.error,
+        attempts=job.attempts or 0,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        wait_seconds=_seconds(job.created_at, job.started_at),
+        run_seconds=_seconds(job.started_at, job.finished_at),
+    )
+
+
+@router.get("", response_model=list[IndexJobOut])
+def list_index_jobs(
+    status: str | None = None,
+    kind: str | None = None,
+    limit: int = 50,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return [_to_out(j) for j in list_jobs(db, status=status, kind=kind, limit=min(limit, 500))]
+
+
+@router.get("/{job_id}", response_model=IndexJobOut)
+def get_index_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    job = get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _to_out(job)
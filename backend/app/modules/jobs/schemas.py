@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import Any, Optional
+from pydantic import BaseModel
+
+
+class IndexJobOut(BaseModel):
+    id: int
+    kind: str
+    status: str
+    payload: dict[str, Any]
+    stage: Optional[str] = None
+    progress: float
+    timings: dict[str, float]
+    result: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    wait_seconds: Optional[float] = None
+    run_seconds: Optional[float] = None
@@ -15,8 +15,12 @@ from app.modules.rag.application.use_cases import (
     IndexDocumentUseCase,
     QueryRagUseCase,
 )
+from app.db.repositories.document_repo import get_document
+from app.modules.jobs.handlers import RAG_DOCUMENT
+from app.modules.jobs.queue import get_job_queue
 from app.modules.rag.infrastructure.llm_gateway import get_llm_gateway
-from app.modules.rag.domain.models import RagAnswer
+from app.modules.rag.domain.models import RagAnswer, RagAnswerStream, RetrievedContext
+from app.shared.sse import answer_events_async, sse_response
 
 router = APIRouter(prefix="/rag", tags=["RAG"])
 
@@ -32,50 +36,68 @@ def _build_container(db: Session):
     )
 
 
-@router.post("/index")
+@router.post("/index", status_code=202)
 def index_rag_document(
     payload: RagIndexIn,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    index_uc, _ = _build_container(db)
+    # Vérification immédiate ; l'extraction + l'embedding se font en arrière-plan
+    if not get_document(db, payload.document_id):
+        raise HTTPException(status_code=404, detail="Document not found")
 
-    try:
-        result = index_uc.execute(payload.document_id)
-    except FileNotFoundError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    job_id = get_job_queue().enqueue(RAG_DOCUMENT, {"document_id": payload.document_id})
 
     return {
-        "status": "indexed",
+        "status": "queued",
         "document_id": payload.document_id,
-        **result,
+        "job_id": job_id,
     }
 
 
 @router.post("/query", response_model=RagQueryOut)
-def query_rag(
+async def query_rag(
     payload: RagQueryIn,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     _, query_uc = _build_container(db)
 
-    # 1️⃣ Use Case retourne un objet métier
-    result: RagAnswer = query_uc.execute(payload.question)
+    # 1️⃣ Use Case retourne un objet métier (recherche sur l'exécuteur CPU, LLM attendu sans thread)
+    result: RagAnswer = await query_uc.execute_async(payload.question)
 
     # 2️⃣ Adaptation DOMAIN → API DTO
     return RagQueryOut(
         answer=result.answer,
         sources=result.sources,
-        contexts=[
-            RagContextItem(
-                source=c.source,
-                page=c.page,
-                score=c.score,
-                text=c.text,
-            )
-            for c in result.contexts
-        ],
+        contexts=[_context_item(c) for c in result.contexts],
     )
+
+
+def _context_item(c: RetrievedContext) -> RagContextItem:
+    return RagContextItem(
+        source=c.source,
+        page=c.page,
+        score=c.score,
+        text=c.text,
+    )
+
+
+@router.post("/query/stream")
+async def query_rag_stream(
+    payload: RagQueryIn,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Variante Server-Sent Events de /query : sources d'abord, puis la réponse token par token.
+    La recherche est faite avant d'ouvrir le flux (une erreur reste une réponse HTTP classique).
+    """
+    _, query_uc = _build_container(db)
+    result: RagAnswerStream = await query_uc.execute_stream_async(payload.question)
+
+    return sse_response(answer_events_async(
+        result.sources,
+        [_context_item(c).model_dump() for c in result.contexts],
+        result.tokens,
+    ))
@@ -1,14 +1,43 @@
-from typing import Dict, Any, List
+from dataclasses import asdict, dataclass
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional, Tuple
 from sqlalchemy.orm import Session
 
 from app.db.repositories.document_repo import get_document
 from app.modules.rag.infrastructure.vector_store_faiss import (
+    ProgressFn,
     index_document,
     retrieve_context,
 )
 from app.modules.rag.infrastructure.llm_gateway import LlmGateway
-from app.modules.rag.domain.policy import select_normative_rule
-from app.modules.rag.domain.models import RetrievedContext, RagAnswer
+from app.modules.rag.infrastructure.cpu_executor import run_cpu
+from app.modules.rag.infrastructure.answer_cache import AnswerSlot, lookup_answer, remember_answer
+from app.modules.rag.infrastructure.semantic_cache import (
+    SemanticProbe,
+    question_entities,
+    semantic_lookup,
+    semantic_remember,
+    signature,
+)
+from app.modules.rag.domain.policy import question_topics, select_normative_rule
+from app.modules.rag.domain.models import RetrievedContext, RagAnswer, RagAnswerStream
+
+NO_ANSWER = "Je ne sais pas."
+NAMESPACE = "default"
+
+
+@dataclass
+class _Pending:
+    """
+    Question prête pour le LLM : soit une réponse déjà connue (caches, pas de règle),
+    soit un prompt à générer (`prompt` non None).
+    """
+    slot: Optional[AnswerSlot]
+    sources: List[str]
+    contexts: List[RetrievedContext]
+    answer: str = NO_ANSWER
+    prompt: Optional[str] = None
+    probe: Optional[SemanticProbe] = None
+    from_cache: bool = False  # réponse du cache exact : rien à y remettre
 
 
 class IndexDocumentUseCase:
@@ -19,7 +48,7 @@ class IndexDocumentUseCase:
     def __init__(self, db: Session):
         self.db = db
 
-    def execute(self, document_id: int) -> Dict[str, Any]:
+    def execute(self, document_id: int, progress: Optional[ProgressFn] = None) -> Dict[str, Any]:
         doc = get_document(self.db, document_id)
         if not doc:
             raise FileNotFoundError("Document not found")
@@ -31,6 +60,7 @@ class IndexDocumentUseCase:
         return index_document(
             document_id=document_id,
             file_path=file_path,
+            progress=progress,
         )
 
 
@@ -52,7 +82,10 @@ class QueryRagUseCase:
             return ""
         return text.encode("utf-8", errors="ignore").decode("utf-8", errors="ignore")
 
-    def execute(self, question: str) -> RagAnswer:
+    def _retrieve(self, question: str) -> Tuple[List[RetrievedContext], List[str], Optional[str]]:
+        """
+        Recherche + règle métier : (contextes, sources, règle). Règle None => pas de règle applicable.
+        """
 
         # 1️⃣ Recherche vectorielle (INFRA)
         raw_contexts, sources = retrieve_context(question, k=5)
@@ -73,15 +106,12 @@ class QueryRagUseCase:
         # 3️⃣ Application politique métier
         rule = select_normative_rule(contexts)
 
-        if not rule:
-            return RagAnswer(
-                answer="Je ne sais pas.",
-                sources=sources,
-                contexts=contexts,
-            )
+        return contexts, sources, rule or None
 
+    @staticmethod
+    def _prompt(rule: str, question: str) -> str:
         # 4️⃣ Prompt contrôlé (pas d’hallucination)
-        prompt = f"""
+        return f"""
 Tu es un assistant administratif du service scolarité.
 Réponds uniquement à partir de la règle fournie, sans interprétation.
 
@@ -94,11 +124,138 @@ QUESTION :
 RÉPONSE :
 """.strip()
 
-        answer = self.llm.generate(prompt)
-        answer = self._force_utf8(answer)
+    @staticmethod
+    def _signature(question: str, rule: str) -> str:
+        """
+        Contexte d'une réponse pour le cache sémantique : la règle extraite, les sujets de la question
+        (une même règle couvre souvent absences ET retards) et ses entités (nombres, dates, codes).
+        """
+        return signature([rule, *question_topics(question), *question_entities(question)])
+
+    def _reuse(
+        self,
+        question: str,
+        rule: str,
+        slot: Optional[AnswerSlot],
+    ) -> Tuple[Optional[SemanticProbe], Optional[str]]:
+        """
+        Réponse d'une question proche qui a mené à la même règle (cache sémantique), sinon None.
+        """
+        probe, hit = semantic_lookup(
+            NAMESPACE,
+            question,
+            self._signature(question, rule),
+            self.llm,
+            version=slot.version if slot else None,
+        )
+        return probe, (hit.answer if hit else None)
+
+    def _cached(self, question: str) -> Tuple[Optional[AnswerSlot], Optional[RagAnswer]]:
+        """
+        Réponse déjà générée pour cette question sur l'index courant (cache persistant), sinon None.
+        """
+        slot, payload = lookup_answer(NAMESPACE, question, self.llm)
+        if payload is None:
+            return slot, None
+        return slot, RagAnswer(
+            answer=payload["answer"],
+            sources=payload["sources"],
+            contexts=[RetrievedContext(**c) for c in payload["contexts"]],
+        )
+
+    @staticmethod
+    def _remember(slot: Optional[AnswerSlot], result: RagAnswer) -> None:
+        remember_answer(
+            slot,
+            answer=result.answer,
+            sources=result.sources,
+            contexts=[asdict(c) for c in result.contexts],
+        )
 
-        return RagAnswer(
+    def _prepare(self, question: str) -> _Pending:
+        """
+        Tout ce qui précède l'appel au LLM, commun aux quatre variantes et dans cet ordre :
+        cache exact, recherche + règle, cache sémantique, puis prompt.
+        """
+        slot, cached = self._cached(question)
+        if cached is not None:
+            return _Pending(slot, cached.sources, cached.contexts, answer=cached.answer, from_cache=True)
+
+        contexts, sources, rule = self._retrieve(question)
+        if rule is None:
+            return _Pending(slot, sources, contexts, answer=NO_ANSWER)
+
+        probe, reused = self._reuse(question, rule, slot)
+        if reused is not None:
+            return _Pending(slot, sources, contexts, answer=reused)
+        return _Pending(slot, sources, contexts, prompt=self._prompt(rule, question), probe=probe)
+
+    def _finalize(self, pending: _Pending, generated: Optional[str] = None) -> RagAnswer:
+        """
+        Réponse finale (texte généré si `pending.prompt`) et alimentation des caches.
+        Les réponses en erreur du LLM sont écartées par remember_answer / semantic_remember.
+        """
+        answer = pending.answer
+        if pending.prompt is not None:
+            answer = self._force_utf8(generated or "")
+            semantic_remember(pending.probe, answer)
+
+        result = RagAnswer(
             answer=answer,
-            sources=sources,
-            contexts=contexts,
+            sources=pending.sources,
+            contexts=pending.contexts,
+        )
+        if not pending.from_cache:
+            self._remember(pending.slot, result)
+        return result
+
+    def execute(self, question: str) -> RagAnswer:
+        pending = self._prepare(question)
+        generated = self.llm.generate(pending.prompt) if pending.prompt is not None else None
+        return self._finalize(pending, generated)
+
+    def execute_stream(self, question: str) -> RagAnswerStream:
+        """
+        Même traitement que execute(), mais la génération n'est lancée qu'à la lecture de `tokens` :
+        l'appelant envoie les sources pendant que le LLM produit la réponse.
+        Le cache de réponses est lu mais pas alimenté : un flux coupé ne se distingue pas d'une fin normale.
+        """
+        pending = self._prepare(question)
+
+        tokens: Iterator[str]
+        if pending.prompt is None:
+            tokens = iter([pending.answer])
+        else:
+            tokens = (self._force_utf8(t) for t in self.llm.stream(pending.prompt))
+
+        return RagAnswerStream(
+            sources=pending.sources,
+            contexts=pending.contexts,
+            tokens=tokens,
+        )
+
+    async def execute_async(self, question: str) -> RagAnswer:
+        """
+        Version async de execute() : recherche sur l'exécuteur CPU, attente du LLM sans thread.
+        """
+        pending = await run_cpu(self._prepare, question)
+        generated = await self.llm.generate_async(pending.prompt) if pending.prompt is not None else None
+        return await run_cpu(self._finalize, pending, generated)
+
+    async def execute_stream_async(self, question: str) -> RagAnswerStream:
+        """
+        Version async de execute_stream() : `tokens` est un itérateur asynchrone.
+        """
+        pending = await run_cpu(self._prepare, question)
+        return RagAnswerStream(
+            sources=pending.sources,
+            contexts=pending.contexts,
+            tokens=self._tokens_async(pending),
         )
+
+    async def _tokens_async(self, pending: _Pending) -> AsyncIterator[str]:
+        if pending.prompt is None:
+            yield pending.answer
+            return
+        async for token in self.llm.stream_async(pending.prompt):
+            yield self._force_utf8(token)
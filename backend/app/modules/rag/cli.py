@@ -0,0 +1,262 @@
+"""
+Commandes de maintenance du vector store.
+
+Usage (depuis backend/) :
+    python -m app.modules.rag.cli compact               # tous les namespaces
+    python -m app.modules.rag.cli compact default timetable_group_10
+    python -m app.modules.rag.cli set-index default hnsw   # auto | flat | hnsw | ivf | fp16 | sq8 | pq | global
+    python -m app.modules.rag.cli convert sq8               # migre tous les namespaces, avec rapport de recall
+    python -m app.modules.rag.cli convert pq default --sample 500 -k 10
+    python -m app.modules.rag.cli report                    # octets par vecteur de chaque namespace
+    python -m app.modules.rag.cli check-embedder            # embedder courant vs vecteurs indexés
+    python -m app.modules.rag.cli reindex                   # tous les PDFs (documents + schedule_pdfs), reprise auto
+    python -m app.modules.rag.cli reindex --workers 4 --restart
+    python -m app.modules.rag.cli answer-cache              # taille et taux de succès du cache de réponses
+    python -m app.modules.rag.cli answer-cache --purge-expired
+    python -m app.modules.rag.cli answer-cache --clear timetable_group_10
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.modules.rag.infrastructure.answer_cache import get_answer_cache
+from app.modules.rag.infrastructure.bulk_reindex import ReindexSource, reindex_all
+from app.modules.rag.infrastructure.index_factory import INDEX_KINDS
+from app.modules.rag.infrastructure.semantic_cache import get_semantic_cache
+from app.modules.rag.infrastructure.vector_store_faiss import (
+    check_embedder_compatibility,
+    compact_namespace,
+    convert_namespace,
+    list_namespaces,
+    namespace_report,
+    set_index_kind,
+)
+from app.modules.timetable.rag.indexer import timetable_namespace
+
+
+def _cmd_compact(args: argparse.Namespace) -> None:
+    namespaces = args.namespaces or list_namespaces()
+    for ns in namespaces:
+        result = compact_namespace(ns, rebuild=args.rebuild)
+        print(
+            f"[{ns}] segments fusionnés={result['merged']} "
+            f"segments restants={result['segments']} chunks purgés={result['purged']}"
+        )
+
+
+def _cmd_set_index(args: argparse.Namespace) -> None:
+    kind = None if args.kind == "global" else args.kind
+    result = set_index_kind(args.namespace, kind, rebuild=not args.no_rebuild)
+    print(f"[{args.namespace}] index={args.kind} segments={result.get('segments', '-')}")
+
+
+def _cmd_convert(args: argparse.Namespace) -> None:
+    kind = None if args.kind == "global" else args.kind
+    for ns in args.namespaces or list_namespaces():
+        r = convert_namespace(ns, kind, sample=args.sample, k=args.k)
+        if not r["vectors"]:
+            print(f"[{ns}] vide, rien à convertir")
+            continue
+        print(
+            f"[{ns}] index={args.kind} segments={','.join(r['segments'])} vecteurs={r['vectors']} "
+            f"octets/vecteur={r['bytes_per_vector_before']:.0f} -> {r['bytes_per_vector_after']:.0f} "
+            f"recall@{args.k}={r[f'recall@{args.k}']:.3f}"
+        )
+
+
+def _cmd_report(args: argparse.Namespace) -> None:
+    for ns in args.namespaces or list_namespaces():
+        r = namespace_report(ns)
+        print(
+            f"[{ns}] index={','.join(r['kinds']) or '-'} segments={r['segments']} vecteurs={r['vectors']} "
+            f"octets/vecteur disque={r['disk_bytes_per_vector']:.0f} mémoire={r['memory_bytes_per_vector']:.0f}"
+        )
+
+
+def _cmd_check_embedder(args: argparse.Namespace) -> None:
+    failed = False
+    for ns in args.namespaces or list_namespaces():
+        r = check_embedder_compatibility(ns, sample=args.sample, min_cosine=args.min_cosine)
+        if not r["sample"]:
+            print(f"[{ns}] vide")
+            continue
+        failed |= not r["ok"]
+        print(
+            f"[{ns}] {'OK' if r['ok'] else 'INCOMPATIBLE'} chunks={r['sample']} "
+            f"cosinus min={r['min_cosine']:.4f} moyen={r['mean_cosine']:.4f}"
+        )
+    if failed:
+        sys.exit(1)
+
+
+def collect_sources(db: Session) -> List[ReindexSource]:
+    """
+    Un PDF par ligne `documents` (namespace default) et `schedule_pdfs` (namespace du groupe).
+    """
+    from app.db.models.document import Document
+    from app.modules.timetable.infrastructure.repositories import SchedulePdfORM
+
+    sources = [
+        ReindexSource(f"document:{d.id}", "default", d.file_path, document_id=d.id)
+        for d in db.query(Document).order_by(Document.id)
+    ]
+    sources += [
+        ReindexSource(
+            f"schedule_pdf:{p.id}",
+            timetable_namespace(p.group_id),
+            p.file_path,
+            extra={"group_id": p.group_id},
+        )
+        for p in db.query(SchedulePdfORM).order_by(SchedulePdfORM.id)
+    ]
+    return sources
+
+
+def _cmd_reindex(args: argparse.Namespace) -> None:
+    from app.db.session import SessionLocal
+
+    def list_sources() -> List[ReindexSource]:
+        db = SessionLocal()
+        try:
+            return collect_sources(db)
+        finally:
+            db.close()
+
+    t0 = time.perf_counter()
+    processed: List[int] = []
+
+    def report(done: int, total: int, source: ReindexSource, outcome: Dict[str, Any]) -> None:
+        # Débit mesuré sur cette exécution (les sources reprises ne comptent pas)
+        processed.append(done)
+        elapsed = time.perf_counter() - t0
+        rate = len(processed) / elapsed if elapsed else 0.0
+        eta = (total - done) / rate if rate else 0.0
+        status = (
+            f"ERREUR {outcome['error']}" if "error" in outcome
+            else f"chunks={outcome['chunks']} vecteurs={outcome['new']}"
+        )
+        print(
+            f"[{done}/{total}] {source.namespace} {source.key} {status} "
+            f"({rate:.2f} sources/s, reste ~{eta:.0f}s)",
+            flush=True,
+        )
+
+    r = reindex_all(
+        list_sources,
+        workers=args.workers,
+        restart=args.restart,
+        swap=not args.no_swap,
+        allow_failures=args.allow_failures,
+        report=report,
+    )
+    print(
+        f"sources={r['sources']} encodées={r['encoded']} reprises={r['resumed']} "
+        f"retirées={len(r['dropped'])} échecs={len(r['failed'])} en {time.perf_counter() - t0:.1f}s"
+    )
+    for ns, vectors in r["namespaces"].items():
+        print(f"[{ns}] basculé vecteurs={vectors}")
+    if r["failed"]:
+        for key, error in r["failed"].items():
+            print(f"échec {key} : {error}")
+        if not r["swapped"]:
+            print("Rien n'a été basculé : corriger puis relancer (reprise), ou --allow-failures")
+        sys.exit(1)
+    if not r["swapped"]:
+        print("Staging prêt : relancer sans --no-swap pour basculer")
+
+
+def _cmd_answer_cache(args: argparse.Namespace) -> None:
+    cache = get_answer_cache()
+    if cache is None:
+        print("Cache de réponses désactivé (RAG_ANSWER_CACHE=false)")
+        return
+    if args.purge_expired:
+        print(f"expirées supprimées : {cache.purge_expired()}")
+    if args.clear is not None:
+        print(f"entrées supprimées : {cache.clear(args.clear or None)}")
+    s = cache.stats()
+    print(
+        f"{s['path']} : entrées={s['entries']}/{s['max_entries']} "
+        f"octets={s['bytes']}/{s['max_bytes']} ttl={s['ttl_s']:.0f} s "
+        f"réponses servies par le cache={s['stored_hits']}"
+    )
+    semantic = get_semantic_cache()
+    if semantic is None:
+        return
+    if args.clear is not None:
+        print(f"questions sémantiques supprimées : {semantic.clear(args.clear or None)}")
+    s = semantic.stats()
+    print(
+        f"sémantique : questions={s['entries']} (max {s['max_per_namespace']}/namespace) "
+        f"seuil={s['threshold']:.2f} réponses reprises={s['stored_hits']}"
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.modules.rag.cli")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    compact = sub.add_parser("compact", help="Fusionne les petits segments et purge les suppressions")
+    compact.add_argument("namespaces", nargs="*", help="Namespaces à compacter (défaut : tous)")
+    compact.add_argument("--rebuild", action="store_true", help="Réécrit tous les segments")
+    compact.set_defaults(func=_cmd_compact)
+
+    set_index = sub.add_parser("set-index", help="Type d'index FAISS d'un namespace")
+    set_index.add_argument("namespace")
+    set_index.add_argument("kind", choices=[*INDEX_KINDS, "global"])
+    set_index.add_argument("--no-rebuild", action="store_true", help="Ne s'applique qu'aux prochains segments")
+    set_index.set_defaults(func=_cmd_set_index)
+
+    convert = sub.add_parser("convert", help="Réécrit des namespaces avec un autre type d'index (compression)")
+    convert.add_argument("kind", choices=[*INDEX_KINDS, "global"])
+    convert.add_argument("namespaces", nargs="*", help="Namespaces à convertir (défaut : tous)")
+    convert.add_argument("--sample", type=int, default=200, help="Vecteurs requêtes pour mesurer le recall")
+    convert.add_argument("-k", type=int, default=10)
+    convert.set_defaults(func=_cmd_convert)
+
+    report = sub.add_parser("report", help="Type d'index et octets par vecteur des namespaces")
+    report.add_argument("namespaces", nargs="*", help="Namespaces (défaut : tous)")
+    report.set_defaults(func=_cmd_report)
+
+    check = sub.add_parser(
+        "check-embedder",
+        help="Compare l'embedder configuré (ex: ONNX int8) aux vecteurs déjà indexés",
+    )
+    check.add_argument("namespaces", nargs="*", help="Namespaces (défaut : tous)")
+    check.add_argument("--sample", type=int, default=100)
+    check.add_argument("--min-cosine", type=float, default=None, help="Défaut : RAG_EMBEDDER_MIN_COSINE")
+    check.set_defaults(func=_cmd_check_embedder)
+
+    reindex = sub.add_parser(
+        "reindex",
+        help="Ré-extrait et ré-embedde tous les PDFs en base, puis bascule les namespaces",
+    )
+    reindex.add_argument("--workers", type=int, default=None, help="Processus d'encodage (défaut : RAG_REINDEX_WORKERS)")
+    reindex.add_argument("--restart", action="store_true", help="Abandonne une reconstruction interrompue")
+    reindex.add_argument("--no-swap", action="store_true", help="Prépare le staging sans basculer")
+    reindex.add_argument("--allow-failures", action="store_true", help="Bascule malgré des PDFs en échec")
+    reindex.set_defaults(func=_cmd_reindex)
+
+    answers = sub.add_parser("answer-cache", help="État et purge des caches de réponses (exact et sémantique)")
+    answers.add_argument("--purge-expired", action="store_true", help="Supprime les entrées au-delà du TTL")
+    answers.add_argument(
+        "--clear", nargs="?", const="", default=None, metavar="NAMESPACE",
+        help="Vide le cache (tout, ou un namespace)",
+    )
+    answers.set_defaults(func=_cmd_answer_cache)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Optional, List
+from typing import AsyncIterator, Iterator, Optional, List, Union
 
 
 @dataclass(frozen=True)
@@ -23,3 +23,14 @@ class RagAnswer:
     answer: str
     sources: List[str]
     contexts: List[RetrievedContext]
+
+
+@dataclass(frozen=True)
+class RagAnswerStream:
+    """
+    Réponse du RAG en flux : sources et contextes connus avant la génération,
+    puis les fragments de la réponse au fil de l'eau (itérateur async pour execute_stream_async).
+    """
+    sources: List[str]
+    contexts: List[RetrievedContext]
+    tokens: Union[Iterator[str], AsyncIterator[str]]
@@ -22,6 +22,15 @@ class BusinessPolicyConfig:
         "justifié",
         "validation",
     )
+    # Sujets qu'une même règle peut couvrir ensemble ("absences et retards") : distinguent deux questions
+    topic_keywords: tuple[str, ...] = (
+        "absence",
+        "retard",
+        "assiduité",
+        "ponctualité",
+        "validation",
+        "rattrapage",
+    )
     max_sentences: int = 4
     min_sentence_len: int = 25
     fallback_mode: str = "I_DONT_KNOW"
@@ -75,6 +84,10 @@ class RagBusinessPolicy:
         rule = " ".join(selected)
         return f"{rule} (page {best.page})"
 
+    def question_topics(self, question: str) -> tuple[str, ...]:
+        q = (question or "").lower()
+        return tuple(k for k in self.cfg.topic_keywords if k in q)
+
     def fallback(self) -> str:
         return "Je ne sais pas."
 
@@ -83,3 +96,7 @@ def select_normative_rule(contexts: List[RetrievedContext]) -> str | None:
     policy = RagBusinessPolicy()
     filtered = policy.select_normative_contexts(contexts)
     return policy.extract_normative_rule(filtered)
+
+
+def question_topics(question: str) -> tuple[str, ...]:
+    return RagBusinessPolicy().question_topics(question)
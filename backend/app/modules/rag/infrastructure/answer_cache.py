@@ -0,0 +1,270 @@
+"""
+Cache persistant des réponses du LLM (SQLite) : une question déjà posée sur un corpus inchangé
+n'est ni recherchée ni régénérée.
+
+Clé : question normalisée + namespace + version de l'index (changée par chaque ingestion,
+suppression ou compaction) + modèle. Une écriture dans le namespace rend donc ses anciennes
+réponses inaccessibles ; elles sont purgées à la prochaine insertion dans ce namespace.
+Bornes : durée de vie (TTL), nombre d'entrées et taille totale (éviction LRU).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.modules.rag.infrastructure.llm_gateway import ERROR_MESSAGE, LlmGateway
+from app.modules.rag.infrastructure.text_utils import normalize_question
+from app.modules.rag.infrastructure.vector_store_faiss import index_version
+
+logger = logging.getLogger(__name__)
+
+_CACHE: Optional["AnswerCache"] = None
+_LOCK = threading.Lock()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    key        TEXT PRIMARY KEY,
+    namespace  TEXT NOT NULL,
+    version    TEXT NOT NULL,
+    question   TEXT NOT NULL,
+    payload    TEXT NOT NULL,
+    size       INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used  REAL NOT NULL,
+    hits       INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS answers_namespace ON answers (namespace, version);
+CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used);
+"""
+
+
+class AnswerCache:
+    """
+    Réponses (answer + sources + contextes, en JSON) indexées par clé, dans un fichier SQLite.
+    Une connexion partagée protégée par un verrou : les accès sont courts (une requête indexée).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        ttl_s: float = 86400.0,
+        max_entries: int = 10_000,
+        max_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # un cache : perdre la dernière écriture est sans gravité
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(namespace: str, version: str, question: str, model: str = "") -> str:
+        normalized = normalize_question(question)
+        raw = "\x00".join((namespace, version, model, normalized))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT payload, created_at FROM answers WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            payload, created_at = row
+            if self.ttl_s > 0 and now - created_at > self.ttl_s:
+                self._conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE answers SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(payload)
+
+    def put(self, key: str, *, namespace: str, version: str, question: str, payload: Dict[str, Any]) -> None:
+        if self.max_entries <= 0:
+            return
+        data = json.dumps(payload, ensure_ascii=False)
+        size = len(data.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                # Réponses d'anciennes versions du namespace : plus jamais servies
+                self._conn.execute(
+                    "DELETE FROM answers WHERE namespace = ? AND version <> ?",
+                    (namespace, version),
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO answers (key, namespace, version, question, payload, size, created_at, last_used)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, namespace, version, question, data, size, now, now),
+                )
+                self._evict()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self) -> None:
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM answers").fetchone()
+        while count > self.max_entries or total > self.max_bytes:
+            # Les moins récemment servies d'abord, juste assez pour repasser sous les deux bornes
+            victims = []
+            for key, size in self._conn.execute("SELECT key, size FROM answers ORDER BY last_used LIMIT 256"):
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                victims.append((key,))
+                count -= 1
+                total -= size
+            if not victims:
+                return
+            self._conn.executemany("DELETE FROM answers WHERE key = ?", victims)
+            self.evictions += len(victims)
+
+    def purge_expired(self) -> int:
+        if self.ttl_s <= 0:
+            return 0
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM answers WHERE created_at < ?", (time.time() - self.ttl_s,))
+            self.expired += cur.rowcount
+            return cur.rowcount
+
+    def clear(self, namespace: Optional[str] = None) -> int:
+        with self._lock:
+            if namespace is None:
+                cur = self._conn.execute("DELETE FROM answers")
+            else:
+                cur = self._conn.execute("DELETE FROM answers WHERE namespace = ?", (namespace,))
+            return cur.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, nbytes, served = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM answers"
+            ).fetchone()
+            total = self.hits + self.misses
+            return {
+                "path": self.path,
+                "entries": entries,
+                "bytes": nbytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "stored_hits": served,  # réponses servies par les entrées présentes, tous processus confondus
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def get_answer_cache() -> Optional[AnswerCache]:
+    """
+    Cache de l'application (RAG_ANSWER_CACHE_*) ; None si désactivé.
+    """
+    global _CACHE
+    if _CACHE is None and settings.rag_answer_cache:
+        with _LOCK:
+            if _CACHE is None:
+                _CACHE = AnswerCache(
+                    settings.rag_answer_cache_path,
+                    ttl_s=settings.rag_answer_cache_ttl_s,
+                    max_entries=settings.rag_answer_cache_max_entries,
+                    max_bytes=settings.rag_answer_cache_max_mb * 1024 * 1024,
+                )
+    return _CACHE
+
+
+def set_answer_cache(cache: Optional[AnswerCache]) -> None:
+    """
+    Remplace le cache (tests / benchmarks) ; None => recréé depuis les settings au prochain appel.
+    """
+    global _CACHE
+    with _LOCK:
+        _CACHE = cache
+
+
+# =========================
+# Helpers des cas d'usage
+# =========================
+@dataclass(frozen=True)
+class AnswerSlot:
+    """
+    Emplacement d'une réponse : clé calculée avant la recherche, avec la version d'index lue à ce moment.
+    """
+    key: str
+    namespace: str
+    version: str
+    question: str
+
+
+def lookup_answer(namespace: str, question: str, llm: LlmGateway) -> Tuple[Optional[AnswerSlot], Optional[Dict[str, Any]]]:
+    """
+    (emplacement, réponse en cache) ; emplacement None si le cache est désactivé.
+    Base verrouillée ou corrompue : absence de réponse en cache, jamais une erreur de la requête.
+    """
+    cache = get_answer_cache()
+    if cache is None:
+        return None, None
+    version = index_version(namespace)
+    key = cache.key(namespace, version, question, getattr(llm, "model", type(llm).__name__))
+    slot = AnswerSlot(key, namespace, version, question)
+    try:
+        return slot, cache.get(key)
+    except sqlite3.Error as e:
+        logger.warning("Cache de réponses : lecture impossible (%s)", e)
+        return slot, None
+
+
+def remember_answer(
+    slot: Optional[AnswerSlot],
+    *,
+    answer: str,
+    sources: List[str],
+    contexts: List[Dict[str, Any]],
+) -> None:
+    """
+    Enregistre une réponse complète. Jamais mis en cache : les échecs d'appel au modèle,
+    et les réponses calculées sur un index modifié entre-temps.
+    """
+    cache = get_answer_cache()
+    if slot is None or cache is None or not answer or answer == ERROR_MESSAGE:
+        return
+    if index_version(slot.namespace) != slot.version:
+        return
+    try:
+        cache.put(
+            slot.key,
+            namespace=slot.namespace,
+            version=slot.version,
+            question=slot.question,
+            payload={"answer": answer, "sources": sources, "contexts": contexts},
+        )
+    except sqlite3.Error as e:
+        logger.warning("Cache de réponses : écriture impossible (%s)", e)
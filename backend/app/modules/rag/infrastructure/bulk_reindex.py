@@ -0,0 +1,449 @@
+"""
+Reconstruction complète des namespaces (changement de modèle d'embedding, de chunker...)
+sans repasser chaque PDF par l'API d'upload.
+
+- Sources : une par PDF (ligne `documents` ou `schedule_pdfs`), énumérées par l'appelant (cf. cli reindex).
+- Encodage : extraction + chunking + embedding d'une source par tâche, sur un pool de processus
+  (un modèle par processus, threads torch répartis entre les processus). Le processus principal
+  écrit seul, source par source, dans des namespaces de staging : <STORE_DIR>/.reindex/<namespace>/.
+- Reprise : chaque source écrite est notée dans .reindex/state.json, avec l'empreinte
+  embedder/chunker ; une relance après interruption ne refait que les sources manquantes.
+- Bascule : une fois toutes les sources écrites, chaque namespace est remplacé par son staging
+  en une écriture de manifest (SegmentStore.adopt) ; les requêtes ne voient jamais d'état mixte.
+  Les namespaces live sans aucune source sont vidés.
+- Écritures concurrentes (API, workers d'indexation, autres processus) : l'empreinte live de chaque
+  source est notée quand elle est listée, puis revérifiée sous le verrou d'écriture du namespace
+  (verrou fichier, cf. SegmentStore.write_lock) juste avant la bascule. Source modifiée entre-temps
+  => ré-encodée et le namespace rebasculé au tour suivant, rien n'est perdu.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from itertools import islice
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from app.core.config import settings
+from app.modules.rag.infrastructure import vector_store_faiss as vs
+from app.modules.rag.infrastructure.embedding_service import get_embedder, set_embedder
+from app.modules.rag.infrastructure.pdf_reader import page_count, resolve_workers
+from app.modules.rag.infrastructure.segment_store import MANIFEST, SegmentStore
+
+logger = logging.getLogger(__name__)
+
+STAGING_DIR = ".reindex"
+STATE_FILE = "state.json"
+# Tours encodage + bascule si le live change sans cesse pendant la reconstruction
+MAX_ROUNDS = 5
+
+
+@dataclass
+class ReindexSource:
+    key: str  # identifiant stable pour la reprise, ex. "document:12", "schedule_pdf:3"
+    namespace: str
+    file_path: str
+    document_id: Optional[int] = None  # None : PDF d'emploi du temps (dédupliqué sur tout le namespace)
+    extra: Dict[str, Any] = field(default_factory=dict)  # métadonnées ajoutées aux chunks (group_id)
+
+
+# report(sources traitées, total, source, stats d'ingestion ou {"error": ...})
+ReportFn = Callable[[int, int, ReindexSource, Dict[str, Any]], None]
+
+
+# =========================
+# ENCODAGE (processus du pool)
+# =========================
+def _init_worker(embedder: Any, threads: int) -> None:
+    if embedder is not None:
+        set_embedder(embedder)
+    # Chaque processus a son modèle : les cœurs sont partagés, pas multipliés
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    if settings.rag_embedder_backend == "torch":
+        try:
+            import torch
+
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+
+
+def encode_source(source: ReindexSource, *, pdf_workers: Optional[int] = 1) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """
+    Chunks d'une source (mêmes métadonnées qu'à l'upload) et un vecteur par content_hash distinct,
+    dans l'ordre d'apparition. Rien n'est écrit sur disque.
+    """
+    path = os.path.normpath(source.file_path)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"PDF introuvable : {path}")
+
+    chunks = list(vs._iter_pdf_chunks(
+        path,
+        {"document_id": source.document_id, "namespace": source.namespace, **source.extra},
+        n_pages=page_count(path),
+        progress=vs._no_progress,
+        pdf_workers=pdf_workers,
+    ))
+    texts = list({m["content_hash"]: m["text"] for m in chunks}.values())
+    embedder = get_embedder()
+    size = settings.rag_ingest_batch_size
+    vectors = [embedder.embed_texts(texts[i:i + size]) for i in range(0, len(texts), size)]
+    return chunks, np.concatenate(vectors) if vectors else np.zeros((0, vs.EMB_DIM), dtype="float32")
+
+
+def _encoded(
+    sources: List[ReindexSource],
+    workers: int,
+    embedder: Any,
+) -> Iterator[Tuple[ReindexSource, Union[Tuple[List[Dict[str, Any]], np.ndarray], BaseException]]]:
+    """
+    (source, (chunks, vecteurs) ou exception), dans l'ordre de fin des tâches.
+    Au plus 2 tâches en vol par processus : la mémoire ne dépend pas du nombre de sources.
+    """
+    if workers <= 1:
+        for source in sources:
+            try:
+                # Processus unique : extraction parallèle des grosses pages (cf. pdf_reader)
+                yield source, encode_source(source, pdf_workers=None)
+            except Exception as e:
+                yield source, e
+        return
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(embedder, threads),
+    )
+    try:
+        queue = iter(sources)
+        running: Dict[Future, ReindexSource] = {pool.submit(encode_source, s): s for s in islice(queue, 2 * workers)}
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                source = running.pop(future)
+                nxt = next(queue, None)
+                if nxt is not None:
+                    running[pool.submit(encode_source, nxt)] = nxt
+                error = future.exception()
+                yield source, error if error is not None else future.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# =========================
+# STAGING
+# =========================
+def _staging_root() -> str:
+    return os.path.join(vs.STORE_DIR, STAGING_DIR)
+
+
+def _staging_store(namespace: str) -> SegmentStore:
+    store = SegmentStore(
+        os.path.join(_staging_root(), vs._safe_name(namespace)),
+        vs.EMB_DIM,
+        vs.INDEX_CONFIG,
+        mmap=settings.rag_mmap_indexes,
+    )
+    if not store.exists():
+        # Même type d'index que le namespace remplacé
+        kind = vs._store(namespace).read_manifest().get("index_kind")
+        if kind:
+            store.set_index_kind(kind)
+    return store
+
+
+def _ownership(source: ReindexSource) -> Dict[str, Any]:
+    """
+    Mêmes règles qu'index_document / index_pdf_for_namespace : réécrire une source
+    (reprise après interruption) ne duplique rien.
+    """
+    if source.document_id is not None:
+        return {
+            "owned": lambda m: m.get("document_id") == source.document_id,
+            "dedupe_scope": lambda m: m.get("document_id") == source.document_id,
+            "document_id": source.document_id,
+        }
+    path = os.path.normpath(source.file_path)
+    return {
+        "owned": lambda m: m.get("source") == path,
+        "dedupe_scope": lambda m: m.get("document_id") is None,
+    }
+
+
+def _write_source(source: ReindexSource, chunks: List[Dict[str, Any]], vectors: np.ndarray) -> Dict[str, int]:
+    rows = {h: i for i, h in enumerate(dict.fromkeys(m["content_hash"] for m in chunks))}
+    return vs._ingest_chunks(
+        source.namespace,
+        chunks,
+        store=_staging_store(source.namespace),
+        embed=lambda batch: vectors[[rows[m["content_hash"]] for m in batch]],
+        **_ownership(source),
+    )
+
+
+def _drop_source(source: ReindexSource) -> None:
+    """
+    Retire du staging une source supprimée de la base pendant la reconstruction.
+    """
+    store = _staging_store(source.namespace)
+    snapshot = store.load()
+    owned = _ownership(source)["owned"]
+    ids = [m["chunk_id"] for m in snapshot.rows(with_text=False, document_id=source.document_id) if owned(m)]
+    if ids:
+        store.commit(delete_ids=ids)
+
+
+def _read_state() -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(_staging_root(), STATE_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_state(state: Dict[str, Any]) -> None:
+    os.makedirs(_staging_root(), exist_ok=True)
+    path = os.path.join(_staging_root(), STATE_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+
+def _fingerprint(embedder: Any) -> Dict[str, Any]:
+    """
+    Configuration qui détermine les vecteurs : une reprise avec une autre configuration mélangerait deux espaces.
+    """
+    embedder = embedder if embedder is not None else get_embedder()
+    return {
+        "embedder": getattr(embedder, "model_name", type(embedder).__name__),
+        "backend": getattr(embedder, "backend", ""),
+        "onnx_file": getattr(embedder, "onnx_file", ""),
+        "dim": vs.EMB_DIM,
+        "chunk_max_tokens": settings.rag_chunk_max_tokens,
+        "chunk_overlap_tokens": settings.rag_chunk_overlap_tokens,
+    }
+
+
+def _live_fingerprints(namespace: str, sources: List[ReindexSource]) -> Dict[str, str]:
+    """
+    Empreinte du contenu live de chaque source (content_hash de ses chunks) : change si l'API
+    ou un worker réindexe ou supprime la source. Colonnes seulement, une lecture par namespace.
+    """
+    by_document: Dict[Any, List[str]] = {}
+    by_path: Dict[Any, List[str]] = {}
+    for m in vs._load_store(namespace, use_cache=False).rows(with_text=False):
+        by_document.setdefault(m["document_id"], []).append(m["content_hash"])
+        by_path.setdefault(m["source"], []).append(m["content_hash"])
+
+    fingerprints = {}
+    for source in sources:
+        if source.document_id is not None:
+            hashes = by_document.get(source.document_id, [])
+        else:
+            hashes = by_path.get(os.path.normpath(source.file_path), [])
+        fingerprints[source.key] = hashlib.sha1("\n".join(sorted(hashes)).encode("ascii")).hexdigest()
+    return fingerprints
+
+
+def _record_live(state: Dict[str, Any], sources: List[ReindexSource]) -> None:
+    """
+    Empreinte live des sources nouvellement listées, et version des namespaces live
+    (un namespace sans source n'est vidé que s'il n'a pas changé depuis ce listage).
+    """
+    fresh: Dict[str, List[ReindexSource]] = {}
+    for source in sources:
+        if source.key not in state["live"]:
+            fresh.setdefault(source.namespace, []).append(source)
+    for namespace, group in fresh.items():
+        state["live"].update(_live_fingerprints(namespace, group))
+    state["live_versions"] = {
+        namespace: vs._store(namespace).read_manifest()["version"]
+        for namespace in vs.list_namespaces()
+        if vs._store(namespace).exists()
+    }
+
+
+def _changed_sources(namespace: str, state: Dict[str, Any]) -> List[str]:
+    """
+    Sources du namespace modifiées en live depuis leur listage (à appeler sous write_lock()).
+    """
+    sources = [
+        ReindexSource(**{k: v for k, v in entry.items() if k != "chunks"})
+        for entry in state["done"].values()
+        if entry["namespace"] == namespace
+    ]
+    current = _live_fingerprints(namespace, sources)
+    return [key for key, fp in current.items() if state["live"].get(key) != fp]
+
+
+def _staged_namespaces() -> List[str]:
+    root = _staging_root()
+    return sorted(
+        entry for entry in os.listdir(root)
+        if os.path.exists(os.path.join(root, entry, MANIFEST))
+    )
+
+
+def _swap(state: Dict[str, Any]) -> Tuple[Dict[str, int], List[str]]:
+    """
+    Bascule namespace par namespace ; state["swapped"] permet de reprendre une bascule interrompue.
+    Retourne (vecteurs par namespace basculé, sources modifiées en live à ré-encoder) ;
+    un namespace dont une source a changé n'est pas basculé.
+    """
+    state["swapping"] = True
+    _write_state(state)
+    staged_namespaces = _staged_namespaces()
+    sourced = {entry["namespace"] for entry in state["done"].values()}
+    # Namespaces live dont toutes les sources ont disparu : remplacés par un staging vide
+    orphans = [
+        namespace for namespace in vs.list_namespaces()
+        if namespace not in sourced and namespace not in staged_namespaces and vs._store(namespace).exists()
+    ]
+
+    vectors: Dict[str, int] = {}
+    changed: List[str] = []
+    for namespace in staged_namespaces + orphans:
+        staged = _staging_store(namespace)
+        if namespace not in state["swapped"]:
+            staged.compact(small_segment_rows=settings.rag_small_segment_rows)
+            live = vs._store(namespace)
+            with live.write_lock():
+                if namespace in sourced:
+                    stale = _changed_sources(namespace, state)
+                else:
+                    version = live.read_manifest()["version"]
+                    stale = [] if state["live_versions"].get(namespace) == version else [f"namespace:{namespace}"]
+                if stale:
+                    logger.warning("Namespace %s modifié pendant la reconstruction : %s", namespace, stale)
+                    changed += stale
+                    continue
+                manifest = live.adopt(staged)
+            vs.NAMESPACE_CACHE.invalidate(namespace)
+            state["swapped"].append(namespace)
+            _write_state(state)
+        else:
+            manifest = vs._store(namespace).read_manifest()
+        vectors[namespace] = sum(s["count"] for s in manifest["segments"]) - len(manifest["tombstones"])
+    if not changed:
+        shutil.rmtree(_staging_root(), ignore_errors=True)
+    return vectors, changed
+
+
+# =========================
+# PUBLIC API
+# =========================
+def reindex_all(
+    list_sources: Callable[[], List[ReindexSource]],
+    *,
+    workers: Optional[int] = None,
+    restart: bool = False,
+    swap: bool = True,
+    allow_failures: bool = False,
+    report: Optional[ReportFn] = None,
+    embedder: Any = None,
+) -> Dict[str, Any]:
+    """
+    Ré-extrait et ré-embedde toutes les sources dans des namespaces de staging, puis les bascule.
+
+    - list_sources : rappelé jusqu'à stabilité (sources ajoutées / supprimées pendant la reconstruction).
+    - workers : processus d'encodage (défaut RAG_REINDEX_WORKERS ; 0 => nombre de cœurs, 1 => sans pool).
+    - restart : ignore une reconstruction interrompue au lieu de la reprendre.
+    - swap=False : prépare seulement ; la bascule se fait à la prochaine relance.
+    - allow_failures : bascule malgré des sources en échec (leurs vecteurs disparaissent).
+    - embedder : embedder à installer dans les processus du pool (défaut : celui de la configuration).
+    """
+    workers = resolve_workers(settings.rag_reindex_workers if workers is None else workers)
+    report = report or (lambda done, total, source, outcome: None)
+    if restart:
+        shutil.rmtree(_staging_root(), ignore_errors=True)
+
+    fingerprint = _fingerprint(embedder)
+    state = _read_state()
+    if state is not None and state["fingerprint"] != fingerprint and not state.get("swapping"):
+        raise ValueError(
+            "Reconstruction interrompue avec une autre configuration "
+            f"({state['fingerprint']}) : relancer avec restart=True (--restart)"
+        )
+    state = state or {"fingerprint": fingerprint, "done": {}, "swapped": []}
+    state.setdefault("live", {})
+    state.setdefault("live_versions", {})
+    resumed = len(state["done"])
+    failed: Dict[str, str] = {}
+    encoded = 0
+    dropped: List[str] = []
+    result: Dict[str, Any] = {"namespaces": {}, "swapped": False}
+
+    for _ in range(MAX_ROUNDS):
+        # Bascule déjà commencée : plus aucune écriture en staging, on la termine
+        if not state.get("swapping"):
+            while True:
+                sources = list_sources()
+                _record_live(state, sources)
+                # Namespace déjà basculé : le live fait foi, ses nouvelles sources y sont déjà
+                pending = [
+                    s for s in sources
+                    if s.key not in state["done"] and s.key not in failed and s.namespace not in state["swapped"]
+                ]
+                if not pending:
+                    break
+                for source, outcome in _encoded(pending, workers, embedder):
+                    if isinstance(outcome, BaseException):
+                        failed[source.key] = f"{type(outcome).__name__}: {outcome}"
+                        logger.warning("Réindexation de %s en échec : %s", source.key, failed[source.key])
+                        report(len(state["done"]) + len(failed), len(sources), source, {"error": failed[source.key]})
+                        continue
+                    stats = _write_source(source, *outcome)
+                    state["done"][source.key] = {**asdict(source), "chunks": stats["chunks"]}
+                    _write_state(state)
+                    encoded += 1
+                    report(len(state["done"]) + len(failed), len(sources), source, stats)
+
+            current = {s.key for s in sources}
+            for key in [k for k in state["done"] if k not in current]:
+                entry = {k: v for k, v in state["done"][key].items() if k != "chunks"}
+                if entry["namespace"] not in state["swapped"]:
+                    _drop_source(ReindexSource(**entry))
+                del state["done"][key]
+                dropped.append(key)
+            if dropped:
+                _write_state(state)
+
+        result = {
+            "sources": len(state["done"]) + len(failed),
+            "encoded": encoded,
+            "resumed": resumed,
+            "failed": failed,
+            "dropped": dropped,
+            "namespaces": {},
+            "swapped": False,
+        }
+        if not swap or (failed and not allow_failures) or not os.path.isdir(_staging_root()):
+            return result
+
+        vectors, changed = _swap(state)
+        result["namespaces"].update(vectors)
+        if not changed:
+            result["swapped"] = True
+            return result
+
+        # Écritures live pendant la reconstruction : sources concernées relistées et ré-encodées
+        state["swapping"] = False
+        for key in changed:
+            state["done"].pop(key, None)
+            state["live"].pop(key, None)
+        _write_state(state)
+
+    raise RuntimeError(
+        f"Namespaces modifiés en continu pendant la reconstruction ({MAX_ROUNDS} tours) : relancer (reprise)"
+    )
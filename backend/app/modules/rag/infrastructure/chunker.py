@@ -0,0 +1,96 @@
+"""
+Découpage des pages en chunks dimensionnés en tokens (et non en caractères).
+
+- Les chunks respectent la fenêtre du modèle d'embedding (all-MiniLM-L6-v2 : 256 tokens,
+  au-delà le texte est tronqué et n'est jamais embeddé).
+- Coupure aux fins de phrase ; une phrase trop longue est coupée entre deux mots.
+- Chevauchement : les dernières phrases d'un chunk (jusqu'à `overlap_tokens`) ouvrent le suivant.
+"""
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Sequence, Tuple
+
+# count_tokens(textes) -> nombre de tokens de chaque texte (sans tokens spéciaux)
+TokenCounter = Callable[[Sequence[str]], List[int]]
+
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+|\s+(?=[•▪●►–-]\s)")
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+def approx_token_count(texts: Sequence[str]) -> List[int]:
+    """
+    Estimation prudente (sur-estime) du nombre de tokens WordPiece, sans tokenizer :
+    chaque ponctuation compte 1, chaque mot ~1 token par tranche de 4 caractères.
+    Utilisée quand le tokenizer du modèle n'est pas disponible.
+    """
+    counts = []
+    for text in texts:
+        n = 0
+        for piece in _PIECES.findall(text):
+            n += max(1, math.ceil(len(piece) / 4))
+        counts.append(n)
+    return counts
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s for s in (p.strip() for p in _SENTENCE_END.split(text)) if s]
+
+
+@dataclass(frozen=True)
+class Chunker:
+    max_tokens: int = 240  # 256 - [CLS]/[SEP] - marge
+    overlap_tokens: int = 40
+    count_tokens: TokenCounter = approx_token_count
+
+    def _units(self, text: str) -> List[Tuple[str, int]]:
+        """
+        Phrases avec leur nombre de tokens ; les phrases trop longues sont découpées entre mots.
+        """
+        sentences = split_sentences(text)
+        units: List[Tuple[str, int]] = []
+        for sentence, n in zip(sentences, self.count_tokens(sentences)):
+            if n <= self.max_tokens:
+                units.append((sentence, n))
+                continue
+
+            words = sentence.split()
+            piece: List[str] = []
+            piece_n = 0
+            for word, wn in zip(words, self.count_tokens(words)):
+                if piece and piece_n + wn > self.max_tokens:
+                    units.append((" ".join(piece), piece_n))
+                    piece, piece_n = [], 0
+                piece.append(word)
+                piece_n += wn
+            if piece:
+                units.append((" ".join(piece), piece_n))
+        return units
+
+    def split(self, text: str) -> List[str]:
+        chunks: List[str] = []
+        current: List[Tuple[str, int]] = []
+        current_n = 0
+
+        for unit, n in self._units(text):
+            if current and current_n + n > self.max_tokens:
+                chunks.append(" ".join(u for u, _ in current))
+
+                # Chevauchement : reprend les dernières unités dans la limite de overlap_tokens
+                tail: List[Tuple[str, int]] = []
+                tail_n = 0
+                for u, un in reversed(current):
+                    if tail_n + un > self.overlap_tokens or tail_n + un + n > self.max_tokens:
+                        break
+                    tail.insert(0, (u, un))
+                    tail_n += un
+                current, current_n = tail, tail_n
+
+            current.append((unit, n))
+            current_n += n
+
+        if current:
+            chunks.append(" ".join(u for u, _ in current))
+        return chunks
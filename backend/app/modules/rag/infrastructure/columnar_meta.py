@@ -0,0 +1,215 @@
+"""
+Métadonnées de chunks en colonnes, mappées en mémoire.
+
+Pour un segment <base> :
+    <base>.cols.npy   tableau structuré à largeur fixe (chunk_id, document_id, page, ...)
+    <base>.text.bin   textes UTF-8 concaténés (bornes text_start / text_end dans les colonnes)
+    <base>.meta.json  tables de chaînes partagées (sources, métadonnées additionnelles)
+
+À la lecture, seules les lignes réellement retournées (top-k) sont décodées.
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+META_DTYPE = np.dtype([
+    ("chunk_id", "<i8"),
+    ("document_id", "<i8"),     # -1 => None
+    ("page", "<i4"),
+    ("chunk_index", "<i4"),     # -1 => None
+    ("source_id", "<i4"),
+    ("extra_id", "<i4"),
+    ("content_hash", "u1", (20,)),  # sha1 brut
+    ("text_start", "<i8"),
+    ("text_end", "<i8"),
+])
+
+# Clés stockées en colonnes ; tout le reste part dans la table "extras"
+_COLUMN_KEYS = {"chunk_id", "document_id", "page", "chunk_index", "source", "text", "content_hash"}
+
+
+def _paths(base: str) -> tuple[str, str, str]:
+    return f"{base}.cols.npy", f"{base}.text.bin", f"{base}.meta.json"
+
+
+def _opt(value: Optional[int]) -> int:
+    return -1 if value is None else int(value)
+
+
+class _RowEncoder:
+    """
+    Encode des lignes (dicts) en colonnes ; le texte part dans `sink` (fichier ou buffer).
+    Les tables sources / extras sont partagées entre les appels successifs.
+    """
+
+    def __init__(self, sink: BinaryIO) -> None:
+        self.sink = sink
+        self.offset = 0
+        self.sources: List[str] = []
+        self._source_ids: Dict[str, int] = {}
+        self.extras: List[Dict[str, Any]] = []
+        self._extra_ids: Dict[str, int] = {}
+
+    def encode(self, rows: List[Dict[str, Any]]) -> np.ndarray:
+        cols = np.zeros(len(rows), dtype=META_DTYPE)
+        for i, m in enumerate(rows):
+            text = m.get("text", "") or ""
+            encoded = text.encode("utf-8")
+
+            source = m.get("source", "") or ""
+            if source not in self._source_ids:
+                self._source_ids[source] = len(self.sources)
+                self.sources.append(source)
+
+            extra = {k: v for k, v in m.items() if k not in _COLUMN_KEYS}
+            extra_key = json.dumps(extra, sort_keys=True, ensure_ascii=False)
+            if extra_key not in self._extra_ids:
+                self._extra_ids[extra_key] = len(self.extras)
+                self.extras.append(extra)
+
+            content_hash = m.get("content_hash") or hashlib.sha1(encoded).hexdigest()
+
+            cols[i] = (
+                _opt(m.get("chunk_id")),
+                _opt(m.get("document_id")),
+                int(m.get("page", 0) or 0),
+                _opt(m.get("chunk_index")),
+                self._source_ids[source],
+                self._extra_ids[extra_key],
+                np.frombuffer(bytes.fromhex(content_hash), dtype=np.uint8),
+                self.offset,
+                self.offset + len(encoded),
+            )
+            self.sink.write(encoded)
+            self.offset += len(encoded)
+        return cols
+
+
+class ColumnarMetaWriter:
+    """
+    Écriture incrémentale d'un segment : le texte est écrit au fil de l'eau,
+    seules les colonnes à largeur fixe restent en mémoire jusqu'à `close()`.
+    """
+
+    def __init__(self, base: str) -> None:
+        self.base = base
+        self._text = open(_paths(base)[1], "wb")
+        self._encoder = _RowEncoder(self._text)
+        self._cols: List[np.ndarray] = []
+
+    def append(self, rows: List[Dict[str, Any]]) -> None:
+        self._cols.append(self._encoder.encode(rows))
+
+    def close(self) -> None:
+        cols_path, _, meta_path = _paths(self.base)
+        self._text.close()
+        cols = np.concatenate(self._cols) if self._cols else np.zeros(0, dtype=META_DTYPE)
+        np.save(cols_path, cols)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"sources": self._encoder.sources, "extras": self._encoder.extras}, f, ensure_ascii=False)
+
+    def abort(self) -> None:
+        self._text.close()
+        for path in _paths(self.base):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class ColumnarMeta:
+    """
+    Métadonnées d'un segment. S'utilise comme une liste de dicts en lecture
+    (len, meta[i], itération), mais sans désérialiser tout le segment.
+    """
+
+    def __init__(
+        self,
+        cols: np.ndarray,
+        text: Any,
+        sources: List[str],
+        extras: List[Dict[str, Any]],
+    ) -> None:
+        self.cols = cols
+        self._text = text
+        self.sources = sources
+        self.extras = extras
+
+    # ---------- construction ----------
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "ColumnarMeta":
+        blob = io.BytesIO()
+        encoder = _RowEncoder(blob)
+        cols = encoder.encode(list(rows))
+        return cls(cols, blob.getvalue(), encoder.sources, encoder.extras)
+
+    @classmethod
+    def open(cls, base: str, *, mmap: bool = True) -> "ColumnarMeta":
+        cols_path, text_path, meta_path = _paths(base)
+        cols = np.load(cols_path, mmap_mode="r" if mmap else None)
+
+        if mmap and os.path.getsize(text_path) > 0:
+            text = np.memmap(text_path, dtype=np.uint8, mode="r")
+        else:
+            with open(text_path, "rb") as f:
+                text = f.read()
+
+        with open(meta_path, "r", encoding="utf-8") as f:
+            header = json.load(f)
+        return cls(cols, text, header["sources"], header["extras"])
+
+    def write(self, base: str) -> None:
+        cols_path, text_path, meta_path = _paths(base)
+        np.save(cols_path, np.asarray(self.cols, dtype=META_DTYPE))
+        with open(text_path, "wb") as f:
+            f.write(bytes(self._text))
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"sources": self.sources, "extras": self.extras}, f, ensure_ascii=False)
+
+    @staticmethod
+    def files(base: str) -> tuple[str, str, str]:
+        return _paths(base)
+
+    # ---------- lecture ----------
+    @property
+    def chunk_ids(self) -> np.ndarray:
+        return self.cols["chunk_id"]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.cols.nbytes) + len(self._text)
+
+    def text(self, i: int) -> str:
+        row = self.cols[i]
+        return bytes(self._text[int(row["text_start"]):int(row["text_end"])]).decode("utf-8")
+
+    def row(self, i: int, *, with_text: bool = True) -> Dict[str, Any]:
+        c = self.cols[i]
+        document_id = int(c["document_id"])
+        chunk_index = int(c["chunk_index"])
+        m: Dict[str, Any] = {
+            **self.extras[int(c["extra_id"])],
+            "chunk_id": int(c["chunk_id"]),
+            "document_id": None if document_id < 0 else document_id,
+            "source": self.sources[int(c["source_id"])],
+            "page": int(c["page"]),
+            "chunk_index": None if chunk_index < 0 else chunk_index,
+            "content_hash": c["content_hash"].tobytes().hex(),
+        }
+        if with_text:
+            m["text"] = self.text(i)
+        return m
+
+    def __len__(self) -> int:
+        return int(self.cols.shape[0])
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        return self.row(int(i))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self.row(i)
@@ -0,0 +1,51 @@
+"""
+Exécuteur dédié au travail CPU des requêtes (embedding de la question, recherche FAISS / BM25, reranking).
+
+Les routes async y envoient ce travail au lieu du threadpool de Starlette : une requête qui attend
+le LLM n'occupe aucun thread, et les requêtes qui calculent ne concurrencent pas les dépendances
+synchrones (session DB, authentification) pour les jetons du threadpool.
+Taille : RAG_CPU_WORKERS (0 => nombre de cœurs) ; torch et FAISS relâchent le GIL pendant le calcul.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from app.core.config import settings
+from app.modules.rag.infrastructure.pdf_reader import resolve_workers
+
+T = TypeVar("T")
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_LOCK = threading.Lock()
+
+
+def get_cpu_executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(
+                    max_workers=resolve_workers(settings.rag_cpu_workers),
+                    thread_name_prefix="rag-cpu",
+                )
+    return _EXECUTOR
+
+
+async def run_cpu(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Exécute func(*args, **kwargs) sur l'exécuteur CPU sans bloquer la boucle d'événements.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_cpu_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_cpu_executor() -> None:
+    global _EXECUTOR
+    with _LOCK:
+        executor, _EXECUTOR = _EXECUTOR, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -1,12 +1,99 @@
 from __future__ import annotations
+
+import logging
+import threading
+from typing import List, Sequence
+
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+from app.modules.rag.infrastructure.chunker import approx_token_count
+
+logger = logging.getLogger(__name__)
+
+
+EMBEDDER_BACKENDS = ("torch", "onnx")
 
 
 class SentenceTransformerEmbedder:
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2", emb_dim: int = 384) -> None:
-        self.model = SentenceTransformer(model_name)
+    """
+    Embedder SentenceTransformer.
+    Le modèle (et torch) n'est chargé qu'au premier encodage, pas à la construction.
+
+    backend="onnx" : même modèle exécuté par ONNX Runtime (extra `onnx` du projet) ;
+    onnx_file choisit la variante du dépôt du modèle, ex. "onnx/model_quint8_avx2.onnx" (int8).
+    Vecteurs compatibles avec les index existants à une tolérance cosinus près
+    (cf. vector_store_faiss.check_embedder_compatibility).
+    """
+
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        emb_dim: int = 384,
+        *,
+        backend: str = "torch",
+        onnx_file: str = "",
+    ) -> None:
+        if backend not in EMBEDDER_BACKENDS:
+            raise ValueError(f"Backend d'embedding inconnu : {backend}")
+        self.model_name = model_name
         self.emb_dim = emb_dim
+        self.backend = backend
+        self.onnx_file = onnx_file
+        self._model = None
+        self._tokenizer = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+
+                    if self.backend == "torch":
+                        self._model = SentenceTransformer(self.model_name)
+                    else:
+                        model_kwargs = {"file_name": self.onnx_file} if self.onnx_file else None
+                        self._model = SentenceTransformer(
+                            self.model_name,
+                            backend=self.backend,
+                            model_kwargs=model_kwargs,
+                        )
+        return self._model
+
+    @property
+    def tokenizer(self):
+        """
+        Tokenizer du modèle, chargé seul (sans torch) tant que le modèle ne l'est pas.
+        False si indisponible (hors ligne, modèle absent du cache).
+        """
+        if self._model is not None:
+            return self._model.tokenizer
+        if self._tokenizer is None:
+            with self._lock:
+                if self._tokenizer is None:
+                    try:
+                        from transformers import AutoTokenizer
+
+                        name = self.model_name if "/" in self.model_name else f"sentence-transformers/{self.model_name}"
+                        self._tokenizer = AutoTokenizer.from_pretrained(name)
+                    except Exception:
+                        logger.warning("Tokenizer %s indisponible : estimation du nombre de tokens", self.model_name)
+                        self._tokenizer = False
+        return self._tokenizer
+
+    def count_tokens(self, texts: Sequence[str]) -> List[int]:
+        if not texts:
+            return []
+        tokenizer = self.tokenizer
+        if not tokenizer:
+            return approx_token_count(texts)
+        encoded = tokenizer(list(texts), add_special_tokens=False, truncation=False)["input_ids"]
+        return [len(ids) for ids in encoded]
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
 
     @staticmethod
     def _normalize(v: np.ndarray) -> np.ndarray:
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.modules.rag.infrastructure.chunker import Chunker, approx_token_count
+from app.modules.rag.infrastructure.embedder_st import SentenceTransformerEmbedder
+
+logger = logging.getLogger(__name__)
+
+_EMBEDDER: Optional[SentenceTransformerEmbedder] = None
+_LOCK = threading.Lock()
+
+
+class QueryEmbeddingCache:
+    """
+    Cache LRU borné : question (espaces normalisés) -> vecteur requête normalisé.
+    Les questions répétées ne repassent pas par le modèle.
+    """
+
+    def __init__(self, max_size: int = 2048) -> None:
+        self.max_size = max_size
+        self._items: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def embedding_key(question: str) -> str:
+        # Casse conservée : RAG_EMBEDDING_MODEL peut être un modèle "cased"
+        return " ".join((question or "").split())
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vec = self._items.get(key)
+            if vec is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return vec
+
+    def put(self, key: str, vec: np.ndarray) -> None:
+        if self.max_size <= 0:
+            return
+        vec = np.array(vec, dtype="float32", copy=True)
+        vec.setflags(write=False)
+        with self._lock:
+            self._items[key] = vec
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._items),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+
+QUERY_CACHE = QueryEmbeddingCache(max_size=settings.rag_query_cache_size)
+
+
+def get_embedder() -> SentenceTransformerEmbedder:
+    """
+    Embedder unique du process, partagé par l'indexation et la recherche.
+    Construit à la demande : aucun modèle n'est chargé à l'import.
+    """
+    global _EMBEDDER
+    if _EMBEDDER is None:
+        with _LOCK:
+            if _EMBEDDER is None:
+                _EMBEDDER = SentenceTransformerEmbedder(
+                    model_name=settings.rag_embedding_model,
+                    emb_dim=settings.rag_embedding_dim,
+                    backend=settings.rag_embedder_backend,
+                    onnx_file=settings.rag_embedder_onnx_file,
+                )
+    return _EMBEDDER
+
+
+def set_embedder(embedder: Optional[SentenceTransformerEmbedder]) -> None:
+    """
+    Remplace l'embedder partagé (tests, backend alternatif). None => reconstruit à la demande.
+    """
+    global _EMBEDDER
+    with _LOCK:
+        _EMBEDDER = embedder
+    # Les vecteurs en cache viennent de l'ancien embedder
+    QUERY_CACHE.clear()
+
+
+def get_chunker() -> Chunker:
+    """
+    Chunker partagé par les indexeurs, dimensionné avec le tokenizer de l'embedder courant
+    (estimation prudente si l'embedder n'en expose pas).
+    """
+    count_tokens = getattr(get_embedder(), "count_tokens", None) or approx_token_count
+    return Chunker(
+        max_tokens=settings.rag_chunk_max_tokens,
+        overlap_tokens=settings.rag_chunk_overlap_tokens,
+        count_tokens=count_tokens,
+    )
+
+
+def embed_query_cached(question: str) -> np.ndarray:
+    """
+    Vecteur (1, dim) normalisé d'une question, servi depuis QUERY_CACHE si déjà vue.
+    """
+    key = QUERY_CACHE.embedding_key(question)
+    vec = QUERY_CACHE.get(key)
+    if vec is None:
+        vec = get_embedder().embed_query(key)
+        QUERY_CACHE.put(key, vec)
+    return vec
+
+
+def warm_up_embedder(*, background: bool = True) -> Optional[threading.Thread]:
+    """
+    Charge le modèle en avance (optionnel) pour que la première requête ne paie pas le chargement.
+    """
+
+    def _run() -> None:
+        try:
+            get_embedder().embed_query("warm-up")
+            logger.info("Embedder prêt (%s)", settings.rag_embedding_model)
+        except Exception:
+            logger.exception("Échec du warm-up de l'embedder")
+
+    if not background:
+        _run()
+        return None
+
+    thread = threading.Thread(target=_run, name="embedder-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,213 @@
+"""
+Fabrique d'index FAISS par segment.
+
+- "flat" : recherche exacte (IndexFlatIP), coût linéaire.
+- "hnsw" : graphe HNSW, pas d'entraînement.
+- "ivf"  : IVF entraîné sur les vecteurs du segment.
+- "fp16" : recherche exacte sur vecteurs stockés en float16 (2 octets / dimension).
+- "sq8"  : quantification scalaire 8 bits, entraînée (1 octet / dimension).
+- "pq"   : product quantization (`pq_m` octets / vecteur au plus) ; sous `PQ_MIN_TRAIN`
+           vecteurs, pas assez de points pour entraîner les codebooks => "sq8".
+- "auto" : flat sous `ann_threshold` vecteurs, sinon `ann_kind`.
+
+Tous les index utilisent le produit scalaire (vecteurs normalisés => cosinus)
+et sont enveloppés dans un IndexIDMap2 : la recherche renvoie directement les chunk_id.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+import faiss
+import numpy as np
+
+INDEX_KINDS = ("auto", "flat", "hnsw", "ivf", "fp16", "sq8", "pq")
+
+# 39 points par centroïde (recommandation FAISS) pour des codebooks de 2^4 centroïdes au moins
+PQ_MIN_TRAIN = 39 * 2 ** 4
+
+
+@dataclass(frozen=True)
+class IndexConfig:
+    kind: str = "auto"
+    ann_kind: str = "hnsw"
+    ann_threshold: int = 20_000
+    hnsw_m: int = 32
+    hnsw_ef_construction: int = 80
+    hnsw_ef_search: int = 64
+    ivf_nprobe: int = 16
+    pq_m: int = 48  # sous-quantifieurs (octets par vecteur en 8 bits)
+
+    def resolve(self, n: int) -> str:
+        if self.kind == "pq" and n < PQ_MIN_TRAIN:
+            return "sq8"
+        if self.kind != "auto":
+            return self.kind
+        return self.ann_kind if n >= self.ann_threshold else "flat"
+
+
+def _ivf_nlist(n: int) -> int:
+    # ~4·sqrt(n) listes, avec au moins 39 points d'entraînement par liste
+    return max(1, min(int(4 * math.sqrt(n)), n // 39))
+
+
+def _pq_params(dim: int, n: int, m: int) -> tuple[int, int]:
+    # m doit diviser dim ; codebooks de 2^nbits centroïdes, 39 points d'entraînement par centroïde
+    m = max(d for d in range(1, min(m, dim) + 1) if dim % d == 0)
+    nbits = max(4, min(8, int(math.log2(max(n, 1) / 39))))
+    return m, nbits
+
+
+def build_index(
+    vectors: np.ndarray,
+    dim: int,
+    cfg: IndexConfig,
+    ids: Optional[np.ndarray] = None,
+) -> faiss.Index:
+    """
+    ids : chunk_id stables des vecteurs (IndexIDMap2). None => positions 0..n-1.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype="float32").reshape(-1, dim)
+    n = vectors.shape[0]
+    kind = cfg.resolve(n)
+
+    if kind == "flat":
+        index = faiss.IndexFlatIP(dim)
+    elif kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, cfg.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = cfg.hnsw_ef_construction
+    elif kind == "ivf":
+        quantizer = faiss.IndexFlatIP(dim)
+        index = faiss.IndexIVFFlat(quantizer, dim, _ivf_nlist(n), faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        # Permet reconstruct_n (compaction), persisté avec l'index
+        index.make_direct_map()
+    elif kind == "fp16":
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+    elif kind == "sq8":
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+    elif kind == "pq":
+        m, nbits = _pq_params(dim, n, cfg.pq_m)
+        index = faiss.IndexPQ(dim, m, nbits, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+    else:
+        raise ValueError(f"Type d'index inconnu : {kind}")
+
+    if ids is None:
+        ids = np.arange(n, dtype="int64")
+    index = faiss.IndexIDMap2(index)
+    if n:
+        index.add_with_ids(vectors, np.ascontiguousarray(ids, dtype="int64"))
+    configure_for_search(index, cfg)
+    return index
+
+
+def inner_index(index: faiss.Index) -> faiss.Index:
+    """
+    Index réel sous un éventuel IndexIDMap (les positions internes = ordre d'ajout).
+    """
+    if isinstance(index, faiss.IndexIDMap):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def is_id_mapped(index: faiss.Index) -> bool:
+    return isinstance(index, faiss.IndexIDMap)
+
+
+def segment_vectors(index: faiss.Index) -> np.ndarray:
+    """
+    Vecteurs d'un segment dans l'ordre des lignes (compaction, conversion).
+    """
+    inner = inner_index(index)
+    if inner.ntotal == 0:
+        return np.zeros((0, inner.d), dtype="float32")
+    return inner.reconstruct_n(0, inner.ntotal)
+
+
+def index_nbytes(index: faiss.Index) -> int:
+    """
+    Mémoire estimée d'un index : codes des vecteurs (+ liens HNSW, + ids).
+    """
+    inner = inner_index(index)
+    n = int(inner.ntotal)
+    ids = 8 * n if is_id_mapped(index) else 0
+    if isinstance(inner, faiss.IndexHNSW):
+        storage = faiss.downcast_index(inner.storage)
+        links = 4 * int(inner.hnsw.neighbors.size())
+        return int(storage.code_size) * n + links + ids
+    ivf = faiss.try_extract_index_ivf(inner)
+    if ivf is not None:
+        return (int(ivf.code_size) + 8) * n + ids
+    if isinstance(inner, faiss.IndexFlatCodes):
+        return int(inner.code_size) * n + ids
+    return 4 * int(inner.d) * n + ids
+
+
+def search_params(index: faiss.Index, selector: faiss.IDSelector) -> Optional[faiss.SearchParameters]:
+    """
+    Paramètres de recherche portant un IDSelector (exclusion des chunks supprimés),
+    du bon type pour l'index sous-jacent.
+    None : l'index ne sait pas filtrer (IndexPQ) => sur-échantillonnage à la recherche.
+    """
+    inner = inner_index(index)
+    if isinstance(inner, faiss.IndexPQ):
+        return None
+    if isinstance(inner, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=inner.hnsw.efSearch)
+    ivf = faiss.try_extract_index_ivf(inner)
+    if ivf is not None:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+    return faiss.SearchParameters(sel=selector)
+
+
+def configure_for_search(index: faiss.Index, cfg: IndexConfig) -> faiss.Index:
+    """
+    Paramètres de recherche (non persistés par FAISS) : efSearch / nprobe.
+    """
+    inner = inner_index(index)
+    if isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = cfg.hnsw_ef_search
+    ivf = faiss.try_extract_index_ivf(inner)
+    if ivf is not None:
+        ivf.nprobe = cfg.ivf_nprobe
+    return index
+
+
+def read_index(path: str, *, kind: str = "flat", mmap: bool = True) -> faiss.Index:
+    """
+    Lecture d'un index persisté. mmap=True : les vecteurs restent dans le page cache
+    (partagé entre workers uvicorn du même hôte) au lieu d'être copiés en mémoire privée.
+    """
+    if not mmap:
+        return faiss.read_index(path)
+
+    if kind == "ivf":
+        # Listes inversées relues en OnDiskInvertedLists (mmap)
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    else:
+        # Codes des index "flat" (IndexFlat, stockage HNSW) mappés sans copie (faiss >= 1.9)
+        ifc = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+        if ifc is None:
+            return faiss.read_index(path)
+        flags = ifc | faiss.IO_FLAG_READ_ONLY
+
+    try:
+        return faiss.read_index(path, flags)
+    except RuntimeError:
+        return faiss.read_index(path)
+
+
+def index_kind(index: faiss.Index) -> str:
+    index = inner_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if faiss.try_extract_index_ivf(index) is not None:
+        return "ivf"
+    if isinstance(index, faiss.IndexPQ):
+        return "pq"
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        return "fp16" if index.sq.qtype == faiss.ScalarQuantizer.QT_fp16 else "sq8"
+    return "flat"
@@ -1,6 +1,24 @@
 from __future__ import annotations
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+import asyncio
+import codecs
+import itertools
+import json
+import logging
 import subprocess
+import threading
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_GATEWAY: Optional["LlmGateway"] = None
+_LOCK = threading.Lock()
+
+ERROR_MESSAGE = "Je ne sais pas (erreur lors de l'appel au modèle local)."
+ASYNC_SHARD_SIZE = 32  # connexions max par client httpx async
 
 
 # =========================
@@ -15,6 +33,36 @@ class LlmGateway:
     def generate(self, prompt: str) -> str:
         raise NotImplementedError
 
+    def stream(self, prompt: str) -> Iterator[str]:
+        """
+        Réponse par fragments, au fil de la génération.
+        Par défaut : la réponse complète en un seul fragment (adaptateurs sans streaming).
+        """
+        yield self.generate(prompt)
+
+    async def generate_async(self, prompt: str) -> str:
+        """
+        Version asynchrone de generate(), pour les routes async : l'attente du LLM n'occupe pas de thread.
+        Par défaut : generate() dans un thread (adaptateurs synchrones).
+        """
+        return await asyncio.to_thread(self.generate, prompt)
+
+    async def stream_async(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Version asynchrone de stream(). Par défaut : la réponse complète en un seul fragment.
+        """
+        yield await self.generate_async(prompt)
+
+    def close(self) -> None:
+        """
+        Libère les ressources (connexions) à l'arrêt de l'application.
+        """
+
+    async def aclose(self) -> None:
+        """
+        Libère les ressources asynchrones (connexions de la boucle d'événements).
+        """
+
 
 # =========================
 # FALLBACK
@@ -32,11 +80,189 @@ class LocalFallbackGateway(LlmGateway):
 
 
 # =========================
-# OLLAMA GATEWAY (LOCAL)
+# OLLAMA GATEWAY (API REST)
+# =========================
+class OllamaHttpGateway(LlmGateway):
+    """
+    Adaptateur vers l'API REST d'Ollama (POST /api/generate), via un client httpx partagé :
+    connexions HTTP persistantes (pool), pas de processus par question.
+
+    - keep_alive : durée pendant laquelle Ollama garde le modèle chargé après une requête
+      ("30m", "-1" = toujours) ; évite de recharger les poids entre deux questions espacées.
+    - connect_timeout_s / read_timeout_s : un serveur absent ou bloqué ne bloque pas la requête HTTP.
+    - options : paramètres de génération Ollama (temperature, num_ctx, num_predict...).
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        model: str = "llama3.1",
+        *,
+        keep_alive: str = "30m",
+        connect_timeout_s: float = 5.0,
+        read_timeout_s: float = 120.0,
+        pool_size: int = 8,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.keep_alive = keep_alive
+        self.options = dict(options or {})
+        self._timeout = httpx.Timeout(read_timeout_s, connect=connect_timeout_s)
+        self._limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self._client: Optional[httpx.Client] = None
+        # Pool async réparti en plusieurs clients : l'attribution des connexions par httpcore
+        # parcourt tout le pool à chaque requête (coût quadratique avec des centaines de connexions)
+        shards = max(1, -(-pool_size // ASYNC_SHARD_SIZE))
+        self._async_limits = httpx.Limits(
+            max_connections=-(-pool_size // shards),
+            max_keepalive_connections=-(-pool_size // shards),
+        )
+        self._async_clients: List[httpx.AsyncClient] = []
+        self._async_shards = shards
+        self._async_next = itertools.count()
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(
+                        base_url=self.base_url,
+                        timeout=self._timeout,
+                        limits=self._limits,
+                    )
+        return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """
+        Client async de la boucle d'événements courante (tourniquet sur les fragments du pool) ;
+        recréés si la boucle change (un client httpx async est lié à sa boucle).
+        """
+        loop = asyncio.get_running_loop()
+        if not self._async_clients or self._async_loop is not loop:
+            self._async_clients = [
+                httpx.AsyncClient(
+                    base_url=self.base_url,
+                    timeout=self._timeout,
+                    limits=self._async_limits,
+                )
+                for _ in range(self._async_shards)
+            ]
+            self._async_loop = loop
+        return self._async_clients[next(self._async_next) % len(self._async_clients)]
+
+    @staticmethod
+    def _fragment(line: str) -> Dict[str, Any]:
+        part = json.loads(line)
+        if part.get("error"):
+            raise ValueError(part["error"])
+        return part
+
+    def _payload(self, prompt: str, **extra: Any) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": self.keep_alive,
+            **extra,
+        }
+        if self.options:
+            payload["options"] = self.options
+        return payload
+
+    def generate(self, prompt: str) -> str:
+        try:
+            response = self.client.post("/api/generate", json=self._payload(prompt))
+            response.raise_for_status()
+            return str(response.json().get("response", "")).strip()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning("Appel Ollama (%s, %s) en échec : %s", self.base_url, self.model, e)
+            return ERROR_MESSAGE
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """
+        Fragments de POST /api/generate (stream=true, une ligne JSON par fragment).
+        Erreur avant le premier fragment => message de repli ; après => réponse tronquée (journalisée).
+        """
+        produced = False
+        try:
+            with self.client.stream("POST", "/api/generate", json=self._payload(prompt, stream=True)) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    part = self._fragment(line)
+                    if part.get("response"):
+                        produced = True
+                        yield part["response"]
+                    if part.get("done"):
+                        return
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning("Flux Ollama (%s, %s) en échec : %s", self.base_url, self.model, e)
+            if not produced:
+                yield ERROR_MESSAGE
+
+    async def generate_async(self, prompt: str) -> str:
+        try:
+            response = await self.async_client.post("/api/generate", json=self._payload(prompt))
+            response.raise_for_status()
+            return str(response.json().get("response", "")).strip()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning("Appel Ollama (%s, %s) en échec : %s", self.base_url, self.model, e)
+            return ERROR_MESSAGE
+
+    async def stream_async(self, prompt: str) -> AsyncIterator[str]:
+        produced = False
+        try:
+            async with self.async_client.stream("POST", "/api/generate", json=self._payload(prompt, stream=True)) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    part = self._fragment(line)
+                    if part.get("response"):
+                        produced = True
+                        yield part["response"]
+                    if part.get("done"):
+                        return
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning("Flux Ollama (%s, %s) en échec : %s", self.base_url, self.model, e)
+            if not produced:
+                yield ERROR_MESSAGE
+
+    def preload(self) -> bool:
+        """
+        Charge le modèle côté Ollama (requête sans prompt) pour que la première question ne paie pas le chargement.
+        """
+        try:
+            self.client.post("/api/generate", json={"model": self.model, "keep_alive": self.keep_alive}).raise_for_status()
+            return True
+        except httpx.HTTPError as e:
+            logger.warning("Préchargement du modèle %s impossible : %s", self.model, e)
+            return False
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self) -> None:
+        clients, self._async_clients = self._async_clients, []
+        for client in clients:
+            await client.aclose()
+
+
+# =========================
+# OLLAMA GATEWAY (CLI LOCALE)
 # =========================
 class OllamaGateway(LlmGateway):
     """
-    Adaptateur vers Ollama en local.
+    Adaptateur vers Ollama en local, un processus `ollama run` par question (LLM_BACKEND=cli).
     Compatible avec mistral, llama3, phi, etc.
     Corrige explicitement les problèmes d'encodage UTF-8 sous Windows.
     """
@@ -58,7 +284,86 @@ class OllamaGateway(LlmGateway):
             return process.stdout.decode("utf-8", errors="ignore").strip()
 
         except Exception as e:
-            return "Je ne sais pas (erreur lors de l'appel au modèle local)."
+            return ERROR_MESSAGE
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """
+        Sortie de `ollama run` lue au fil de l'eau (le CLI écrit les tokens dès qu'ils sont générés).
+        """
+        try:
+            process = subprocess.Popen(
+                ["ollama", "run", self.model],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            yield ERROR_MESSAGE
+            return
+
+        produced = False
+        try:
+            process.stdin.write(prompt.encode("utf-8"))
+            process.stdin.close()
+            # Décodage incrémental : un caractère UTF-8 peut être coupé entre deux lectures
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+            while chunk := process.stdout.read1(4096):
+                text = decoder.decode(chunk)
+                if text:
+                    produced = True
+                    yield text
+            if process.wait() != 0 and not produced:
+                yield ERROR_MESSAGE
+        finally:
+            process.stdout.close()
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+
+    async def generate_async(self, prompt: str) -> str:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                "ollama", "run", self.model,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+            stdout, _ = await process.communicate(prompt.encode("utf-8"))
+            if process.returncode != 0:
+                return ERROR_MESSAGE
+            return stdout.decode("utf-8", errors="ignore").strip()
+        except Exception:
+            return ERROR_MESSAGE
+
+    async def stream_async(self, prompt: str) -> AsyncIterator[str]:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                "ollama", "run", self.model,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            yield ERROR_MESSAGE
+            return
+
+        produced = False
+        try:
+            process.stdin.write(prompt.encode("utf-8"))
+            await process.stdin.drain()
+            process.stdin.close()
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+            while chunk := await process.stdout.read(4096):
+                text = decoder.decode(chunk)
+                if text:
+                    produced = True
+                    yield text
+            if await process.wait() != 0 and not produced:
+                yield ERROR_MESSAGE
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
 
 
 # =========================
@@ -83,12 +388,44 @@ class ExistingCallLlmGateway(LlmGateway):
 # =========================
 # FACTORY (RECOMMANDÉ)
 # =========================
+def _build_gateway() -> LlmGateway:
+    if settings.llm_backend == "cli":
+        return OllamaGateway(model=settings.ollama_model)
+    return OllamaHttpGateway(
+        settings.ollama_base_url,
+        settings.ollama_model,
+        keep_alive=settings.ollama_keep_alive,
+        connect_timeout_s=settings.ollama_connect_timeout_s,
+        read_timeout_s=settings.ollama_read_timeout_s,
+        pool_size=settings.ollama_pool_size,
+        options=settings.ollama_options,
+    )
+
+
 def get_llm_gateway() -> LlmGateway:
     """
     Point unique de décision.
     Tu peux changer de modèle ici sans toucher au métier.
+    Gateway unique du process : le pool de connexions est partagé entre les requêtes.
+    """
+    global _GATEWAY
+    if _GATEWAY is None:
+        with _LOCK:
+            if _GATEWAY is None:
+                try:
+                    _GATEWAY = _build_gateway()
+                except Exception:
+                    logger.exception("Gateway LLM indisponible : réponses de repli")
+                    _GATEWAY = LocalFallbackGateway()
+    return _GATEWAY
+
+
+def set_llm_gateway(gateway: Optional[LlmGateway]) -> None:
+    """
+    Remplace le gateway partagé (tests, benchmarks). None => reconstruit à la demande.
     """
-    try:
-        return OllamaGateway(model="mistral")
-    except Exception:
-        return LocalFallbackGateway()
+    global _GATEWAY
+    with _LOCK:
+        previous, _GATEWAY = _GATEWAY, gateway
+    if previous is not None and previous is not gateway:
+        previous.close()
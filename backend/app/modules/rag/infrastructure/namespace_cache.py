@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Optional
+
+
+@dataclass
+class _Entry:
+    version: Hashable
+    value: Any
+    nbytes: int
+
+
+class NamespaceCache:
+    """
+    Cache LRU process-wide des namespaces chargés : namespace -> snapshot (segments + meta).
+
+    - Budget en nombre d'entrées ET en octets (estimés via `value.nbytes`).
+    - Chaque entrée porte une "version" (mtime/taille du manifest) :
+      si les fichiers changent sur disque, l'entrée est ignorée et rechargée.
+    """
+
+    def __init__(self, max_entries: int = 16, max_bytes: int = 512 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, namespace: str, version: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(namespace)
+            if entry is None or entry.version != version:
+                if entry is not None:
+                    self._drop(namespace)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(namespace)
+            self.hits += 1
+            return entry.value
+
+    def put(self, namespace: str, version: Hashable, value: Any) -> None:
+        nbytes = int(getattr(value, "nbytes", 0))
+        if self.max_entries <= 0 or nbytes > self.max_bytes:
+            # Trop gros pour le budget : on ne garde pas en mémoire
+            return
+
+        with self._lock:
+            if namespace in self._entries:
+                self._drop(namespace)
+
+            self._entries[namespace] = _Entry(version, value, nbytes)
+            self._bytes += nbytes
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+
+    def invalidate(self, namespace: Optional[str] = None) -> None:
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+                self._bytes = 0
+            elif namespace in self._entries:
+                self._drop(namespace)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "namespaces": list(self._entries.keys()),
+            }
+
+    def _drop(self, namespace: str) -> None:
+        entry = self._entries.pop(namespace)
+        self._bytes -= entry.nbytes
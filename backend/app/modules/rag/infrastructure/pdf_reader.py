@@ -1,21 +1,105 @@
+"""
+Extraction du texte des PDFs, page par page.
+
+`page.extract_text()` est du Python pur (CPU, GIL) : au-delà de `rag_pdf_parallel_min_pages`
+pages, les pages sont réparties par tranches sur un pool de processus puis remises dans l'ordre.
+"""
 import os
-from typing import List, Dict, Any
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Iterator, List, Dict, Any, Optional, Tuple
+
 from pypdf import PdfReader
+
+from app.core.config import settings
 from app.modules.rag.infrastructure.text_utils import normalize_text
 
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
 
-def extract_pages(file_path: str) -> List[Dict[str, Any]]:
+
+def _normalized(file_path: str) -> str:
     normalized = os.path.normpath(file_path)
     if not os.path.exists(normalized):
         raise FileNotFoundError(f"PDF introuvable : {normalized}")
+    return normalized
+
+
+def resolve_workers(workers: Optional[int] = None) -> int:
+    """
+    Nombre de processus d'extraction (0 => nombre de cœurs).
+    """
+    if workers is None:
+        workers = settings.rag_pdf_workers
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """
+    Pool unique, dimensionné une fois par `rag_pdf_workers` et réutilisé entre documents
+    (le démarrage des processus coûte plus qu'une page) et entre threads d'indexation :
+    jamais recréé, donc jamais arrêté pendant qu'un autre thread y soumet des tranches.
+    "spawn" : pas de fork d'un process qui tourne déjà des threads (workers d'indexation).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=resolve_workers(), mp_context=get_context("spawn"))
+        return _pool
+
 
+def _extract_range(file_path: str, start: int, end: int) -> List[str]:
+    """
+    Pages [start, end) (0-based) d'un PDF ; exécuté dans un processus du pool.
+    """
+    reader = PdfReader(file_path)
+    return [normalize_text(reader.pages[i].extract_text() or "") for i in range(start, end)]
+
+
+def page_count(file_path: str) -> int:
+    return len(PdfReader(_normalized(file_path)).pages)
+
+
+def iter_page_texts(
+    file_path: str,
+    *,
+    workers: Optional[int] = None,
+) -> Iterator[Tuple[int, str]]:
+    """
+    (numéro de page 1-based, texte normalisé) pour toutes les pages, dans l'ordre.
+    Le texte peut être vide (page image, page blanche).
+    """
+    normalized = _normalized(file_path)
     reader = PdfReader(normalized)
-    pages = []
+    n_pages = len(reader.pages)
+    workers = resolve_workers(workers)
 
-    for i, page in enumerate(reader.pages, start=1):
-        raw_text = page.extract_text() or ""
-        text = normalize_text(raw_text)
+    if workers <= 1 or n_pages < settings.rag_pdf_parallel_min_pages:
+        for i, page in enumerate(reader.pages, start=1):
+            yield i, normalize_text(page.extract_text() or "")
+        return
+
+    # ~4 tranches par processus (au plus une par page) : équilibre la charge (pages de coûts très inégaux)
+    step = max(1, -(-n_pages // (workers * 4)))
+    pool = _get_pool()
+    futures = [
+        pool.submit(_extract_range, normalized, start, min(start + step, n_pages))
+        for start in range(0, n_pages, step)
+    ]
+    page_num = 0
+    for future in futures:
+        for text in future.result():
+            page_num += 1
+            yield page_num, text
+
+
+def extract_pages(file_path: str, *, workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    pages = []
 
+    for i, text in iter_page_texts(file_path, workers=workers):
         if text:
             pages.append({
                 "page": i,
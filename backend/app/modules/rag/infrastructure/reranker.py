@@ -0,0 +1,242 @@
+"""
+Reranking des candidats de la recherche par un cross-encoder (CPU), sous budget de temps.
+
+- La recherche (dense ou hybride) sur-échantillonne `rag_rerank_candidates` chunks ;
+  le cross-encoder note chaque paire (question, chunk) et les k meilleurs sont gardés.
+- Budget par requête, chargement du modèle compris : le modèle se charge en arrière-plan ; pas prêt
+  avant l'échéance => pas de reranking pour cette requête. Les paires sont notées par lots, dans
+  l'ordre de la recherche ; la taille du lot suivant est bornée par le coût d'une paire (estimé
+  avant la première mesure) et le temps restant. Budget épuisé => les candidats non notés gardent
+  l'ordre de la recherche, derrière les candidats notés.
+- Cache LRU (question, content_hash) -> score : une question répétée ne repasse pas par le modèle.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_RERANKER: Optional["CrossEncoderReranker"] = None
+_LOCK = threading.Lock()
+
+
+class RerankScoreCache:
+    """
+    Cache LRU borné : (question normalisée, content_hash du chunk) -> score du cross-encoder.
+    """
+
+    def __init__(self, max_size: int = 4096) -> None:
+        self.max_size = max_size
+        self._items: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str]) -> Optional[float]:
+        with self._lock:
+            score = self._items.get(key)
+            if score is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return score
+
+    def put(self, key: Tuple[str, str], score: float) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._items[key] = score
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._items),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+
+class CrossEncoderReranker:
+    """
+    Cross-encoder SentenceTransformers, chargé au premier appel.
+    Modèle indisponible (hors ligne) => pas de reranking, l'ordre de la recherche est conservé.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1",
+        *,
+        batch_size: int = 8,
+        max_length: int = 256,
+        cache_size: int = 4096,
+        initial_pair_ms: float = 25.0,
+    ) -> None:
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.cache = RerankScoreCache(cache_size)
+        self._model = None
+        self._lock = threading.Lock()
+        self._loader: Optional[threading.Thread] = None
+        # Coût moyen d'une paire (s), mesuré : dimensionne les lots sous budget.
+        # Avant la première mesure : estimation prudente (CPU, max_length=256)
+        self._pair_s: Optional[float] = None
+        self.initial_pair_s = initial_pair_ms / 1000.0
+
+    def _load_model(self):
+        from sentence_transformers import CrossEncoder
+
+        return CrossEncoder(self.model_name, max_length=self.max_length)
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    try:
+                        self._model = self._load_model()
+                    except Exception:
+                        logger.warning("Cross-encoder %s indisponible : reranking désactivé", self.model_name)
+                        self._model = False
+        return self._model
+
+    def _load_and_measure(self) -> None:
+        """
+        Chargement en arrière-plan, puis coût d'une paire mesuré hors requête (un lot seul
+        surestime le coût par paire : estimation prudente, affinée ensuite).
+        """
+        if not self.model:
+            return
+        try:
+            t0 = time.perf_counter()
+            self.score_pairs("warm-up", ["warm-up"])
+            self._pair_s = time.perf_counter() - t0
+        except Exception:
+            logger.exception("Échec du warm-up du cross-encoder")
+
+    def _model_within(self, timeout_s: float):
+        """
+        Modèle s'il est prêt avant `timeout_s`, sinon None (le chargement continue en arrière-plan).
+        """
+        if self._model is None:
+            with self._lock:
+                if self._loader is None:
+                    self._loader = threading.Thread(target=self._load_and_measure, name="reranker-load", daemon=True)
+                    self._loader.start()
+            self._loader.join(max(0.0, timeout_s))
+        return self._model or None
+
+    def score_pairs(self, query: str, texts: Sequence[str]) -> np.ndarray:
+        """
+        Score de pertinence (logit) de chaque texte pour la question.
+        """
+        pairs = [(query, t) for t in texts]
+        scores = self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+        return np.asarray(scores, dtype="float32")
+
+    def _next_batch(self, remaining_s: float) -> int:
+        if remaining_s <= 0:
+            return 0
+        pair_s = self.initial_pair_s if self._pair_s is None else self._pair_s
+        return min(self.batch_size, int(remaining_s / pair_s))
+
+    def rerank(
+        self,
+        query: str,
+        hits: List[Tuple[float, Dict[str, Any]]],
+        k: int,
+        *,
+        budget_ms: float,
+    ) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        hits : (score, chunk) de la recherche, meilleurs en tête.
+        Retourne les k meilleurs (score de pertinence 0..1, chunk) ; 0 pour un chunk non noté.
+        """
+        deadline = time.perf_counter() + budget_ms / 1000.0
+        if not hits or self._model_within(deadline - time.perf_counter()) is None:
+            if hits and self._model is None:
+                logger.debug("Cross-encoder en cours de chargement : reranking ignoré")
+            return hits[:k]
+        key = " ".join(query.split())
+        scores: Dict[int, float] = {}
+        missing: List[int] = []
+        for i, (_, m) in enumerate(hits):
+            cached = self.cache.get((key, m.get("content_hash", "")))
+            if cached is None:
+                missing.append(i)
+            else:
+                scores[i] = cached
+
+        pos = 0
+        while pos < len(missing):
+            n = self._next_batch(deadline - time.perf_counter())
+            if n <= 0:
+                break
+            batch = missing[pos:pos + n]
+            t0 = time.perf_counter()
+            batch_scores = self.score_pairs(key, [hits[i][1].get("text", "") for i in batch])
+            per_pair = (time.perf_counter() - t0) / len(batch)
+            self._pair_s = per_pair if self._pair_s is None else 0.7 * self._pair_s + 0.3 * per_pair
+
+            for i, s in zip(batch, batch_scores):
+                scores[i] = float(s)
+                self.cache.put((key, hits[i][1].get("content_hash", "")), float(s))
+            pos += n
+
+        if len(scores) < len(hits):
+            logger.debug("Budget de reranking atteint : %d/%d candidats notés", len(scores), len(hits))
+
+        # Notés d'abord (par pertinence), puis les autres dans l'ordre de la recherche
+        ranked = sorted(scores, key=lambda i: scores[i], reverse=True)
+        ranked += [i for i in range(len(hits)) if i not in scores]
+        return [
+            (1.0 / (1.0 + math.exp(-scores[i])) if i in scores else 0.0, hits[i][1])
+            for i in ranked[:k]
+        ]
+
+
+def get_reranker() -> CrossEncoderReranker:
+    """
+    Reranker unique du process ; aucun modèle n'est chargé avant le premier reranking.
+    """
+    global _RERANKER
+    if _RERANKER is None:
+        with _LOCK:
+            if _RERANKER is None:
+                _RERANKER = CrossEncoderReranker(
+                    settings.rag_rerank_model,
+                    batch_size=settings.rag_rerank_batch_size,
+                    cache_size=settings.rag_rerank_cache_size,
+                )
+    return _RERANKER
+
+
+def set_reranker(reranker: Optional[CrossEncoderReranker]) -> None:
+    """
+    Remplace le reranker partagé (tests, benchmarks). None => reconstruit à la demande.
+    """
+    global _RERANKER
+    with _LOCK:
+        _RERANKER = reranker
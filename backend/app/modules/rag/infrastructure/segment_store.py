@@ -0,0 +1,647 @@
+"""
+Stockage segmenté d'un namespace vectoriel :
+
+    <store_dir>/<namespace>/manifest.json
+    <store_dir>/<namespace>/seg_000001.faiss
+    <store_dir>/<namespace>/seg_000001.{cols.npy,text.bin,meta.json}   (cf. columnar_meta)
+    <store_dir>/<namespace>/seg_000001.{terms.json,postings.npz}      (BM25, cf. sparse_index)
+    ...
+
+- Chaque ingestion écrit UN nouveau segment immuable (par lots, cf. SegmentWriter),
+  puis remplace le manifest (os.replace).
+- Les suppressions sont des "tombstones" (chunk_id) dans le manifest.
+- Les index sont clés par chunk_id (IndexIDMap2, chunk_id croissants dans un segment) :
+  les tombstones sont exclus pendant la recherche FAISS via un IDSelector.
+- La compaction fusionne les petits segments et purge les tombstones.
+- Écritures sérialisées entre threads ET processus (workers uvicorn, CLI) : write_lock()
+  verrouille <namespace>/.write.lock (flock) ; le manifest est relu sous ce verrou.
+- Recherche hybride : top dense (FAISS) et top BM25 (index lexical du segment) fusionnés par RRF.
+"""
+from __future__ import annotations
+
+import json
+import os
+import pickle
+import threading
+from dataclasses import dataclass, field, replace
+from types import TracebackType
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Type
+
+import faiss
+import numpy as np
+
+from app.modules.rag.infrastructure.columnar_meta import ColumnarMeta, ColumnarMetaWriter
+from app.modules.rag.infrastructure.index_factory import (
+    INDEX_KINDS,
+    IndexConfig,
+    build_index,
+    configure_for_search,
+    index_nbytes,
+    is_id_mapped,
+    read_index,
+    search_params,
+    segment_vectors,
+)
+from app.modules.rag.infrastructure.sparse_index import (
+    SparseIndex,
+    SparseIndexWriter,
+    idf_weights,
+    rrf_fuse,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows : verrou limité au processus
+    fcntl = None
+
+MANIFEST = "manifest.json"
+LOCK_FILE = ".write.lock"
+
+
+@dataclass
+class Segment:
+    name: str
+    index: faiss.Index
+    meta: ColumnarMeta  # aligné sur les positions de l'index
+    # None : segment écrit avant l'index lexical (construit en mémoire à la première requête)
+    sparse: Optional[SparseIndex] = None
+
+
+@dataclass
+class _SegmentFilter:
+    alive: np.ndarray
+    dead: int
+    # Ids supprimés (immuable, partagé entre threads) ; les SearchParameters sont construits
+    # à chaque recherche : IndexIDMap::search réécrit params->sel pendant l'appel.
+    batch: Optional[faiss.IDSelectorBatch] = None
+    _refs: tuple = ()  # tableau référencé par `batch`
+
+    def search_params(self, index: faiss.Index) -> Tuple[Optional[faiss.SearchParameters], tuple]:
+        """
+        (params, objets SWIG à garder vivants pendant la recherche) ; params None sans tombstone
+        ou pour un index qui ne sait pas filtrer.
+        """
+        if self.batch is None:
+            return None, ()
+        selector = faiss.IDSelectorNot(self.batch)
+        return search_params(index, selector), (selector,)
+
+
+@dataclass
+class NamespaceSnapshot:
+    """
+    Vue en lecture d'un namespace : segments chargés + tombstones, à une version donnée.
+    """
+    segments: List[Segment] = field(default_factory=list)
+    tombstones: Set[int] = field(default_factory=set)
+    version: int = 0
+    # Filtres par segment, calculés une fois par snapshot (immuable)
+    _filters: Dict[str, _SegmentFilter] = field(default_factory=dict, repr=False)
+
+    def _filter(self, seg: Segment) -> _SegmentFilter:
+        flt = self._filters.get(seg.name)
+        if flt is not None:
+            return flt
+
+        if not self.tombstones:
+            flt = _SegmentFilter(alive=np.ones(len(seg.meta), dtype=bool), dead=0)
+        else:
+            dead = np.fromiter(self.tombstones, dtype=np.int64, count=len(self.tombstones))
+            alive = ~np.isin(seg.meta.chunk_ids, dead)
+            flt = _SegmentFilter(alive=alive, dead=int(len(alive) - np.count_nonzero(alive)))
+            if flt.dead and is_id_mapped(seg.index):
+                dead_ids = np.ascontiguousarray(seg.meta.chunk_ids[~alive], dtype="int64")
+                flt.batch = faiss.IDSelectorBatch(len(dead_ids), faiss.swig_ptr(dead_ids))
+                flt._refs = (dead_ids,)
+
+        self._filters[seg.name] = flt
+        return flt
+
+    def _alive_mask(self, seg: Segment) -> np.ndarray:
+        return self._filter(seg).alive
+
+    @property
+    def ntotal(self) -> int:
+        return sum(int(np.count_nonzero(self._alive_mask(seg))) for seg in self.segments)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            index_nbytes(seg.index) + seg.meta.nbytes + (seg.sparse.nbytes if seg.sparse else 0)
+            for seg in self.segments
+        )
+
+    def is_alive(self, m: Dict[str, Any]) -> bool:
+        return m.get("chunk_id") not in self.tombstones
+
+    def rows(
+        self,
+        *,
+        with_text: bool = True,
+        document_id: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Lignes vivantes ; document_id filtre sur la colonne (sans décoder les autres lignes).
+        """
+        for seg in self.segments:
+            mask = self._alive_mask(seg)
+            if document_id is not None:
+                mask = mask & (seg.meta.cols["document_id"] == document_id)
+            for i in np.flatnonzero(mask):
+                yield seg.meta.row(int(i), with_text=with_text)
+
+    def chunk_ids_for_document(self, document_id: int) -> List[int]:
+        ids: List[int] = []
+        for seg in self.segments:
+            mask = self._alive_mask(seg) & (seg.meta.cols["document_id"] == document_id)
+            ids.extend(int(c) for c in seg.meta.chunk_ids[mask])
+        return ids
+
+    def _dense_hits(self, q_emb: np.ndarray, k: int) -> List[Tuple[float, int, int]]:
+        """
+        Top-k dense : (score, position du segment, ligne), sans décoder les métadonnées.
+        """
+        hits: List[Tuple[float, int, int]] = []
+        for s, seg in enumerate(self.segments):
+            if seg.index.ntotal == 0:
+                continue
+            flt = self._filter(seg)
+            if is_id_mapped(seg.index):
+                # Tombstones exclus par FAISS ; les ids retournés sont des chunk_id
+                params, _keep = flt.search_params(seg.index)
+                if flt.dead and params is None:
+                    # Index sans IDSelector (PQ) : sur-échantillonnage, tombstones filtrés ci-dessous
+                    kk = min(seg.index.ntotal, k + flt.dead)
+                else:
+                    kk = min(seg.index.ntotal - flt.dead, k)
+                if kk <= 0:
+                    continue
+                scores, ids = seg.index.search(q_emb, kk, params=params)
+                chunk_ids = seg.meta.chunk_ids
+                rows = np.searchsorted(chunk_ids, ids[0])
+                for score, cid, idx in zip(scores[0], ids[0], rows):
+                    if cid < 0 or idx >= len(chunk_ids) or chunk_ids[idx] != cid or not flt.alive[idx]:
+                        continue
+                    hits.append((float(score), s, int(idx)))
+                continue
+
+            # Segment sans IDMap (ancien format) : positions + sur-échantillonnage des tombstones
+            kk = min(seg.index.ntotal, k + flt.dead)
+            scores, idxs = seg.index.search(q_emb, kk)
+            for score, idx in zip(scores[0], idxs[0]):
+                if idx < 0 or idx >= len(seg.meta) or not flt.alive[idx]:
+                    continue
+                hits.append((float(score), s, int(idx)))
+
+        hits.sort(key=lambda h: h[0], reverse=True)
+        return hits[:k]
+
+    def _sparse(self, seg: Segment) -> SparseIndex:
+        if seg.sparse is None:
+            # Segment antérieur à l'index lexical : persisté à la prochaine compaction
+            seg.sparse = SparseIndex.from_texts(seg.meta.text(i) for i in range(len(seg.meta)))
+        return seg.sparse
+
+    def _sparse_hits(self, query: str, k: int) -> List[Tuple[float, int, int]]:
+        """
+        Top-k BM25 : (score, position du segment, ligne). Statistiques (df, longueur moyenne)
+        agrégées sur tous les segments, tombstones compris (écart négligeable, purgé à la compaction).
+        """
+        indexes = [self._sparse(seg) for seg in self.segments]
+        weights, avgdl = idf_weights(query, indexes)
+        if not weights:
+            return []
+
+        hits: List[Tuple[float, int, int]] = []
+        for s, (seg, sparse) in enumerate(zip(self.segments, indexes)):
+            scores = sparse.score(weights, avgdl)
+            scores[~self._alive_mask(seg)] = 0.0
+            candidates = np.flatnonzero(scores > 0)
+            if len(candidates) > k:
+                candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+            hits.extend((float(scores[i]), s, int(i)) for i in candidates)
+
+        hits.sort(key=lambda h: h[0], reverse=True)
+        return hits[:k]
+
+    def search(self, q_emb: np.ndarray, k: int) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        Recherche dans chaque segment puis fusion des top-k par score.
+        """
+        # Seules les lignes retournées sont décodées
+        return [(score, self.segments[s].meta[i]) for score, s, i in self._dense_hits(q_emb, k)]
+
+    def sparse_search(self, query: str, k: int) -> List[Tuple[float, Dict[str, Any]]]:
+        return [(score, self.segments[s].meta[i]) for score, s, i in self._sparse_hits(query, k)]
+
+    def hybrid_search(
+        self,
+        q_emb: np.ndarray,
+        query: str,
+        k: int,
+        *,
+        candidates: int = 20,
+        rrf_k: int = 60,
+    ) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        Top `candidates` dense et BM25 fusionnés par Reciprocal Rank Fusion ;
+        le score retourné est le score RRF.
+        """
+        candidates = max(candidates, k)
+        dense = [(s, i) for _, s, i in self._dense_hits(q_emb, candidates)]
+        sparse = [(s, i) for _, s, i in self._sparse_hits(query, candidates)]
+        fused = rrf_fuse([dense, sparse], k, rrf_k)
+        return [(score, self.segments[s].meta[i]) for score, (s, i) in fused]
+
+
+class SegmentWriter:
+    """
+    Segment en cours d'écriture, alimenté par lots : les vecteurs vont dans un fichier
+    temporaire (relu en mmap pour construire l'index), les textes sont écrits au fil de l'eau.
+    Invisible des lecteurs tant que le manifest ne le référence pas (SegmentStore.commit).
+    """
+
+    def __init__(
+        self,
+        store: "SegmentStore",
+        name: str,
+        cfg: IndexConfig,
+        next_chunk_id: Optional[int],
+    ) -> None:
+        self.store = store
+        self.name = name
+        self.cfg = cfg
+        # None => chunk_id déjà fixés par l'appelant (compaction)
+        self.next_chunk_id = next_chunk_id
+        self.count = 0
+
+        os.makedirs(store.root_dir, exist_ok=True)
+        base = store._seg_base(name)
+        self._vec_path = f"{base}.vec.tmp"
+        self._vec = open(self._vec_path, "wb")
+        self._meta = ColumnarMetaWriter(base)
+        self._sparse = SparseIndexWriter()
+        self._ids: List[np.ndarray] = []
+
+    def add(self, vectors: np.ndarray, metadatas: List[Dict[str, Any]]) -> None:
+        if not metadatas:
+            return
+        vectors = np.ascontiguousarray(vectors, dtype="float32").reshape(len(metadatas), self.store.emb_dim)
+        if self.next_chunk_id is not None:
+            for m in metadatas:
+                m["chunk_id"] = self.next_chunk_id
+                self.next_chunk_id += 1
+
+        self._vec.write(vectors.tobytes())
+        self._ids.append(np.fromiter((m["chunk_id"] for m in metadatas), dtype=np.int64, count=len(metadatas)))
+        self._meta.append(metadatas)
+        self._sparse.add([m.get("text", "") for m in metadatas])
+        self.count += len(metadatas)
+
+    def finish(self) -> Dict[str, Any]:
+        """
+        Construit et écrit l'index du segment ; retourne son entrée de manifest.
+        """
+        self._vec.close()
+        self._meta.close()
+        self._sparse.build().write(self.store._seg_base(self.name))
+        dim = self.store.emb_dim
+        if self.count:
+            vectors = np.memmap(self._vec_path, dtype="float32", mode="r", shape=(self.count, dim))
+        else:
+            vectors = np.zeros((0, dim), dtype="float32")
+        ids = np.concatenate(self._ids) if self._ids else np.zeros(0, dtype=np.int64)
+        faiss.write_index(build_index(vectors, dim, self.cfg, ids), self.store._seg_paths(self.name)[0])
+        del vectors
+        os.remove(self._vec_path)
+        return {"name": self.name, "count": self.count, "kind": self.cfg.resolve(self.count)}
+
+    def abort(self) -> None:
+        self._vec.close()
+        self._meta.abort()
+        for path in (self._vec_path, *self.store._seg_paths(self.name)):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class WriteLock:
+    """
+    Verrou d'écriture d'un namespace : threading.Lock partagé par le processus, puis flock
+    exclusif sur le fichier de verrou (autres processus). Relâché à la fermeture du descripteur,
+    y compris si le processus meurt.
+    """
+
+    def __init__(self, thread_lock: threading.Lock, path: str) -> None:
+        self._thread_lock = thread_lock
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def __enter__(self) -> "WriteLock":
+        self._thread_lock.acquire()
+        if fcntl is None:
+            return self
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        except BaseException:
+            self._release()
+            raise
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self._release()
+
+    def _release(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)  # relâche le flock
+            self._fd = None
+        self._thread_lock.release()
+
+
+class SegmentStore:
+    """
+    Accès disque d'un namespace segmenté.
+    """
+
+    _locks: Dict[str, threading.Lock] = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(
+        self,
+        root_dir: str,
+        emb_dim: int,
+        index_config: IndexConfig = IndexConfig(),
+        *,
+        mmap: bool = True,
+    ) -> None:
+        self.root_dir = root_dir
+        self.emb_dim = emb_dim
+        self.index_config = index_config
+        self.mmap = mmap
+
+    # ---------- chemins ----------
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.root_dir, MANIFEST)
+
+    def _seg_base(self, name: str) -> str:
+        return os.path.join(self.root_dir, name)
+
+    def _seg_paths(self, name: str) -> Tuple[str, ...]:
+        base = self._seg_base(name)
+        return (f"{base}.faiss", *ColumnarMeta.files(base), *SparseIndex.files(base))
+
+    def write_lock(self) -> WriteLock:
+        """
+        À tenir pendant toute écriture (lecture du manifest comprise) : sinon deux écrivains
+        prennent le même next_segment / next_chunk_id.
+        """
+        root = os.path.abspath(self.root_dir)
+        with self._locks_guard:
+            thread_lock = self._locks.setdefault(root, threading.Lock())
+        return WriteLock(thread_lock, os.path.join(root, LOCK_FILE))
+
+    # ---------- manifest ----------
+    def exists(self) -> bool:
+        return os.path.exists(self.manifest_path)
+
+    def disk_version(self) -> Optional[tuple]:
+        try:
+            st = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def read_manifest(self) -> Dict[str, Any]:
+        if not self.exists():
+            return {"version": 0, "next_segment": 1, "next_chunk_id": 0, "segments": [], "tombstones": []}
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _config(self, manifest: Dict[str, Any]) -> IndexConfig:
+        # Type d'index propre au namespace (manifest), sinon la config globale
+        kind = manifest.get("index_kind") or self.index_config.kind
+        return replace(self.index_config, kind=kind)
+
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        os.makedirs(self.root_dir, exist_ok=True)
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.manifest_path)
+
+    # ---------- lecture ----------
+    def _read_segment(self, entry: Dict[str, Any], cfg: IndexConfig) -> Segment:
+        name = entry["name"]
+        index = read_index(self._seg_paths(name)[0], kind=entry.get("kind", "flat"), mmap=self.mmap)
+        index = configure_for_search(index, cfg)
+        base = self._seg_base(name)
+        meta = ColumnarMeta.open(base, mmap=self.mmap)
+        sparse = SparseIndex.open(base) if SparseIndex.exists(base) else None
+        return Segment(name=name, index=index, meta=meta, sparse=sparse)
+
+    def load(self) -> NamespaceSnapshot:
+        for attempt in range(3):
+            manifest = self.read_manifest()
+            cfg = self._config(manifest)
+            try:
+                segments = [self._read_segment(s, cfg) for s in manifest["segments"]]
+            except FileNotFoundError:
+                # Compaction concurrente : le manifest a changé entre-temps, on relit
+                if attempt == 2:
+                    raise
+                continue
+            return NamespaceSnapshot(
+                segments=segments,
+                tombstones=set(manifest["tombstones"]),
+                version=manifest["version"],
+            )
+        raise RuntimeError("unreachable")
+
+    # ---------- écriture ----------
+    def _write_segment(
+        self,
+        name: str,
+        vectors: np.ndarray,
+        meta: List[Dict[str, Any]],
+        cfg: IndexConfig,
+    ) -> Dict[str, Any]:
+        writer = SegmentWriter(self, name, cfg, next_chunk_id=None)
+        writer.add(vectors, meta)
+        return writer.finish()
+
+    def open_segment(self) -> SegmentWriter:
+        """
+        Nouveau segment à remplir par lots, sous write_lock() ; publié par commit(segment=...).
+        Les chunk_id sont attribués au fil des ajouts.
+        """
+        manifest = self.read_manifest()
+        return SegmentWriter(
+            self,
+            f"seg_{manifest['next_segment']:06d}",
+            self._config(manifest),
+            next_chunk_id=manifest["next_chunk_id"],
+        )
+
+    def commit(
+        self,
+        *,
+        vectors: Optional[np.ndarray] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        delete_ids: Iterable[int] = (),
+        segment: Optional[SegmentWriter] = None,
+    ) -> Dict[str, Any]:
+        """
+        Ajoute un segment (écrit par lots via `segment`, ou `vectors` + `metadatas` d'un bloc)
+        et des tombstones, en une seule mise à jour du manifest.
+        """
+        metadatas = list(metadatas or [])
+        if metadatas:
+            segment = segment or self.open_segment()
+            segment.add(vectors, metadatas)
+
+        manifest = self.read_manifest()
+        if segment is not None:
+            if segment.count:
+                manifest["segments"].append(segment.finish())
+                manifest["next_segment"] += 1
+                manifest["next_chunk_id"] = segment.next_chunk_id
+            else:
+                segment.abort()
+
+        manifest["tombstones"] = sorted(set(manifest["tombstones"]) | set(delete_ids))
+        manifest["version"] += 1
+        self._write_manifest(manifest)
+        return manifest
+
+    def import_legacy(self, vector_path: str, meta_path: str) -> None:
+        """
+        Migration one-shot de l'ancien format (index__ns.faiss + meta__ns.pkl) en un premier segment.
+        """
+        index = faiss.read_index(vector_path)
+        with open(meta_path, "rb") as f:
+            meta = pickle.load(f)
+        vectors = index.reconstruct_n(0, index.ntotal) if index.ntotal else np.zeros((0, self.emb_dim), "float32")
+        self.commit(vectors=vectors, metadatas=meta)
+
+    def set_index_kind(self, kind: Optional[str]) -> Dict[str, Any]:
+        """
+        Fixe le type d'index du namespace (None => config globale).
+        S'applique aux prochains segments ; `compact(rebuild=True)` reconstruit l'existant.
+        """
+        if kind is not None and kind not in INDEX_KINDS:
+            raise ValueError(f"Type d'index inconnu : {kind}")
+        manifest = self.read_manifest()
+        manifest["index_kind"] = kind
+        manifest["version"] += 1
+        self._write_manifest(manifest)
+        return manifest
+
+    def adopt(self, staged: "SegmentStore") -> Dict[str, Any]:
+        """
+        Remplace tout le contenu du namespace par celui d'un store construit à côté (même disque),
+        sous write_lock() : les segments de `staged` sont renommés dans ce dossier puis publiés
+        en une seule écriture du manifest. Un lecteur voit l'ancien contenu ou le nouveau, jamais
+        un mélange ; les anciens segments sont supprimés ensuite (cf. compact).
+        Rejouable après interruption : les noms cibles ne dépendent que du manifest courant.
+        """
+        manifest = self.read_manifest()
+        source = staged.read_manifest()
+        old_names = [s["name"] for s in manifest["segments"]]
+
+        os.makedirs(self.root_dir, exist_ok=True)
+        segments = []
+        for entry in source["segments"]:
+            name = f"seg_{manifest['next_segment']:06d}"
+            for src, dst in zip(staged._seg_paths(entry["name"]), self._seg_paths(name)):
+                if os.path.exists(src):
+                    os.replace(src, dst)
+            segments.append({**entry, "name": name})
+            manifest["next_segment"] += 1
+
+        manifest["segments"] = segments
+        manifest["tombstones"] = source["tombstones"]
+        manifest["next_chunk_id"] = source["next_chunk_id"]
+        manifest["version"] += 1
+        self._write_manifest(manifest)
+
+        for name in old_names:
+            for path in self._seg_paths(name):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        return manifest
+
+    # ---------- compaction ----------
+    def compact(
+        self,
+        *,
+        small_segment_rows: int = 10_000,
+        min_segments: int = 2,
+        rebuild: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Fusionne les segments de moins de `small_segment_rows` lignes (s'il y en a au moins
+        `min_segments`, ou s'ils portent des tombstones) en un seul segment, sans les lignes supprimées.
+        rebuild=True : fusionne tous les segments (ex: après changement de type d'index).
+        """
+        manifest = self.read_manifest()
+        cfg = self._config(manifest)
+        tombstones = set(manifest["tombstones"])
+
+        small = [
+            s for s in manifest["segments"]
+            if rebuild or s["count"] < small_segment_rows
+        ]
+
+        loaded = [self._read_segment(s, cfg) for s in small]
+        dead = np.fromiter(tombstones, dtype=np.int64, count=len(tombstones))
+        has_dead = any(np.isin(seg.meta.chunk_ids, dead).any() for seg in loaded)
+        if not small or (len(small) < min_segments and not has_dead and not rebuild):
+            return {"merged": 0, "segments": len(manifest["segments"]), "purged": 0}
+
+        vectors: List[np.ndarray] = []
+        meta: List[Dict[str, Any]] = []
+        purged: Set[int] = set()
+        for seg in loaded:
+            is_dead = np.isin(seg.meta.chunk_ids, dead)
+            purged |= {int(c) for c in seg.meta.chunk_ids[is_dead]}
+            alive = np.flatnonzero(~is_dead)
+            if len(alive):
+                vectors.append(segment_vectors(seg.index)[alive])
+                meta.extend(seg.meta.row(int(i)) for i in alive)
+
+        merged_names = {s["name"] for s in small}
+        new_segments = [s for s in manifest["segments"] if s["name"] not in merged_names]
+        if meta:
+            # chunk_id croissants dans le segment (recherche des lignes par searchsorted)
+            order = np.argsort([m["chunk_id"] for m in meta], kind="stable")
+            meta = [meta[i] for i in order]
+            name = f"seg_{manifest['next_segment']:06d}"
+            new_segments.append(self._write_segment(name, np.concatenate(vectors)[order], meta, cfg))
+            manifest["next_segment"] += 1
+
+        manifest["segments"] = new_segments
+        manifest["tombstones"] = sorted(tombstones - purged)
+        manifest["version"] += 1
+        self._write_manifest(manifest)
+
+        del loaded  # libère les mmaps avant suppression des fichiers
+        for name in merged_names:
+            for path in self._seg_paths(name):
+                try:
+                    os.remove(path)
+                except OSError:
+                    # Fichier encore mappé par un lecteur (Windows) : orphelin sans effet, le manifest ne le référence plus
+                    pass
+
+        return {"merged": len(small), "segments": len(new_segments), "purged": len(purged)}
@@ -0,0 +1,442 @@
+"""
+Cache sémantique des réponses : une question reformulée ("nombre max d'absences" /
+"combien d'absences autorisées") reprend la réponse d'une question proche déjà traitée.
+
+Par namespace (et version d'index, modèle) : petit index vectoriel en mémoire des questions
+déjà répondues, persisté dans le fichier SQLite du cache de réponses. Une réponse n'est reprise
+que si les deux conditions sont réunies :
+- cosinus(question, question en cache) >= RAG_SEMANTIC_CACHE_THRESHOLD ;
+- même signature de contexte : règle métier extraite (RAG) ou mêmes chunks retrouvés
+  (emploi du temps), plus les entités de la question (jour, date, heure, code de module) :
+  "cours du lundi matin" et "cours du mardi matin" ont un cosinus élevé et, dans un petit
+  namespace, les mêmes chunks. La recherche est donc toujours faite ; seul l'appel au LLM est évité.
+
+Plusieurs workers partagent le fichier : quand un autre processus a écrit (PRAGMA data_version),
+le seau en mémoire est comparé à la table (MAX(id), COUNT(*), index couvrant) puis complété ou rechargé.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.modules.rag.infrastructure.embedding_service import embed_query_cached
+from app.modules.rag.infrastructure.llm_gateway import ERROR_MESSAGE, LlmGateway
+from app.modules.rag.infrastructure.vector_store_faiss import index_version
+
+logger = logging.getLogger(__name__)
+
+_CACHE: Optional["SemanticAnswerCache"] = None
+_LOCK = threading.Lock()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS semantic_answers (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    namespace  TEXT NOT NULL,
+    version    TEXT NOT NULL,
+    model      TEXT NOT NULL,
+    question   TEXT NOT NULL,
+    vector     BLOB NOT NULL,
+    signature  TEXT NOT NULL,
+    answer     TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used  REAL NOT NULL,
+    hits       INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS semantic_answers_bucket_age ON semantic_answers (namespace, model, version, created_at);
+"""
+
+# Migrations ponctuelles des fichiers existants, dans l'ordre ; PRAGMA user_version = nombre appliqué
+# (le fichier est partagé avec le cache exact, qui n'utilise pas user_version)
+_MIGRATIONS = (
+    # 1 : l'index (namespace, model, version) est remplacé par semantic_answers_bucket_age (couvrant)
+    "DROP INDEX IF EXISTS semantic_answers_bucket",
+)
+
+
+def signature(parts: Iterable[str]) -> str:
+    """
+    Empreinte du contexte qui a servi à répondre (règle extraite, identifiants de chunks...).
+    """
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(" ".join(part.split()).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+_ENTITY_WORDS = frozenset((
+    "lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi", "dimanche",
+    "janvier", "fevrier", "mars", "avril", "mai", "juin", "juillet", "aout",
+    "septembre", "octobre", "novembre", "decembre",
+    "matin", "midi", "apres-midi", "soir", "demain", "aujourd",
+    "td", "tp", "cm", "examen",
+))
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-/.:][a-z0-9]+)*")
+_CODE = re.compile(r"\b[A-Z][A-Z0-9.]+\b")
+
+
+def question_entities(question: str) -> Tuple[str, ...]:
+    """
+    Éléments qui changent la réponse sans presque changer le vecteur : jours, mois, moments
+    de la journée, nombres / dates / heures (8h30, 12/10), codes (5IIR, TD, M2.1).
+    """
+    text = unicodedata.normalize("NFKD", (question or "").lower()).encode("ascii", "ignore").decode("ascii")
+    found = {t for t in _TOKEN.findall(text) if t in _ENTITY_WORDS or any(ch.isdigit() for ch in t)}
+    if not question.isupper():
+        found |= {code.lower() for code in _CODE.findall(question)}
+    return tuple(sorted(found))
+
+
+def contexts_signature(contexts: List[Dict[str, Any]]) -> str:
+    """
+    Signature indépendante de l'ordre : l'ensemble des chunks retrouvés.
+    """
+    return signature(sorted(f"{c.get('source')}#{c.get('page')}#{c.get('chunk_index')}" for c in contexts))
+
+
+@dataclass
+class _Bucket:
+    ids: List[int]  # croissants
+    signatures: List[str]
+    matrix: np.ndarray  # (n, dim) vecteurs normalisés des questions
+    data_version: int = -1  # PRAGMA data_version à la dernière synchronisation
+
+    def append(self, rows: List[Tuple[int, str, bytes]]) -> None:
+        if not rows:
+            return
+        vectors = np.stack([np.frombuffer(r[2], dtype="float32") for r in rows])
+        self.ids.extend(r[0] for r in rows)
+        self.signatures.extend(r[1] for r in rows)
+        self.matrix = np.vstack([self.matrix, vectors]) if self.matrix.size else vectors
+
+    def keep(self, positions: List[int]) -> None:
+        self.ids = [self.ids[i] for i in positions]
+        self.signatures = [self.signatures[i] for i in positions]
+        self.matrix = self.matrix[positions]
+
+
+@dataclass(frozen=True)
+class SemanticHit:
+    answer: str
+    question: str  # question en cache reprise
+    similarity: float
+
+
+class SemanticAnswerCache:
+    """
+    Index vectoriel (recherche exacte, numpy) des questions répondues, un seau par
+    (namespace, modèle) à la version d'index courante. Les seaux d'une version dépassée
+    sont vidés au premier accès ; chaque seau est borné (LRU) à `max_per_namespace` questions.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        threshold: float = 0.9,
+        ttl_s: float = 86400.0,
+        max_per_namespace: int = 2000,
+    ) -> None:
+        self.path = path
+        self.threshold = threshold
+        self.ttl_s = ttl_s
+        self.max_per_namespace = max_per_namespace
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self._buckets: Dict[Tuple[str, str, str], _Bucket] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0  # question assez proche, mais contexte différent
+
+    def _migrate(self) -> None:
+        applied = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        for i, statement in enumerate(_MIGRATIONS[applied:], start=applied + 1):
+            self._conn.execute(statement)
+            self._conn.execute(f"PRAGMA user_version = {i}")
+
+    # ---------- seaux ----------
+    def _where(self, key: Tuple[str, str, str]) -> Tuple[str, Tuple[Any, ...]]:
+        where = "namespace = ? AND model = ? AND version = ?"
+        params: Tuple[Any, ...] = key
+        if self.ttl_s > 0:
+            where += " AND created_at >= ?"
+            params += (time.time() - self.ttl_s,)
+        return where, params
+
+    def _bucket(self, namespace: str, model: str, version: str) -> _Bucket:
+        """
+        Seau à jour de la table : lignes ajoutées par d'autres workers chargées, lignes disparues
+        (éviction, expiration, clear) retirées d'après la liste des ids, sans relire les vecteurs.
+        """
+        key = (namespace, model, version)
+        bucket = self._buckets.get(key)
+        # Change seulement quand une AUTRE connexion (worker, cache exact) a écrit dans le fichier
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if bucket is not None and bucket.data_version == data_version:
+            return bucket
+
+        where, params = self._where(key)
+        if bucket is None:
+            # Nouvelle version d'index : les questions des versions précédentes ne sont plus valables
+            for old in [k for k in self._buckets if k[:2] == key[:2]]:
+                del self._buckets[old]
+            self._conn.execute(
+                "DELETE FROM semantic_answers WHERE namespace = ? AND model = ? AND version <> ?",
+                (namespace, model, version),
+            )
+        else:
+            max_id, count = self._conn.execute(
+                f"SELECT COALESCE(MAX(id), 0), COUNT(*) FROM semantic_answers WHERE {where}", params
+            ).fetchone()
+            last = bucket.ids[-1] if bucket.ids else 0
+            if max_id > last:
+                bucket.append(self._conn.execute(
+                    f"SELECT id, signature, vector FROM semantic_answers WHERE {where} AND id > ? ORDER BY id",
+                    params + (last,),
+                ).fetchall())
+            if count != len(bucket.ids):
+                # Lignes supprimées ailleurs : l'index couvrant suffit, les vecteurs restent en mémoire
+                live = {row[0] for row in self._conn.execute(f"SELECT id FROM semantic_answers WHERE {where}", params)}
+                bucket.keep([i for i, row_id in enumerate(bucket.ids) if row_id in live])
+            if count == len(bucket.ids):
+                bucket.data_version = data_version
+                return bucket
+
+        bucket = _Bucket(ids=[], signatures=[], matrix=np.zeros((0, 0), dtype="float32"), data_version=data_version)
+        bucket.append(self._conn.execute(
+            f"SELECT id, signature, vector FROM semantic_answers WHERE {where} ORDER BY id", params
+        ).fetchall())
+        self._buckets[key] = bucket
+        return bucket
+
+    # ---------- API ----------
+    def lookup(
+        self,
+        *,
+        namespace: str,
+        model: str,
+        version: str,
+        vector: np.ndarray,
+        signature: str,
+    ) -> Optional[SemanticHit]:
+        q = np.asarray(vector, dtype="float32").reshape(-1)
+        now = time.time()
+        with self._lock:
+            bucket = self._bucket(namespace, model, version)
+            if not bucket.ids:
+                self.misses += 1
+                return None
+
+            sims = bucket.matrix @ q
+            close = np.flatnonzero(sims >= self.threshold)
+            for i in close[np.argsort(-sims[close])]:
+                if bucket.signatures[i] != signature:
+                    continue
+                row = self._conn.execute(
+                    "SELECT question, answer, created_at FROM semantic_answers WHERE id = ?",
+                    (bucket.ids[i],),
+                ).fetchone()
+                if row is None or (self.ttl_s > 0 and now - row[2] > self.ttl_s):
+                    continue
+                self._conn.execute(
+                    "UPDATE semantic_answers SET last_used = ?, hits = hits + 1 WHERE id = ?",
+                    (now, bucket.ids[i]),
+                )
+                self.hits += 1
+                return SemanticHit(answer=row[1], question=row[0], similarity=float(sims[i]))
+
+            if len(close):
+                self.rejected += 1
+            self.misses += 1
+            return None
+
+    def put(
+        self,
+        *,
+        namespace: str,
+        model: str,
+        version: str,
+        question: str,
+        vector: np.ndarray,
+        signature: str,
+        answer: str,
+    ) -> None:
+        if self.max_per_namespace <= 0:
+            return
+        q = np.ascontiguousarray(np.asarray(vector, dtype="float32").reshape(-1))
+        now = time.time()
+        with self._lock:
+            bucket = self._bucket(namespace, model, version)
+            cur = self._conn.execute(
+                "INSERT INTO semantic_answers (namespace, version, model, question, vector, signature, answer, created_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (namespace, version, model, question, q.tobytes(), signature, answer, now, now),
+            )
+            bucket.append([(cur.lastrowid, signature, q.tobytes())])
+
+            overflow = len(bucket.ids) - self.max_per_namespace
+            if overflow > 0:
+                self._evict(namespace, model, version, bucket, overflow)
+
+    def _evict(self, namespace: str, model: str, version: str, bucket: _Bucket, n: int) -> None:
+        victims = {
+            r[0] for r in self._conn.execute(
+                "SELECT id FROM semantic_answers WHERE namespace = ? AND model = ? AND version = ?"
+                " ORDER BY last_used LIMIT ?",
+                (namespace, model, version, n),
+            )
+        }
+        self._conn.executemany("DELETE FROM semantic_answers WHERE id = ?", [(i,) for i in victims])
+        bucket.keep([i for i, row_id in enumerate(bucket.ids) if row_id not in victims])
+
+    def clear(self, namespace: Optional[str] = None) -> int:
+        with self._lock:
+            if namespace is None:
+                self._buckets.clear()
+                cur = self._conn.execute("DELETE FROM semantic_answers")
+            else:
+                for key in [k for k in self._buckets if k[0] == namespace]:
+                    del self._buckets[key]
+                cur = self._conn.execute("DELETE FROM semantic_answers WHERE namespace = ?", (namespace,))
+            return cur.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, served = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM semantic_answers"
+            ).fetchone()
+            total = self.hits + self.misses
+            return {
+                "entries": entries,
+                "threshold": self.threshold,
+                "max_per_namespace": self.max_per_namespace,
+                "hits": self.hits,
+                "misses": self.misses,
+                "rejected": self.rejected,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "stored_hits": served,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def get_semantic_cache() -> Optional[SemanticAnswerCache]:
+    """
+    Cache sémantique de l'application (RAG_SEMANTIC_CACHE_*) ; None si désactivé.
+    """
+    global _CACHE
+    if _CACHE is None and settings.rag_semantic_cache:
+        with _LOCK:
+            if _CACHE is None:
+                _CACHE = SemanticAnswerCache(
+                    settings.rag_answer_cache_path,
+                    threshold=settings.rag_semantic_cache_threshold,
+                    ttl_s=settings.rag_answer_cache_ttl_s,
+                    max_per_namespace=settings.rag_semantic_cache_max_per_namespace,
+                )
+    return _CACHE
+
+
+def set_semantic_cache(cache: Optional[SemanticAnswerCache]) -> None:
+    """
+    Remplace le cache (tests / évaluation) ; None => recréé depuis les settings au prochain appel.
+    """
+    global _CACHE
+    with _LOCK:
+        _CACHE = cache
+
+
+# =========================
+# Helpers des cas d'usage
+# =========================
+@dataclass(frozen=True)
+class SemanticProbe:
+    """
+    Question sondée : vecteur, signature de contexte et version d'index lue avant la recherche.
+    """
+    namespace: str
+    model: str
+    version: str
+    question: str
+    vector: np.ndarray
+    signature: str
+
+
+def semantic_lookup(
+    namespace: str,
+    question: str,
+    context_signature: str,
+    llm: LlmGateway,
+    *,
+    version: Optional[str] = None,
+) -> Tuple[Optional[SemanticProbe], Optional[SemanticHit]]:
+    """
+    (sonde, réponse reprise) ; sonde None si le cache est désactivé.
+    Le vecteur de la question vient du cache d'embeddings (déjà calculé par la recherche).
+    """
+    cache = get_semantic_cache()
+    if cache is None:
+        return None, None
+    probe = SemanticProbe(
+        namespace=namespace,
+        model=getattr(llm, "model", type(llm).__name__),
+        version=version or index_version(namespace),
+        question=question,
+        vector=embed_query_cached(question),
+        signature=context_signature,
+    )
+    try:
+        hit = cache.lookup(
+            namespace=probe.namespace,
+            model=probe.model,
+            version=probe.version,
+            vector=probe.vector,
+            signature=probe.signature,
+        )
+    except sqlite3.Error as e:
+        logger.warning("Cache sémantique : lecture impossible (%s)", e)
+        return probe, None
+    if hit is not None:
+        logger.debug("Cache sémantique : %r reprend %r (cos=%.3f)", question, hit.question, hit.similarity)
+    return probe, hit
+
+
+def semantic_remember(probe: Optional[SemanticProbe], answer: str) -> None:
+    """
+    Ajoute la question répondue à l'index ; mêmes exclusions que le cache exact.
+    """
+    cache = get_semantic_cache()
+    if probe is None or cache is None or not answer or answer == ERROR_MESSAGE:
+        return
+    if index_version(probe.namespace) != probe.version:
+        return
+    try:
+        cache.put(
+            namespace=probe.namespace,
+            model=probe.model,
+            version=probe.version,
+            question=probe.question,
+            vector=probe.vector,
+            signature=probe.signature,
+            answer=answer,
+        )
+    except sqlite3.Error as e:
+        logger.warning("Cache sémantique : écriture impossible (%s)", e)
@@ -0,0 +1,213 @@
+"""
+Index lexical (BM25) d'un segment, construit en même temps que son index FAISS.
+
+Pour un segment <base> :
+    <base>.terms.json     vocabulaire (terme -> position = identifiant du terme)
+    <base>.postings.npz   listes de postings en CSR (offsets, rows, tf) + longueur de chaque ligne
+
+Les statistiques BM25 (nombre de lignes, df, longueur moyenne) sont agrégées sur tous
+les segments du namespace au moment de la requête : les segments restent immuables.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_WORDS = re.compile(r"\w+")
+
+# Mots vides (forme analysée : minuscules, sans accents)
+_STOPWORDS = frozenset("""
+a au aux avec ce ces cet cette d dans de des du elle en est et il ils je l la le les leur leurs
+lui ma mais me mes n ne nous on ou par pas pour qu que quel quelle quelles quels qui quoi sa se
+ses si son sont sur ta te tes ton tu un une vos votre vous y comment combien quand
+""".split())
+
+
+def _fold(text: str) -> str:
+    # "Assiduité" -> "assiduite" : la question et le PDF n'ont pas toujours les mêmes accents
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def analyze(text: str) -> List[str]:
+    """
+    Termes indexés d'un texte : minuscules, sans accents, sans mots vides,
+    pluriels simples ramenés au singulier ("absences" -> "absence").
+    """
+    terms = []
+    for word in _WORDS.findall(_fold(text)):
+        if len(word) < 2 or word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word[-1] in "sx":
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def _paths(base: str) -> Tuple[str, str]:
+    return f"{base}.terms.json", f"{base}.postings.npz"
+
+
+class SparseIndex:
+    """
+    Postings d'un segment : pour le terme t, les lignes rows[offsets[t]:offsets[t+1]]
+    (croissantes) et leurs fréquences tf.
+    """
+
+    def __init__(
+        self,
+        terms: List[str],
+        offsets: np.ndarray,
+        rows: np.ndarray,
+        tf: np.ndarray,
+        doc_len: np.ndarray,
+    ) -> None:
+        self.terms = terms
+        self.term_ids: Dict[str, int] = {t: i for i, t in enumerate(terms)}
+        self.offsets = offsets
+        self.rows = rows
+        self.tf = tf
+        self.doc_len = doc_len
+        self.total_len = int(doc_len.sum())
+
+    # ---------- construction ----------
+    @classmethod
+    def from_texts(cls, texts: Iterable[str]) -> "SparseIndex":
+        writer = SparseIndexWriter()
+        writer.add(list(texts))
+        return writer.build()
+
+    @classmethod
+    def open(cls, base: str) -> "SparseIndex":
+        terms_path, postings_path = _paths(base)
+        with open(terms_path, "r", encoding="utf-8") as f:
+            terms = json.load(f)
+        with np.load(postings_path) as z:
+            return cls(terms, z["offsets"], z["rows"], z["tf"], z["doc_len"])
+
+    def write(self, base: str) -> None:
+        terms_path, postings_path = _paths(base)
+        with open(terms_path, "w", encoding="utf-8") as f:
+            json.dump(self.terms, f, ensure_ascii=False)
+        with open(postings_path, "wb") as f:
+            np.savez(f, offsets=self.offsets, rows=self.rows, tf=self.tf, doc_len=self.doc_len)
+
+    @staticmethod
+    def files(base: str) -> Tuple[str, str]:
+        return _paths(base)
+
+    @staticmethod
+    def exists(base: str) -> bool:
+        return all(os.path.exists(p) for p in _paths(base))
+
+    # ---------- lecture ----------
+    def __len__(self) -> int:
+        return int(self.doc_len.shape[0])
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.offsets.nbytes + self.rows.nbytes + self.tf.nbytes + self.doc_len.nbytes)
+
+    def df(self, term: str) -> int:
+        tid = self.term_ids.get(term)
+        if tid is None:
+            return 0
+        return int(self.offsets[tid + 1] - self.offsets[tid])
+
+    def score(self, weights: Dict[str, float], avgdl: float) -> np.ndarray:
+        """
+        Score BM25 de chaque ligne ; weights : idf (global au namespace) des termes de la requête.
+        """
+        scores = np.zeros(len(self), dtype="float32")
+        for term, idf in weights.items():
+            tid = self.term_ids.get(term)
+            if tid is None:
+                continue
+            start, end = int(self.offsets[tid]), int(self.offsets[tid + 1])
+            rows = self.rows[start:end]
+            tf = self.tf[start:end].astype("float32")
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self.doc_len[rows] / avgdl)
+            scores[rows] += idf * tf * (BM25_K1 + 1.0) / (tf + norm)
+        return scores
+
+
+class SparseIndexWriter:
+    """
+    Construction incrémentale (par lots, comme SegmentWriter) : seuls les triplets
+    (terme, ligne, tf) restent en mémoire jusqu'à `build()`.
+    """
+
+    def __init__(self) -> None:
+        self._term_ids: Dict[str, int] = {}
+        self._terms: List[str] = []
+        self._postings: List[np.ndarray] = []
+        self._doc_len: List[int] = []
+
+    def add(self, texts: Sequence[str]) -> None:
+        triples = []
+        for text in texts:
+            row = len(self._doc_len)
+            terms = analyze(text or "")
+            self._doc_len.append(len(terms))
+            for term, tf in Counter(terms).items():
+                tid = self._term_ids.get(term)
+                if tid is None:
+                    tid = self._term_ids[term] = len(self._terms)
+                    self._terms.append(term)
+                triples.append((tid, row, tf))
+        if triples:
+            self._postings.append(np.array(triples, dtype=np.int32))
+
+    def build(self) -> SparseIndex:
+        postings = np.concatenate(self._postings) if self._postings else np.zeros((0, 3), dtype=np.int32)
+        # Tri stable par terme : les lignes restent croissantes dans chaque liste
+        postings = postings[np.argsort(postings[:, 0], kind="stable")]
+        counts = np.bincount(postings[:, 0], minlength=len(self._terms))
+        offsets = np.zeros(len(self._terms) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return SparseIndex(
+            self._terms,
+            offsets,
+            np.ascontiguousarray(postings[:, 1]),
+            np.ascontiguousarray(postings[:, 2]),
+            np.array(self._doc_len, dtype=np.int32),
+        )
+
+
+def idf_weights(query: str, indexes: Sequence[SparseIndex]) -> Tuple[Dict[str, float], float]:
+    """
+    idf BM25 des termes de la requête et longueur moyenne, agrégés sur les segments.
+    """
+    n_docs = sum(len(ix) for ix in indexes)
+    if n_docs == 0:
+        return {}, 1.0
+    avgdl = max(sum(ix.total_len for ix in indexes) / n_docs, 1.0)
+
+    weights: Dict[str, float] = {}
+    for term in set(analyze(query)):
+        df = sum(ix.df(term) for ix in indexes)
+        if df:
+            weights[term] = float(np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5)))
+    return weights, avgdl
+
+
+def rrf_fuse(rankings: Sequence[Sequence[Tuple]], k: int, rrf_k: int = 60) -> List[Tuple[float, Tuple]]:
+    """
+    Reciprocal Rank Fusion : score(d) = somme des 1 / (rrf_k + rang) sur les classements.
+    rankings : listes de clés, meilleure en tête. Retourne les k meilleures (score, clé).
+    """
+    fused: Dict[Tuple, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (rrf_k + rank)
+    best = sorted(fused.items(), key=lambda kv: kv[1], reverse=True)[:k]
+    return [(score, key) for key, score in best]
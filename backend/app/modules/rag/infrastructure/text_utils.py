@@ -1,20 +1,75 @@
+import re
+import threading
+from typing import Optional, Pattern, Set
+
+# Caractères non imprimables déjà rencontrés, et regex qui les supprime (recompilée s'il en
+# apparaît de nouveaux : quelques dizaines au plus dans des PDFs réels).
+_removed: Set[str] = set()
+_removed_pattern: Optional[Pattern[str]] = None
+_lock = threading.Lock()
+
+# Au-delà, on ne recompile plus (texte pathologique) : filtrage caractère par caractère
+_MAX_LEARNED = 4096
+
+
+def _char_class(chars: Set[str]) -> str:
+    """
+    Classe regex compacte : code points consécutifs fusionnés en plages.
+    """
+    ranges = []
+    for cp in sorted(map(ord, chars)):
+        if ranges and ranges[-1][1] == cp - 1:
+            ranges[-1][1] = cp
+        else:
+            ranges.append([cp, cp])
+    return "".join(
+        f"\\U{a:08x}" if a == b else f"\\U{a:08x}-\\U{b:08x}" for a, b in ranges
+    )
+
+
+def _learn_non_printable(text: str) -> Pattern[str]:
+    global _removed_pattern
+    with _lock:
+        _removed.update(c for c in set(text) if not c.isprintable())
+        _removed_pattern = re.compile(f"[{_char_class(_removed)}]+")
+        return _removed_pattern
+
+
 def normalize_text(text: str) -> str:
     """
     Nettoyage UTF-8 robuste pour texte extrait de PDF.
     - Corrige encodage cassé
     - Supprime caractères invisibles
     - Préserve le contenu métier/juridique
+
+    Sortie identique au filtrage historique caractère par caractère (isprintable),
+    mais les tests et suppressions se font en C (str.isprintable, regex).
     """
     if not text:
         return ""
 
-    # Force UTF-8
-    text = text.encode("utf-8", errors="ignore").decode("utf-8", errors="ignore")
+    # \n et \t étaient conservés puis réduits en espaces : autant le faire tout de suite,
+    # le reste du texte est alors "imprimable" au sens strict de str.isprintable
+    text = text.replace("\n", " ").replace("\t", " ")
 
-    # Supprime caractères non imprimables
-    text = "".join(c for c in text if c.isprintable() or c in "\n\t")
+    # Supprime caractères non imprimables (dont surrogates isolés = encodage cassé)
+    if not text.isprintable():
+        pattern = _removed_pattern
+        if pattern is not None:
+            text = pattern.sub("", text)
+        if not text.isprintable():
+            if len(_removed) < _MAX_LEARNED:
+                text = _learn_non_printable(text).sub("", text)
+            else:
+                text = "".join(c for c in text if c.isprintable())
 
     # Nettoyage espaces multiples
-    text = " ".join(text.split())
+    return " ".join(text.split())
 
-    return text.strip()
+
+def normalize_question(question: str) -> str:
+    """
+    Même question pour l'utilisateur (clé du cache de réponses) : casse et espaces ignorés.
+    Le vecteur de la question, lui, est calculé sur le texte avec sa casse (modèle "cased").
+    """
+    return " ".join((question or "").lower().split())
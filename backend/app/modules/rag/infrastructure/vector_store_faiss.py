@@ -1,14 +1,31 @@
 from __future__ import annotations
 
+import hashlib
 import os
 import pickle
-from typing import List, Tuple, Dict, Any, Optional
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Tuple, Dict, Any, Optional
 
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from pypdf import PdfReader
-
+from app.core.config import settings
+from app.modules.rag.infrastructure.columnar_meta import ColumnarMeta
+from app.modules.rag.infrastructure.embedding_service import (
+    embed_query_cached,
+    get_chunker,
+    get_embedder,
+)
+from app.modules.rag.infrastructure.index_factory import IndexConfig, index_kind, index_nbytes, inner_index
+from app.modules.rag.infrastructure.namespace_cache import NamespaceCache
+from app.modules.rag.infrastructure.pdf_reader import iter_page_texts, page_count
+from app.modules.rag.infrastructure.reranker import get_reranker
+from app.modules.rag.infrastructure.segment_store import (
+    MANIFEST,
+    NamespaceSnapshot,
+    Segment,
+    SegmentStore,
+)
 from app.modules.rag.infrastructure.text_utils import normalize_text
 
 
@@ -18,44 +35,419 @@ from app.modules.rag.infrastructure.text_utils import normalize_text
 STORE_DIR = "storage/vector_store"
 os.makedirs(STORE_DIR, exist_ok=True)
 
-MODEL = SentenceTransformer("all-MiniLM-L6-v2")
-EMB_DIM = 384
+EMB_DIM = settings.rag_embedding_dim
+
+# Type d'index des segments (surchargeable par namespace, cf. set_index_kind)
+INDEX_CONFIG = IndexConfig(
+    kind=settings.rag_index_kind,
+    ann_kind=settings.rag_ann_kind,
+    ann_threshold=settings.rag_ann_threshold,
+    hnsw_m=settings.rag_hnsw_m,
+    hnsw_ef_search=settings.rag_hnsw_ef_search,
+    ivf_nprobe=settings.rag_ivf_nprobe,
+    pq_m=settings.rag_pq_m,
+)
+
+# Cache process-wide des namespaces chargés (évite read_index + unpickle à chaque requête)
+NAMESPACE_CACHE = NamespaceCache(
+    max_entries=settings.rag_store_cache_max_entries,
+    max_bytes=settings.rag_store_cache_max_mb * 1024 * 1024,
+)
+
+
+# progress(étape, fraction 0..1) — rapporté aux tâches d'indexation en arrière-plan
+ProgressFn = Callable[[str, float], None]
+
+
+def _no_progress(stage: str, fraction: float) -> None:
+    pass
+
+
+def _safe_name(namespace: str) -> str:
+    return (namespace or "default").replace("/", "_").replace("\\", "_").replace(" ", "_")
 
 
 def _paths(namespace: str) -> tuple[str, str]:
     """
-    Chaque namespace a son propre index et meta.
+    Ancien format (un fichier index + un pickle par namespace), lu jusqu'à la première écriture.
     Ex: index__timetable_group_10.faiss / meta__timetable_group_10.pkl
     """
-    safe = (namespace or "default").replace("/", "_").replace("\\", "_").replace(" ", "_")
+    safe = _safe_name(namespace)
     vector_path = os.path.join(STORE_DIR, f"index__{safe}.faiss")
     meta_path = os.path.join(STORE_DIR, f"meta__{safe}.pkl")
     return vector_path, meta_path
 
 
-def _load_store(namespace: str = "default") -> Tuple[faiss.Index, List[Dict[str, Any]]]:
-    vector_path, meta_path = _paths(namespace)
+def _store(namespace: str) -> SegmentStore:
+    """
+    Chaque namespace a son propre dossier segmenté.
+    Ex: storage/vector_store/timetable_group_10/manifest.json
+    """
+    return SegmentStore(
+        os.path.join(STORE_DIR, _safe_name(namespace)),
+        EMB_DIM,
+        INDEX_CONFIG,
+        mmap=settings.rag_mmap_indexes,
+    )
 
-    if os.path.exists(vector_path) and os.path.exists(meta_path):
-        index = faiss.read_index(vector_path)
-        with open(meta_path, "rb") as f:
-            meta = pickle.load(f)
-    else:
-        index = faiss.IndexFlatIP(EMB_DIM)
-        meta = []
-    return index, meta
+
+def _store_version(namespace: str) -> Optional[tuple]:
+    """
+    Version disque d'un namespace (manifest, ou fichiers de l'ancien format).
+    None si le namespace n'existe pas encore.
+    """
+    version = _store(namespace).disk_version()
+    if version is not None:
+        return version
+
+    vector_path, meta_path = _paths(namespace)
+    try:
+        v = os.stat(vector_path)
+        m = os.stat(meta_path)
+    except FileNotFoundError:
+        return None
+    return "legacy", v.st_mtime_ns, v.st_size, m.st_mtime_ns, m.st_size
 
 
-def _save_store(index: faiss.Index, meta: List[Dict[str, Any]], namespace: str = "default") -> None:
+def _load_legacy(namespace: str) -> NamespaceSnapshot:
     vector_path, meta_path = _paths(namespace)
-    faiss.write_index(index, vector_path)
-    with open(meta_path, "wb") as f:
-        pickle.dump(meta, f)
+    index = faiss.read_index(vector_path)
+    with open(meta_path, "rb") as f:
+        meta = pickle.load(f)
+    return NamespaceSnapshot(segments=[Segment(name="legacy", index=index, meta=ColumnarMeta.from_rows(meta))])
+
+
+def _load_store(
+    namespace: str = "default",
+    *,
+    use_cache: bool = True,
+) -> NamespaceSnapshot:
+    """
+    Charge la vue lecture d'un namespace (segments fusionnés à la recherche).
+    use_cache=True : requêtes, servie depuis NAMESPACE_CACHE si à jour.
+    use_cache=False : lecture fraîche (indexation).
+    """
+    version = _store_version(namespace)
+    if version is None:
+        return NamespaceSnapshot()
+
+    if use_cache:
+        cached = NAMESPACE_CACHE.get(namespace, version)
+        if cached is not None:
+            return cached
+
+    store = _store(namespace)
+    snapshot = store.load() if store.exists() else _load_legacy(namespace)
+
+    if use_cache:
+        NAMESPACE_CACHE.put(namespace, version, snapshot)
+    return snapshot
+
+
+def index_version(namespace: str = "default") -> str:
+    """
+    Version de l'index d'un namespace, changée par chaque écriture (ingestion, suppression,
+    compaction, réindexation) : compteur du manifest + empreinte disque (namespace recréé).
+    """
+    disk = _store_version(namespace)
+    if disk is None:
+        return "empty"
+    snapshot = _load_store(namespace)
+    return "-".join(str(part) for part in (snapshot.version, *disk))
+
+
+def _open_for_write(namespace: str) -> SegmentStore:
+    """
+    Store segmenté du namespace ; migre l'ancien format au premier passage.
+    """
+    store = _store(namespace)
+    if not store.exists():
+        vector_path, meta_path = _paths(namespace)
+        if os.path.exists(vector_path) and os.path.exists(meta_path):
+            store.import_legacy(vector_path, meta_path)
+    return store
+
+
+def compact_namespace(namespace: str, *, rebuild: bool = False) -> Dict[str, Any]:
+    """
+    Fusionne les petits segments d'un namespace et purge les chunks supprimés.
+    rebuild=True : réécrit tous les segments avec le type d'index courant.
+    """
+    store = _open_for_write(namespace)
+    with store.write_lock():
+        result = store.compact(small_segment_rows=settings.rag_small_segment_rows, rebuild=rebuild)
+    NAMESPACE_CACHE.invalidate(namespace)
+    return {"namespace": namespace, **result}
+
+
+def set_index_kind(namespace: str, kind: Optional[str], *, rebuild: bool = True) -> Dict[str, Any]:
+    """
+    Choisit le type d'index d'un namespace (auto/flat/hnsw/ivf ; None => config globale).
+    """
+    store = _open_for_write(namespace)
+    with store.write_lock():
+        store.set_index_kind(kind)
+    NAMESPACE_CACHE.invalidate(namespace)
+    if rebuild:
+        return compact_namespace(namespace, rebuild=True)
+    return {"namespace": namespace}
+
+
+def _faiss_file_bytes(store: SegmentStore, manifest: Dict[str, Any]) -> int:
+    return sum(os.path.getsize(store._seg_paths(s["name"])[0]) for s in manifest["segments"])
+
+
+def _sample_rows(snapshot: NamespaceSnapshot, n: int, seed: int = 0) -> List[Tuple[Segment, int]]:
+    """
+    Chunks vivants tirés au hasard : (segment, ligne).
+    """
+    rng = np.random.default_rng(seed)
+    rows = [(seg, int(i)) for seg in snapshot.segments for i in np.flatnonzero(snapshot._alive_mask(seg))]
+    if not rows:
+        return []
+    return [rows[p] for p in rng.choice(len(rows), size=min(n, len(rows)), replace=False)]
+
+
+def _stored_vectors(rows: List[Tuple[Segment, int]]) -> np.ndarray:
+    return np.stack([inner_index(seg.index).reconstruct(i) for seg, i in rows]).astype("float32")
+
+
+def convert_namespace(namespace: str, kind: Optional[str], *, sample: int = 200, k: int = 10) -> Dict[str, Any]:
+    """
+    Migration d'un namespace vers un autre type d'index (ex: "sq8", "pq" ; None => config globale) :
+    tous les segments sont réécrits. Rapport : octets par vecteur (fichiers .faiss) avant / après,
+    et recall@k du nouvel index par rapport à l'ancien sur `sample` vecteurs du namespace.
+    Les vecteurs sont relus depuis l'index existant : repasser d'un index compressé à "flat"
+    ne restaure pas la précision perdue.
+    """
+    store = _open_for_write(namespace)
+    if not store.exists():
+        return {"namespace": namespace, "kind": kind, "vectors": 0}
+
+    with store.write_lock():
+        before = store.load()
+        bytes_before = _faiss_file_bytes(store, store.read_manifest())
+        queries = _stored_vectors(_sample_rows(before, sample)) if before.ntotal else None
+
+        store.set_index_kind(kind)
+        store.compact(small_segment_rows=settings.rag_small_segment_rows, rebuild=True)
+        manifest = store.read_manifest()
+        after = store.load()
+        bytes_after = _faiss_file_bytes(store, manifest)
+    NAMESPACE_CACHE.invalidate(namespace)
+
+    recall = 1.0
+    if queries is not None and len(queries):
+        found = []
+        for q in queries:
+            truth = {m["chunk_id"] for _, m in before.search(q.reshape(1, -1), k)}
+            got = {m["chunk_id"] for _, m in after.search(q.reshape(1, -1), k)}
+            found.append(len(truth & got) / max(len(truth), 1))
+        recall = float(np.mean(found))
+
+    n = max(after.ntotal, 1)
+    return {
+        "namespace": namespace,
+        "kind": kind,
+        "segments": [s["kind"] for s in manifest["segments"]],
+        "vectors": after.ntotal,
+        "bytes_per_vector_before": bytes_before / n,
+        "bytes_per_vector_after": bytes_after / n,
+        f"recall@{k}": recall,
+    }
+
+
+def check_embedder_compatibility(
+    namespace: str,
+    *,
+    sample: int = 100,
+    min_cosine: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Vérifie que l'embedder courant (ex: backend ONNX / int8) reproduit les vecteurs déjà indexés :
+    cosinus entre le vecteur stocké et le ré-encodage du texte, sur `sample` chunks du namespace.
+    Index compressés (sq8 / pq) : le vecteur stocké est lui-même approché, tolérance à ajuster.
+    """
+    min_cosine = settings.rag_embedder_min_cosine if min_cosine is None else min_cosine
+    snapshot = _load_store(namespace, use_cache=False)
+    rows = _sample_rows(snapshot, sample)
+    if not rows:
+        return {"namespace": namespace, "sample": 0, "ok": True}
+
+    stored = _stored_vectors(rows)
+    stored /= np.linalg.norm(stored, axis=1, keepdims=True) + 1e-12
+    fresh = get_embedder().embed_texts([seg.meta.text(i) for seg, i in rows])
+    cosines = np.sum(stored * fresh, axis=1)
+    return {
+        "namespace": namespace,
+        "sample": len(rows),
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "ok": bool(cosines.min() >= min_cosine),
+    }
+
+
+def namespace_report(namespace: str) -> Dict[str, Any]:
+    """
+    Type d'index, nombre de vecteurs et octets par vecteur (disque et mémoire estimée) d'un namespace.
+    """
+    snapshot = _load_store(namespace, use_cache=False)
+    store = _store(namespace)
+    n = max(snapshot.ntotal, 1)
+    disk = _faiss_file_bytes(store, store.read_manifest()) if store.exists() else 0
+    return {
+        "namespace": namespace,
+        "kinds": sorted({index_kind(seg.index) for seg in snapshot.segments}),
+        "segments": len(snapshot.segments),
+        "vectors": snapshot.ntotal,
+        "disk_bytes_per_vector": disk / n,
+        "memory_bytes_per_vector": sum(index_nbytes(seg.index) for seg in snapshot.segments) / n,
+    }
+
+
+def list_namespaces() -> List[str]:
+    """
+    Namespaces présents sur disque (format segmenté ou ancien format).
+    """
+    names = set()
+    for entry in os.listdir(STORE_DIR):
+        path = os.path.join(STORE_DIR, entry)
+        if os.path.isdir(path) and os.path.exists(os.path.join(path, MANIFEST)):
+            names.add(entry)
+        elif entry.startswith("index__") and entry.endswith(".faiss"):
+            names.add(entry[len("index__"):-len(".faiss")])
+    return sorted(names)
+
 
+def _content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
 
-def _normalize(v: np.ndarray) -> np.ndarray:
-    norms = np.linalg.norm(v, axis=1, keepdims=True) + 1e-12
-    return v / norms
+
+def _batched(items: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    it = iter(items)
+    while batch := list(islice(it, max(1, size))):
+        yield batch
+
+
+def _iter_pdf_chunks(
+    normalized_path: str,
+    base: Dict[str, Any],
+    *,
+    n_pages: int,
+    progress: ProgressFn,
+    pdf_workers: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Chunks d'un PDF, produits page par page (rien n'est accumulé pour tout le document).
+    base : métadonnées communes (document_id, namespace, extras).
+    """
+    chunker = get_chunker()
+    chunk_index = 0
+    # Extraction parallèle par tranches de pages pour les gros PDFs (cf. pdf_reader)
+    for page_num, text in iter_page_texts(normalized_path, workers=pdf_workers):
+        progress("extraction", 0.9 * (page_num - 1) / max(n_pages, 1))
+        if not text:
+            continue
+
+        # Chunks en tokens, coupés aux fins de phrase, avec chevauchement (cf. chunker)
+        for chunk in chunker.split(text):
+            yield {
+                "source": normalized_path,
+                "page": page_num,
+                "chunk_index": chunk_index,
+                "text": chunk,
+                "content_hash": _content_hash(chunk),
+                **base,
+            }
+            chunk_index += 1
+
+
+def _ingest_chunks(
+    namespace: str,
+    chunks: Iterable[Dict[str, Any]],
+    *,
+    owned: Callable[[Dict[str, Any]], bool],
+    dedupe_scope: Callable[[Dict[str, Any]], bool],
+    document_id: Optional[int] = None,
+    n_pages: int = 1,
+    progress: Optional[ProgressFn] = None,
+    batch_size: Optional[int] = None,
+    store: Optional[SegmentStore] = None,
+    embed: Optional[Callable[[List[Dict[str, Any]]], np.ndarray]] = None,
+) -> Dict[str, int]:
+    """
+    Indexation idempotente par hash de contenu, en flux : les chunks sont embeddés par lots
+    de `batch_size` et ajoutés au fil de l'eau à un nouveau segment, publié en une fois à la fin.
+    La mémoire reste bornée par la taille d'un lot (plus un hash par chunk).
+    - owned : chunks appartenant au même document => supprimés s'ils ont disparu du PDF,
+      doublons d'un même hash ramenés à une seule copie.
+    - dedupe_scope : chunks déjà présents => ni ré-embeddés, ni ré-ajoutés.
+    - document_id : restreint l'examen aux chunks de ce document (filtre colonne).
+    - store : store cible hors STORE_DIR (reconstruction en staging, cf. bulk_reindex).
+    - embed : vecteurs des chunks à ajouter (défaut : embedder partagé), ex. calculés par un autre processus.
+    Aucun chunk => rien n'est modifié ("chunks" == 0, à l'appelant de lever l'erreur).
+    """
+    progress = progress or _no_progress
+    batch_size = batch_size or settings.rag_ingest_batch_size
+    embed = embed or (lambda batch: get_embedder().embed_texts([m["text"] for m in batch]))
+
+    live = store is None
+    store = store or _open_for_write(namespace)
+    with store.write_lock():
+        snapshot = store.load()
+
+        # Colonnes seulement : le texte des chunks existants n'est pas décodé
+        existing = list(snapshot.rows(with_text=False, document_id=document_id))
+        # Toutes les copies d'un hash : l'ancien double indexage a pu en laisser plusieurs
+        owned_hashes: Dict[str, List[int]] = {}
+        for m in existing:
+            if owned(m):
+                owned_hashes.setdefault(m["content_hash"], []).append(m["chunk_id"])
+        known = {m["content_hash"] for m in existing if dedupe_scope(m)}
+        seen = set()
+
+        total = added = 0
+        segment = store.open_segment()
+        try:
+            for batch in _batched(chunks, batch_size):
+                total += len(batch)
+                to_add: List[Dict[str, Any]] = []
+                for m in batch:
+                    seen.add(m["content_hash"])
+                    if m["content_hash"] in known:
+                        continue
+                    known.add(m["content_hash"])
+                    to_add.append(m)
+
+                if to_add:
+                    progress("embedding", 0.9 * batch[-1]["page"] / max(n_pages, 1))
+                    segment.add(embed(to_add), to_add)
+                    added += len(to_add)
+        except BaseException:
+            segment.abort()
+            raise
+
+        # Hash disparu => toutes ses copies ; hash encore présent => une copie gardée, les doublons supprimés
+        stale = [cid for h, cids in owned_hashes.items() for cid in (cids if h not in seen else cids[1:])]
+        if total == 0 or not (added or stale):
+            segment.abort()
+        else:
+            progress("ecriture", 0.95)
+            manifest = store.commit(segment=segment, delete_ids=stale)
+            if len(manifest["segments"]) > settings.rag_max_segments:
+                store.compact(small_segment_rows=settings.rag_small_segment_rows)
+            if live:
+                NAMESPACE_CACHE.invalidate(namespace)
+
+    if total == 0:
+        return {"chunks": 0, "new": 0, "unchanged": 0, "removed": 0, "vectors": snapshot.ntotal}
+    return {
+        "chunks": total,
+        "new": added,
+        "unchanged": total - added,
+        "removed": len(stale),
+        "vectors": snapshot.ntotal - len(stale) + added,
+    }
 
 
 # =========================
@@ -66,100 +458,203 @@ def index_document(
     file_path: str,
     *,
     namespace: str = "default",
+    progress: Optional[ProgressFn] = None,
 ) -> Dict[str, Any]:
     """
     Indexe un document PDF (règlement, docs pédagogiques, etc.) dans FAISS.
     Namespace par défaut = "default" => ne casse pas l'existant.
     """
-    index, meta = _load_store(namespace)
-
     normalized_path = os.path.normpath(file_path)
     if not os.path.exists(normalized_path):
         raise FileNotFoundError(f"PDF introuvable : {normalized_path}")
 
-    reader = PdfReader(normalized_path)
-    chunks: List[str] = []
-    metadatas: List[Dict[str, Any]] = []
-
-    for page_num, page in enumerate(reader.pages, start=1):
-        raw_text = page.extract_text() or ""
-        text = normalize_text(raw_text)
-        if not text:
-            continue
+    n_pages = page_count(normalized_path)
+    chunks = _iter_pdf_chunks(
+        normalized_path,
+        {"document_id": document_id, "namespace": namespace},
+        n_pages=n_pages,
+        progress=progress or _no_progress,
+    )
+
+    # Ré-indexer le même document_id ne duplique pas les vecteurs
+    stats = _ingest_chunks(
+        namespace,
+        chunks,
+        owned=lambda m: m.get("document_id") == document_id,
+        dedupe_scope=lambda m: m.get("document_id") == document_id,
+        document_id=document_id,
+        n_pages=n_pages,
+        progress=progress,
+    )
+    if not stats["chunks"]:
+        raise ValueError("Document vide ou illisible")
 
-        for i in range(0, len(text), 900):
-            chunk = text[i:i + 900].strip()
-            if not chunk:
-                continue
+    return {
+        "namespace": namespace,
+        "pages": n_pages,
+        **stats,
+    }
 
-            chunks.append(chunk)
-            metadatas.append({
-                "document_id": document_id,
-                "source": normalized_path,
-                "page": page_num,
-                "text": chunk,
-                "namespace": namespace,
-            })
 
-    if not chunks:
-        raise ValueError("Document vide ou illisible")
+def delete_document(document_id: int, *, namespace: str = "default") -> Dict[str, Any]:
+    """
+    Retire du namespace tous les vecteurs d'un document (tombstones sur ses chunk_id).
+    Coût proportionnel au nombre de chunks du document ; la place disque est rendue à la compaction.
+    """
+    store = _open_for_write(namespace)
+    if not store.exists():
+        return {"namespace": namespace, "removed": 0, "vectors": 0}
+
+    with store.write_lock():
+        snapshot = store.load()
+        chunk_ids = snapshot.chunk_ids_for_document(document_id)
+        if chunk_ids:
+            manifest = store.commit(delete_ids=chunk_ids)
+            if len(manifest["segments"]) > settings.rag_max_segments:
+                store.compact(small_segment_rows=settings.rag_small_segment_rows)
+            NAMESPACE_CACHE.invalidate(namespace)
 
-    embeddings = MODEL.encode(chunks, convert_to_numpy=True).astype("float32")
-    embeddings = _normalize(embeddings)
+    return {
+        "namespace": namespace,
+        "removed": len(chunk_ids),
+        "vectors": snapshot.ntotal - len(chunk_ids),
+    }
 
-    index.add(embeddings)
-    meta.extend(metadatas)
-    _save_store(index, meta, namespace)
 
+def _to_context(score: float, m: Dict[str, Any]) -> Dict[str, Any]:
     return {
-        "namespace": namespace,
-        "pages": len(reader.pages),
-        "chunks": len(chunks),
-        "vectors": index.ntotal,
+        "source": m.get("source", ""),
+        "page": int(m.get("page", 0)),
+        "score": float(score),
+        "text": normalize_text(m.get("text", "")),
+        "document_id": m.get("document_id"),
+        "chunk_index": m.get("chunk_index"),
     }
 
 
+RETRIEVAL_MODES = ("dense", "hybrid")
+
+
 def retrieve_context(
     question: str,
     k: int = 5,
     *,
     namespace: str = "default",
+    mode: Optional[str] = None,
+    rerank: Optional[bool] = None,
 ) -> Tuple[List[Dict[str, Any]], List[str]]:
     """
     Récupère des chunks depuis un namespace donné.
     Namespace par défaut = "default" => ne casse pas l'existant.
+
+    mode (défaut : settings.rag_retrieval_mode) :
+    - "dense"  : similarité cosinus (FAISS) ; score = cosinus.
+    - "hybrid" : dense + BM25 (mots-clés exacts : "absence", "retard"...) fusionnés par RRF ;
+                 score = score RRF (ordre seul significatif).
+
+    rerank (défaut : settings.rag_rerank) : sur-échantillonne `rag_rerank_candidates` chunks
+    et les réordonne par cross-encoder, sous `rag_rerank_budget_ms` ; score = pertinence 0..1.
     """
-    index, meta = _load_store(namespace)
-    if index.ntotal == 0:
+    mode = mode or settings.rag_retrieval_mode
+    rerank = settings.rag_rerank if rerank is None else rerank
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Mode de recherche inconnu : {mode}")
+
+    snapshot = _load_store(namespace)
+    if not snapshot.segments:
         return [], []
 
-    q_emb = MODEL.encode([question], convert_to_numpy=True).astype("float32")
-    q_emb = _normalize(q_emb)
+    q_emb = embed_query_cached(question)
+    fetch = max(k, settings.rag_rerank_candidates) if rerank else k
+    if mode == "hybrid":
+        hits = snapshot.hybrid_search(
+            q_emb,
+            question,
+            fetch,
+            candidates=settings.rag_hybrid_candidates,
+            rrf_k=settings.rag_rrf_k,
+        )
+    else:
+        hits = snapshot.search(q_emb, fetch)
 
-    scores, idxs = index.search(q_emb, k)
+    if rerank:
+        hits = get_reranker().rerank(question, hits, k, budget_ms=settings.rag_rerank_budget_ms)
 
     contexts: List[Dict[str, Any]] = []
     sources = set()
 
-    for score, idx in zip(scores[0], idxs[0]):
-        if idx < 0 or idx >= len(meta):
-            continue
-
-        m = meta[idx]
-        contexts.append({
-            "source": m.get("source", ""),
-            "page": int(m.get("page", 0)),
-            "score": float(score),
-            "text": normalize_text(m.get("text", "")),
-            "document_id": m.get("document_id"),
-            "chunk_index": m.get("chunk_index"),
-        })
+    for score, m in hits:
+        contexts.append(_to_context(score, m))
         if m.get("source"):
             sources.add(m["source"])
 
     return contexts, list(sources)
 
 
+@dataclass(frozen=True)
+class NamespaceQuery:
+    """
+    Namespace interrogé par retrieve_multi, avec son propre k et son poids dans la fusion.
+    """
+    namespace: str
+    k: int = 5
+    weight: float = 1.0
+
+
+def retrieve_multi(
+    question: str,
+    namespaces: List[NamespaceQuery],
+    k: int = 5,
+    *,
+    normalize: str = "cosine",
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Recherche dans plusieurs namespaces avec UN seul encodage de la question.
+    Fusion des résultats par score normalisé pondéré, avec le namespace d'origine.
+
+    normalize :
+    - "cosine" : (score + 1) / 2 — même modèle partout, donc scores comparables entre namespaces.
+    - "minmax" : min-max par namespace — neutralise les écarts d'échelle entre corpus.
+    """
+    if normalize not in ("cosine", "minmax"):
+        raise ValueError(f"Normalisation inconnue : {normalize}")
+
+    q_emb = embed_query_cached(question)
+    merged: List[Dict[str, Any]] = []
+
+    for nq in namespaces:
+        snapshot = _load_store(nq.namespace)
+        if not snapshot.segments:
+            continue
+
+        hits = snapshot.search(q_emb, nq.k)
+        if not hits:
+            continue
+
+        raw = [score for score, _ in hits]
+        lo, hi = min(raw), max(raw)
+        for score, m in hits:
+            if normalize == "minmax":
+                norm = (score - lo) / (hi - lo) if hi > lo else 1.0
+            else:
+                norm = (score + 1.0) / 2.0
+
+            ctx = _to_context(score, m)
+            ctx["namespace"] = nq.namespace
+            ctx["raw_score"] = float(score)
+            ctx["score"] = float(nq.weight * norm)
+            merged.append(ctx)
+
+    merged.sort(key=lambda c: c["score"], reverse=True)
+    contexts = merged[:k]
+
+    sources: List[str] = []
+    for c in contexts:
+        if c["source"] and c["source"] not in sources:
+            sources.append(c["source"])
+    return contexts, sources
+
+
 # =========================
 # PUBLIC API (TIMETABLE)
 # =========================
@@ -168,56 +663,37 @@ def index_pdf_for_namespace(
     file_path: str,
     namespace: str,
     extra_metadata: Optional[Dict[str, Any]] = None,
+    progress: Optional[ProgressFn] = None,
 ) -> Dict[str, Any]:
     """
     Indexe un PDF dans un namespace spécifique (ex: timetable_group_10).
     """
-    index, meta = _load_store(namespace)
-
     normalized_path = os.path.normpath(file_path)
     if not os.path.exists(normalized_path):
         raise FileNotFoundError(f"PDF introuvable : {normalized_path}")
 
-    reader = PdfReader(normalized_path)
-    chunks: List[str] = []
-    metadatas: List[Dict[str, Any]] = []
-    extra_metadata = extra_metadata or {}
-
-    for page_num, page in enumerate(reader.pages, start=1):
-        raw_text = page.extract_text() or ""
-        text = normalize_text(raw_text)
-        if not text:
-            continue
-
-        # chunking (conservatif)
-        for i in range(0, len(text), 900):
-            chunk = text[i:i + 900].strip()
-            if not chunk:
-                continue
-
-            chunks.append(chunk)
-            metadatas.append({
-                "document_id": None,
-                "source": normalized_path,
-                "page": page_num,
-                "text": chunk,
-                "namespace": namespace,
-                **extra_metadata,
-            })
-
-    if not chunks:
+    n_pages = page_count(normalized_path)
+    chunks = _iter_pdf_chunks(
+        normalized_path,
+        {"document_id": None, "namespace": namespace, **(extra_metadata or {})},
+        n_pages=n_pages,
+        progress=progress or _no_progress,
+    )
+
+    # Ré-upload du même emploi du temps (nouveau chemin) => contenu déjà présent, rien n'est ajouté
+    stats = _ingest_chunks(
+        namespace,
+        chunks,
+        owned=lambda m: m.get("source") == normalized_path,
+        dedupe_scope=lambda m: m.get("document_id") is None,
+        n_pages=n_pages,
+        progress=progress,
+    )
+    if not stats["chunks"]:
         raise ValueError("PDF vide ou illisible")
 
-    embeddings = MODEL.encode(chunks, convert_to_numpy=True).astype("float32")
-    embeddings = _normalize(embeddings)
-
-    index.add(embeddings)
-    meta.extend(metadatas)
-    _save_store(index, meta, namespace)
-
     return {
         "namespace": namespace,
-        "pages": len(reader.pages),
-        "chunks": len(chunks),
-        "vectors": index.ntotal,
+        "pages": n_pages,
+        **stats,
     }
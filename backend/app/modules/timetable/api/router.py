@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Body
 from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.core.deps import get_db
@@ -11,6 +12,8 @@ from app.db.models import User
 from app.modules.timetable.domain.policy import StudentContext
 from app.modules.timetable.infrastructure.repositories import SqlAlchemyScheduleRepository
 from app.modules.timetable.infrastructure.storage import LocalPdfStorage
+from app.modules.jobs.handlers import TIMETABLE_PDF
+from app.modules.jobs.queue import get_job_queue
 from app.modules.timetable.application.use_cases import (
     UploadScheduleUseCase,
     UploadScheduleCommand,
@@ -20,8 +23,9 @@ from app.modules.timetable.application.use_cases import (
     GetMyTimetableUseCase,
 )
 from app.db.repositories.student_repo import get_student_by_user_id
-from app.modules.timetable.api.schemas import ScheduleOut
-from app.modules.timetable.rag.service import ask_timetable
+from app.modules.timetable.api.schemas import ScheduleOut, ScheduleUploadOut
+from app.modules.timetable.rag.service import ask_timetable_async, ask_timetable_stream_async
+from app.shared.sse import answer_events_async, sse_response
 
 router = APIRouter(prefix="/timetable", tags=["Timetable"])
 
@@ -32,6 +36,18 @@ def _container(db: Session):
     return repo, storage
 
 
+class _JobIndexingQueue:
+    """
+    Adaptateur du port IndexingQueue vers la file de tâches.
+    """
+
+    def enqueue_timetable(self, *, schedule_id: int, pdf_path: str, group_id: int) -> int:
+        return get_job_queue().enqueue(
+            TIMETABLE_PDF,
+            {"schedule_id": schedule_id, "pdf_path": pdf_path, "group_id": group_id},
+        )
+
+
 def _require_scolarite(user: User) -> None:
     # adapte au nom de rôle chez toi (ex: "SCOLARITE" / "ADMIN")
     if getattr(user, "role", None) not in ("SCOLARITE", "ADMIN"):
@@ -40,7 +56,7 @@ def _require_scolarite(user: User) -> None:
 
 
 
-@router.post("/upload", response_model=ScheduleOut)
+@router.post("/upload", response_model=ScheduleUploadOut, status_code=202)
 async def upload_schedule_pdf(
     group_id: int = Form(...),
     title: str = Form(...),
@@ -57,10 +73,10 @@ async def upload_schedule_pdf(
     content = await pdf.read()
     repo, storage = _container(db)
 
-    uc = UploadScheduleUseCase(repo=repo, storage=storage)
+    uc = UploadScheduleUseCase(repo=repo, storage=storage, indexing=_JobIndexingQueue())
 
     try:
-        schedule = uc.execute(
+        result = uc.execute(
             UploadScheduleCommand(
                 group_id=group_id,
                 title=title,
@@ -73,12 +89,14 @@ async def upload_schedule_pdf(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    return ScheduleOut(
+    schedule = result.schedule
+    return ScheduleUploadOut(
         id=schedule.id,
         group_id=schedule.group_id,
         title=schedule.title,
         period=schedule.period,
         created_at=schedule.created_at,
+        index_job_id=result.index_job_id,
     )
 
 
@@ -173,17 +191,18 @@ def download_schedule_pdf(
 
 
 @router.post("/ask")
-def ask_my_timetable(
+async def ask_my_timetable(
     question: str = Body(..., embed=True),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    student = get_student_by_user_id(db, current_user.id)
+    # Requête DB synchrone : dans le threadpool, pas sur la boucle d'événements
+    student = await run_in_threadpool(get_student_by_user_id, db, current_user.id)
 
     if not student or not student.groupe_id:
         raise HTTPException(status_code=400, detail="Student group not set")
 
-    answer = ask_timetable(
+    answer = await ask_timetable_async(
         question=question,
         group_id=student.groupe_id,
     )
@@ -191,4 +210,29 @@ def ask_my_timetable(
     return {
         "question": question,
         "answer": answer,
-    }
\ No newline at end of file
+    }
+
+@router.post("/ask/stream")
+async def ask_my_timetable_stream(
+    question: str = Body(..., embed=True),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Variante Server-Sent Events de /ask : sources (pages) d'abord, puis la réponse token par token.
+    """
+    student = await run_in_threadpool(get_student_by_user_id, db, current_user.id)
+
+    if not student or not student.groupe_id:
+        raise HTTPException(status_code=400, detail="Student group not set")
+
+    contexts, sources, tokens = await ask_timetable_stream_async(
+        question=question,
+        group_id=student.groupe_id,
+    )
+
+    return sse_response(answer_events_async(
+        sources,
+        [{"source": c["source"], "page": c["page"], "score": c["score"], "text": c["text"]} for c in contexts],
+        tokens,
+    ))
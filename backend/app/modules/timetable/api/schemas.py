@@ -15,6 +15,10 @@ class ScheduleOut(BaseModel):
         from_attributes = True
 
 
+class ScheduleUploadOut(ScheduleOut):
+    index_job_id: int
+
+
 class UploadScheduleMetaIn(BaseModel):
     group_id: int
     title: str
@@ -4,10 +4,9 @@ from typing import Optional, List
 
 from app.modules.timetable.domain.models import SchedulePdf
 from app.modules.timetable.domain.policy import StudentContext, can_access_schedule
-from app.modules.timetable.domain.ports import ScheduleRepository, FileStorage
+from app.modules.timetable.domain.ports import ScheduleRepository, FileStorage, IndexingQueue
 from app.db.repositories.student_repo import get_student_by_user_id
 from app.modules.timetable.infrastructure.repositories import SqlAlchemyScheduleRepository
-from app.modules.timetable.rag.indexer import index_timetable_pdf
 
 
 @dataclass(frozen=True)
@@ -20,12 +19,19 @@ class UploadScheduleCommand:
     uploaded_by: int
 
 
+@dataclass(frozen=True)
+class UploadScheduleResult:
+    schedule: SchedulePdf
+    index_job_id: int
+
+
 class UploadScheduleUseCase:
-    def __init__(self, repo: ScheduleRepository, storage: FileStorage):
+    def __init__(self, repo: ScheduleRepository, storage: FileStorage, indexing: IndexingQueue):
         self.repo = repo
         self.storage = storage
+        self.indexing = indexing
 
-    def execute(self, cmd: UploadScheduleCommand) -> SchedulePdf:
+    def execute(self, cmd: UploadScheduleCommand) -> UploadScheduleResult:
         if not cmd.pdf_bytes:
             raise ValueError("Empty PDF")
         if not cmd.original_filename.lower().endswith(".pdf"):
@@ -44,17 +50,15 @@ class UploadScheduleUseCase:
             uploaded_by=cmd.uploaded_by,
         )
 
-        # Indexation RAG timetable (ne casse pas la création)
-        try:
-            index_timetable_pdf(
-                pdf_path=schedule.file_path,
-                group_id=schedule.group_id,
-            )
-        except Exception:
-            # important : ne pas casser l'upload si RAG down
-            pass
+        # Indexation RAG en arrière-plan : l'upload ne dépend plus de la taille du PDF,
+        # et un échec d'indexation reste visible sur la tâche (/jobs/{id})
+        job_id = self.indexing.enqueue_timetable(
+            schedule_id=schedule.id,
+            pdf_path=schedule.file_path,
+            group_id=schedule.group_id,
+        )
 
-        return schedule
+        return UploadScheduleResult(schedule=schedule, index_job_id=job_id)
 
 
 class GetStudentSchedulesUseCase:
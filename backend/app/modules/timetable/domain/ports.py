@@ -37,3 +37,11 @@ class FileStorage(Protocol):
 
     def exists(self, file_path: str) -> bool:
         ...
+
+
+class IndexingQueue(Protocol):
+    def enqueue_timetable(self, *, schedule_id: int, pdf_path: str, group_id: int) -> int:
+        """
+        Planifie l'indexation RAG du PDF et retourne l'id de la tâche.
+        """
+        ...
@@ -1,14 +1,48 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
 from app.modules.rag.infrastructure.vector_store_faiss import retrieve_context
 from app.modules.rag.infrastructure.llm_gateway import get_llm_gateway
+from app.modules.rag.infrastructure.cpu_executor import run_cpu
+from app.modules.rag.infrastructure.answer_cache import AnswerSlot, lookup_answer, remember_answer
+from app.modules.rag.infrastructure.semantic_cache import (
+    SemanticProbe,
+    contexts_signature,
+    question_entities,
+    semantic_lookup,
+    semantic_remember,
+    signature,
+)
+from app.modules.timetable.rag.indexer import timetable_namespace
 from app.modules.timetable.rag.prompts import TIMETABLE_PROMPT
 
+NO_ANSWER = "Je ne sais pas."
+
+
+@dataclass
+class _Pending:
+    """
+    Question prête pour le LLM : soit une réponse déjà connue (caches, pas de contexte),
+    soit un prompt à générer (`prompt` non None).
+    """
+    slot: Optional[AnswerSlot]
+    sources: List[str]
+    contexts: List[Dict[str, Any]]
+    answer: str = NO_ANSWER
+    prompt: Optional[str] = None
+    probe: Optional[SemanticProbe] = None
+    from_cache: bool = False  # réponse du cache exact : rien à y remettre
 
-def ask_timetable(*, question: str, group_id: int) -> str:
-    namespace = f"timetable_group_{group_id}"
 
-    contexts, _sources = retrieve_context(
+def _retrieve(question: str, group_id: int) -> Tuple[List[Dict[str, Any]], List[str], Optional[str]]:
+    """
+    (contextes, sources, prompt) ; prompt None => pas de contexte exploitable.
+    """
+    namespace = timetable_namespace(group_id)
+
+    contexts, sources = retrieve_context(
         question,
         k=5,
         namespace=namespace,
@@ -16,7 +50,7 @@ def ask_timetable(*, question: str, group_id: int) -> str:
 
     # Si aucun contexte => logique métier stricte
     if not contexts:
-        return "Je ne sais pas."
+        return contexts, sources, None
 
     # Concat propre (on met page + extrait)
     context_text = "\n\n".join(
@@ -26,18 +60,157 @@ def ask_timetable(*, question: str, group_id: int) -> str:
     ).strip()
 
     if not context_text:
-        return "Je ne sais pas."
+        return contexts, sources, None
 
     prompt = TIMETABLE_PROMPT.format(
         context=context_text,
         question=question,
     )
+    return contexts, sources, prompt
+
+
+def _reuse(
+    question: str,
+    group_id: int,
+    contexts: List[Dict[str, Any]],
+    slot: Optional[AnswerSlot],
+) -> Tuple[Optional[SemanticProbe], Optional[str]]:
+    """
+    Réponse d'une question proche qui a retrouvé les mêmes créneaux et porte sur les mêmes
+    jour / heure / module (cache sémantique), sinon None. Petit emploi du temps : toutes les
+    questions retrouvent les mêmes chunks, les entités seules distinguent "lundi" de "mardi".
+    """
+    probe, hit = semantic_lookup(
+        timetable_namespace(group_id),
+        question,
+        signature([contexts_signature(contexts), *question_entities(question)]),
+        get_llm_gateway(),
+        version=slot.version if slot else None,
+    )
+    return probe, (hit.answer if hit else None)
+
+
+def _prepare(question: str, group_id: int) -> _Pending:
+    """
+    Tout ce qui précède l'appel au LLM, commun aux quatre variantes et dans cet ordre :
+    cache exact, recherche + prompt, cache sémantique.
+    """
+    slot, cached = lookup_answer(timetable_namespace(group_id), question, get_llm_gateway())
+    if cached is not None:
+        return _Pending(slot, cached["sources"], cached["contexts"], answer=cached["answer"], from_cache=True)
 
-    llm = get_llm_gateway()
-    answer = llm.generate(prompt).strip()
+    contexts, sources, prompt = _retrieve(question, group_id)
+    if prompt is None:
+        return _Pending(slot, sources, contexts)
 
-    # Sécurité : si le modèle répond vide
-    if not answer:
-        return "Je ne sais pas."
+    probe, reused = _reuse(question, group_id, contexts, slot)
+    if reused is not None:
+        return _Pending(slot, sources, contexts, answer=reused)
+    return _Pending(slot, sources, contexts, prompt=prompt, probe=probe)
 
+
+def _finalize(pending: _Pending, generated: Optional[str] = None) -> str:
+    """
+    Réponse finale (texte généré si `pending.prompt`) et alimentation des caches.
+    Les réponses en erreur du LLM sont écartées par remember_answer / semantic_remember.
+    """
+    answer = pending.answer
+    if pending.prompt is not None:
+        # Sécurité : si le modèle répond vide
+        answer = (generated or "").strip() or NO_ANSWER
+        semantic_remember(pending.probe, answer)
+
+    if not pending.from_cache:
+        remember_answer(pending.slot, answer=answer, sources=pending.sources, contexts=pending.contexts)
     return answer
+
+
+def ask_timetable(*, question: str, group_id: int) -> str:
+    pending = _prepare(question, group_id)
+    generated = get_llm_gateway().generate(pending.prompt) if pending.prompt is not None else None
+    return _finalize(pending, generated)
+
+
+def _stripped(tokens: Iterator[str]) -> Iterator[str]:
+    """
+    Mêmes garanties que ask_timetable, fragment par fragment : espaces de tête et de fin
+    retirés (les espaces de fin d'un fragment attendent le texte suivant), réponse vide
+    => "Je ne sais pas.".
+    """
+    started = False
+    held = ""
+    for token in tokens:
+        if not started:
+            token = token.lstrip()
+            if not token:
+                continue
+            started = True
+        body = token.rstrip()
+        if body:
+            yield held + body
+            held = token[len(body):]
+        else:
+            held += token
+    if not started:
+        yield NO_ANSWER
+
+
+def ask_timetable_stream(
+    *,
+    question: str,
+    group_id: int,
+) -> Tuple[List[Dict[str, Any]], List[str], Iterator[str]]:
+    """
+    (contextes, sources, fragments de la réponse) ; la recherche est faite tout de suite,
+    la génération seulement à la lecture des fragments. Cache de réponses en lecture seule.
+    """
+    pending = _prepare(question, group_id)
+    if pending.prompt is None:
+        return pending.contexts, pending.sources, iter([pending.answer])
+    return pending.contexts, pending.sources, _stripped(get_llm_gateway().stream(pending.prompt))
+
+
+async def ask_timetable_async(*, question: str, group_id: int) -> str:
+    """
+    Version async de ask_timetable : recherche sur l'exécuteur CPU, attente du LLM sans thread.
+    """
+    pending = await run_cpu(_prepare, question, group_id)
+    generated = await get_llm_gateway().generate_async(pending.prompt) if pending.prompt is not None else None
+    return await run_cpu(_finalize, pending, generated)
+
+
+async def _stripped_async(tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+    started = False
+    held = ""
+    async for token in tokens:
+        if not started:
+            token = token.lstrip()
+            if not token:
+                continue
+            started = True
+        body = token.rstrip()
+        if body:
+            yield held + body
+            held = token[len(body):]
+        else:
+            held += token
+    if not started:
+        yield NO_ANSWER
+
+
+async def _single(text: str) -> AsyncIterator[str]:
+    yield text
+
+
+async def ask_timetable_stream_async(
+    *,
+    question: str,
+    group_id: int,
+) -> Tuple[List[Dict[str, Any]], List[str], AsyncIterator[str]]:
+    """
+    Version async de ask_timetable_stream : les fragments sont un itérateur asynchrone.
+    """
+    pending = await run_cpu(_prepare, question, group_id)
+    if pending.prompt is None:
+        return pending.contexts, pending.sources, _single(pending.answer)
+    return pending.contexts, pending.sources, _stripped_async(get_llm_gateway().stream_async(pending.prompt))
@@ -0,0 +1,84 @@
+import json
+import logging
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Tuple, Union
+
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+
+def sse_event(event: str, data: Any) -> str:
+    """
+    Un événement Server-Sent Events : `event: <nom>` puis les données en JSON sur une ligne.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def sse_response(events: Union[Iterable[Tuple[str, Any]], AsyncIterable[Tuple[str, Any]]]) -> StreamingResponse:
+    """
+    Réponse text/event-stream ; chaque (événement, données) est envoyé dès qu'il est produit.
+    Un itérateur synchrone est consommé dans le threadpool (appels LLM bloquants),
+    un itérateur asynchrone directement sur la boucle d'événements.
+    """
+
+    def _encode() -> Iterator[str]:
+        for event, data in events:
+            yield sse_event(event, data)
+
+    async def _encode_async() -> AsyncIterator[str]:
+        async for event, data in events:
+            yield sse_event(event, data)
+
+    return StreamingResponse(
+        _encode_async() if hasattr(events, "__aiter__") else _encode(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # pas de mise en tampon par nginx
+        },
+    )
+
+
+def answer_events(
+    sources: List[str],
+    contexts: List[Dict[str, Any]],
+    tokens: Iterable[str],
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Événements d'une réponse LLM en flux : `sources` (avant la génération), `token` (fragments),
+    puis `done` (réponse complète) ou `error` si la génération s'interrompt.
+    """
+    yield "sources", {"sources": sources, "contexts": contexts}
+    parts: List[str] = []
+    try:
+        for token in tokens:
+            if token:
+                parts.append(token)
+                yield "token", {"text": token}
+    except Exception:
+        logger.exception("Réponse en flux interrompue")
+        yield "error", {"message": "Une erreur interne est survenue."}
+        return
+    yield "done", {"answer": "".join(parts).strip()}
+
+
+async def answer_events_async(
+    sources: List[str],
+    contexts: List[Dict[str, Any]],
+    tokens: AsyncIterable[str],
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Version async de answer_events (fragments produits par un itérateur asynchrone).
+    """
+    yield "sources", {"sources": sources, "contexts": contexts}
+    parts: List[str] = []
+    try:
+        async for token in tokens:
+            if token:
+                parts.append(token)
+                yield "token", {"text": token}
+    except Exception:
+        logger.exception("Réponse en flux interrompue")
+        yield "error", {"message": "Une erreur interne est survenue."}
+        return
+    yield "done", {"answer": "".join(parts).strip()}
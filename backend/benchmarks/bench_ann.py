@@ -0,0 +1,92 @@
+"""
+Recall@k, latence et octets par vecteur : index exact (flat) contre HNSW / IVF
+et index compressés (fp16 / sq8 / pq).
+
+Les vecteurs viennent des chunks de docs_test/ ; `--synthetic N` ajoute N vecteurs
+synthétiques (gaussiennes autour de centres) pour simuler un gros namespace (le corpus réel ne fait que
+quelques centaines de chunks). `--random-only` n'utilise pas le modèle.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_ann --synthetic 100000 -k 5
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from app.modules.rag.infrastructure.index_factory import IndexConfig, build_index, index_nbytes
+
+
+def _unit(v: np.ndarray) -> np.ndarray:
+    return (v / (np.linalg.norm(v, axis=1, keepdims=True) + 1e-12)).astype("float32")
+
+
+def _clustered(n: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    # Mélange de gaussiennes : plus proche d'embeddings de texte qu'un bruit uniforme
+    centers = _unit(rng.standard_normal((max(1, n // 500), dim)))
+    labels = rng.integers(0, len(centers), size=n)
+    return _unit(centers[labels] + 0.6 * _unit(rng.standard_normal((n, dim))))
+
+
+def _corpus(args: argparse.Namespace, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+    if args.random_only:
+        base = _clustered(args.synthetic, args.dim, rng)
+        picks = base[rng.integers(0, len(base), size=args.queries)]
+        return base, _unit(picks + 0.3 * _unit(rng.standard_normal(picks.shape)))
+
+    from benchmarks.corpus import QUESTIONS, load_chunks
+    from app.modules.rag.infrastructure.embedding_service import get_embedder
+
+    embedder = get_embedder()
+    real = embedder.embed_texts([c["text"] for c in load_chunks()])
+    queries = embedder.embed_texts(QUESTIONS)
+    base = np.concatenate([real, _clustered(args.synthetic, real.shape[1], rng)])
+    return base, queries
+
+
+def _measure(index, queries: np.ndarray, k: int) -> tuple[np.ndarray, list[float]]:
+    latencies = []
+    ids = []
+    for q in queries:
+        t0 = time.perf_counter()
+        _, idx = index.search(q.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        ids.append(idx[0])
+    return np.stack(ids), latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--synthetic", type=int, default=50_000)
+    parser.add_argument("--random-only", action="store_true")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    base, queries = _corpus(args, rng)
+    dim = base.shape[1]
+    print(f"vecteurs={len(base)} requêtes={len(queries)} dim={dim} k={args.k}")
+
+    truth = None
+    for kind in ("flat", "hnsw", "ivf", "fp16", "sq8", "pq"):
+        t0 = time.perf_counter()
+        index = build_index(base, dim, IndexConfig(kind=kind))
+        build_s = time.perf_counter() - t0
+
+        ids, lat = _measure(index, queries, args.k)
+        if truth is None:
+            truth = ids
+        recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(ids, truth)])
+        print(
+            f"{kind:5s} build={build_s:7.2f}s recall@{args.k}={recall:.3f} "
+            f"p50={np.percentile(lat, 50):.3f}ms p95={np.percentile(lat, 95):.3f}ms "
+            f"octets/vecteur={index_nbytes(index) / len(base):.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Cache persistant des réponses : latence de QueryRagUseCase.execute avec et sans cache
+sur un flux de questions répétées (loi de Zipf sur le corpus, variantes de casse / espaces).
+
+LLM simulé (--llm-ms par génération). Mesure aussi le coût d'un accès SQLite (get / put),
+la survie du cache à un redémarrage (nouvelle instance sur le même fichier) et son
+invalidation par une ingestion.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_answer_cache --embedder hash
+    python -m benchmarks.bench_answer_cache --embedder hash --requests 2000 --llm-ms 800 --zipf 1.2
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+from app.core.config import settings
+from app.modules.rag.application.use_cases import QueryRagUseCase
+from app.modules.rag.infrastructure import embedding_service
+from app.modules.rag.infrastructure import vector_store_faiss as vs
+from app.modules.rag.infrastructure.answer_cache import AnswerCache, set_answer_cache
+from app.modules.rag.infrastructure.llm_gateway import LlmGateway
+from benchmarks.bench_hybrid import _HashQueryEmbedder
+from benchmarks.corpus import QUESTIONS, pdf_paths
+
+
+class _SlowLlm(LlmGateway):
+    model = "stub"
+
+    def __init__(self, latency_s: float) -> None:
+        self.latency_s = latency_s
+        self.calls = 0
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        time.sleep(self.latency_s)
+        return "Réponse générée."
+
+
+def _workload(n: int, zipf: float, seed: int = 0) -> List[str]:
+    rng = np.random.default_rng(seed)
+    ranks = np.arange(1, len(QUESTIONS) + 1, dtype="float64")
+    weights = ranks ** -zipf
+    picks = rng.choice(len(QUESTIONS), size=n, p=weights / weights.sum())
+    variants = (str, str.upper, lambda q: f"  {q}  ", lambda q: q.replace(" ", "  "))
+    return [variants[rng.integers(len(variants))](QUESTIONS[i]) for i in picks]
+
+
+def _run(use_case: QueryRagUseCase, questions: List[str]) -> List[float]:
+    latencies = []
+    for q in questions:
+        t0 = time.perf_counter()
+        use_case.execute(q)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embedder", choices=["model", "hash"], default="model")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--llm-ms", type=float, default=300.0)
+    parser.add_argument("--zipf", type=float, default=1.1)
+    args = parser.parse_args()
+
+    if args.embedder == "hash":
+        embedding_service.set_embedder(_HashQueryEmbedder())
+    questions = _workload(args.requests, args.zipf)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vs.STORE_DIR = os.path.join(tmp, "store")
+        paths = pdf_paths()
+        for doc_id, path in enumerate(paths[:-1], start=1):
+            vs.index_document(doc_id, path)
+        llm = _SlowLlm(args.llm_ms / 1000.0)
+        use_case = QueryRagUseCase(db=None, llm=llm)
+        print(f"embedder={args.embedder}  requêtes={args.requests}  questions distinctes={len(QUESTIONS)}  "
+              f"zipf={args.zipf}  LLM={args.llm_ms:.0f} ms")
+
+        settings.rag_semantic_cache = False  # cache exact seul (cf. bench_semantic_cache)
+        settings.rag_answer_cache = False  # get_answer_cache() => None
+        set_answer_cache(None)
+        baseline = _run(use_case, questions)
+        print(f"{'sans cache':24s} total={sum(baseline) / 1000:7.1f} s  p50={np.percentile(baseline, 50):7.1f} ms  "
+              f"appels LLM={llm.calls}")
+
+        path = os.path.join(tmp, "answers.sqlite3")
+        cache = AnswerCache(path)
+        set_answer_cache(cache)
+        llm.calls = 0
+        cached = _run(use_case, questions)
+        s = cache.stats()
+        hits = [ms for ms in cached if ms < args.llm_ms / 2]
+        print(f"{'avec cache':24s} total={sum(cached) / 1000:7.1f} s  p50={np.percentile(cached, 50):7.1f} ms  "
+              f"appels LLM={llm.calls}  hit rate={s['hit_rate']:.1%}  succès p50={np.percentile(hits, 50):.2f} ms")
+
+        # Redémarrage : le fichier SQLite est relu par une nouvelle instance
+        cache.close()
+        cache = AnswerCache(path)
+        set_answer_cache(cache)
+        llm.calls = 0
+        _run(use_case, QUESTIONS)
+        print(f"{'après redémarrage':24s} hit rate={cache.stats()['hit_rate']:.1%}  appels LLM={llm.calls}")
+
+        # Ingestion : nouvelle version d'index, réponses régénérées une fois
+        vs.index_document(len(paths), paths[-1])
+        llm.calls = 0
+        _run(use_case, QUESTIONS)
+        _run(use_case, QUESTIONS)
+        print(f"{'après ingestion (x2)':24s} appels LLM={llm.calls} (une fois par question distincte)  "
+              f"entrées={cache.stats()['entries']}")
+
+        n = 2000
+        t0 = time.perf_counter()
+        for i in range(n):
+            cache.put(f"k{i}", namespace="bench", version="1", question="q", payload={"answer": "x" * 400})
+        put_us = (time.perf_counter() - t0) / n * 1e6
+        t0 = time.perf_counter()
+        for i in range(n):
+            cache.get(f"k{i}")
+        get_us = (time.perf_counter() - t0) / n * 1e6
+        print(f"{'SQLite':24s} put={put_us:.0f} µs  get={get_us:.0f} µs")
+        cache.close()
+        set_answer_cache(None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark du découpage : tranches fixes de 900 caractères (historique) vs chunker en tokens.
+
+Mesures sur les PDFs de docs_test/ :
+- nombre de chunks, tokens moyens / max, part des tokens au-delà de la fenêtre du modèle
+  (256 tokens pour all-MiniLM-L6-v2 : jamais embeddés) ;
+- temps d'embedding de tout le corpus ;
+- hit-rate de recherche : des phrases du corpus servent de requêtes, "hit" si un des k premiers
+  chunks vient de la même page et contient au moins la moitié des mots de la phrase.
+
+--embedder hash : proxy hors ligne (sac de mots haché, tronqué à 256 tokens estimés comme le
+modèle), quand all-MiniLM-L6-v2 n'est pas disponible.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_chunker
+    python -m benchmarks.bench_chunker --embedder hash --queries 300 -k 3
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import random
+import time
+from typing import Dict, List
+
+import faiss
+import numpy as np
+
+from app.modules.rag.infrastructure.chunker import Chunker, approx_token_count, split_sentences
+from app.modules.rag.infrastructure.embedding_service import get_embedder
+from benchmarks.corpus import load_chunks, load_pages
+
+WINDOW = 256
+
+
+class _HashEmbedder:
+    """
+    Proxy hors ligne : sac de mots haché, tronqué à la fenêtre du modèle.
+    """
+
+    dim = 384
+
+    def count_tokens(self, texts):
+        return approx_token_count(texts)
+
+    def _vec(self, text: str) -> np.ndarray:
+        v = np.zeros(self.dim, dtype="float32")
+        budget = WINDOW - 2
+        for word in text.lower().split():
+            budget -= approx_token_count([word])[0]
+            if budget < 0:
+                break
+            v[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % self.dim] += 1.0
+        return v
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        emb = np.stack([self._vec(t) for t in texts])
+        return emb / (np.linalg.norm(emb, axis=1, keepdims=True) + 1e-12)
+
+
+def _token_chunks(chunker: Chunker) -> List[Dict]:
+    chunks: List[Dict] = []
+    for p in load_pages():
+        for text in chunker.split(p["text"]):
+            chunks.append({"source": p["source"], "page": p["page"], "text": text})
+    return chunks
+
+
+def _queries(n: int, seed: int = 0) -> List[Dict]:
+    candidates = [
+        {"source": p["source"], "page": p["page"], "text": s}
+        for p in load_pages()
+        for s in split_sentences(p["text"])
+        if len(s.split()) >= 8
+    ]
+    random.Random(seed).shuffle(candidates)
+    return candidates[:n]
+
+
+def _is_hit(query: Dict, chunk: Dict) -> bool:
+    if (chunk["source"], chunk["page"]) != (query["source"], query["page"]):
+        return False
+    words = query["text"].lower().split()
+    chunk_words = set(chunk["text"].lower().split())
+    return sum(w in chunk_words for w in words) >= len(words) / 2
+
+
+def _evaluate(name: str, chunks: List[Dict], embedder, queries: List[Dict], k: int) -> None:
+    texts = [c["text"] for c in chunks]
+    counts = embedder.count_tokens(texts)
+    beyond = sum(max(0, n - (WINDOW - 2)) for n in counts)
+
+    t0 = time.perf_counter()
+    emb = embedder.embed_texts(texts)
+    embed_s = time.perf_counter() - t0
+
+    index = faiss.IndexFlatIP(emb.shape[1])
+    index.add(np.ascontiguousarray(emb, dtype="float32"))
+    q_emb = embedder.embed_texts([q["text"] for q in queries])
+    _, idxs = index.search(np.ascontiguousarray(q_emb, dtype="float32"), k)
+    hits = sum(any(_is_hit(q, chunks[i]) for i in row if i >= 0) for q, row in zip(queries, idxs))
+
+    print(
+        f"{name:22s} chunks={len(chunks):5d}  tokens moy={np.mean(counts):6.1f} max={max(counts):5d}  "
+        f"> fenêtre={sum(n > WINDOW - 2 for n in counts):4d} chunks ({beyond / max(sum(counts), 1):5.1%} des tokens)  "
+        f"embedding={embed_s:6.2f}s  hit@{k}={hits / len(queries):.3f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embedder", choices=["model", "hash"], default="model")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=3)
+    parser.add_argument("--max-tokens", type=int, default=240)
+    parser.add_argument("--overlap", type=int, default=40)
+    args = parser.parse_args()
+
+    embedder = get_embedder() if args.embedder == "model" else _HashEmbedder()
+    if args.embedder == "model":
+        try:
+            embedder.embed_texts(["warm-up"])
+        except Exception as e:
+            print(f"Modèle indisponible ({type(e).__name__}) : relancer avec --embedder hash")
+            return
+
+    queries = _queries(args.queries)
+    print(f"embedder={args.embedder}  requêtes={len(queries)}  k={args.k}")
+    _evaluate("tranches 900 car.", load_chunks(900), embedder, queries, args.k)
+    chunker = Chunker(args.max_tokens, args.overlap, embedder.count_tokens)
+    _evaluate(f"tokens {args.max_tokens}/{args.overlap}", _token_chunks(chunker), embedder, queries, args.k)
+
+
+if __name__ == "__main__":
+    main()
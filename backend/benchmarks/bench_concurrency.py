@@ -0,0 +1,139 @@
+"""
+Débit de /rag/query avec des centaines de clients simultanés : route synchrone (threadpool de Starlette,
+ancien comportement) vs route async (recherche sur l'exécuteur CPU, attente du LLM sans thread).
+
+Serveur local imitant Ollama avec une latence fixe de --llm-ms par génération. Les requêtes passent par
+l'application ASGI (httpx.ASGITransport, sans réseau côté API) ; la recherche tourne sur les PDFs de
+docs_test/ (--embedder hash : proxy hors ligne). Seules les questions avec une règle applicable
+appellent le LLM : les questions du corpus sont filtrées sur ce critère.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_concurrency --embedder hash
+    python -m benchmarks.bench_concurrency --embedder hash --clients 50 200 500 --llm-ms 500
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import List
+
+import httpx
+import numpy as np
+from fastapi import Depends, FastAPI
+
+from app.core.config import settings
+from app.core.deps import get_db
+from app.core.security import get_current_user
+from app.modules.rag.api.router import router as rag_router
+from app.modules.rag.api.schemas import RagQueryIn
+from app.modules.rag.application.use_cases import QueryRagUseCase
+from app.modules.rag.infrastructure import embedding_service
+from app.modules.rag.infrastructure import vector_store_faiss as vs
+from app.modules.rag.infrastructure.llm_gateway import OllamaHttpGateway, get_llm_gateway, set_llm_gateway
+from benchmarks.bench_hybrid import _HashQueryEmbedder
+from benchmarks.corpus import QUESTIONS, pdf_paths
+
+
+class _SlowOllama(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency_s = 0.5
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(self.latency_s)
+        payload = json.dumps({"response": "Réponse.", "done": True}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 2048  # pas de connexions refusées sous la charge
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(rag_router)
+
+    @app.post("/legacy/query")
+    def legacy_query(payload: RagQueryIn, db=Depends(get_db), user=Depends(get_current_user)):
+        # Ancienne route : handler synchrone, un jeton du threadpool (40 par défaut) par requête
+        result = QueryRagUseCase(db=db, llm=get_llm_gateway()).execute(payload.question)
+        return {"answer": result.answer, "sources": result.sources}
+
+    app.dependency_overrides[get_db] = lambda: None
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1, role="ETUDIANT")
+    return app
+
+
+async def _run(app: FastAPI, path: str, questions: List[str], clients: int, per_client: int):
+    transport = httpx.ASGITransport(app=app)
+    latencies: List[float] = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://api", timeout=None) as http:
+
+        async def client(i: int) -> None:
+            for j in range(per_client):
+                q = questions[(i + j) % len(questions)]
+                t0 = time.perf_counter()
+                response = await http.post(path, json={"question": q})
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - t0) * 1000)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(client(i) for i in range(clients)))
+        elapsed = time.perf_counter() - t0
+    return len(latencies) / elapsed, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embedder", choices=["model", "hash"], default="model")
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 200, 400])
+    parser.add_argument("--per-client", type=int, default=3)
+    parser.add_argument("--llm-ms", type=float, default=2000.0)
+    args = parser.parse_args()
+    # chaque question passe par le LLM
+    settings.rag_answer_cache = settings.rag_semantic_cache = False
+
+    if args.embedder == "hash":
+        embedding_service.set_embedder(_HashQueryEmbedder())
+    _SlowOllama.latency_s = args.llm_ms / 1000.0
+    server = _Server(("127.0.0.1", 0), _SlowOllama)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    llm = OllamaHttpGateway(f"http://127.0.0.1:{server.server_address[1]}", "stub", pool_size=max(args.clients))
+    set_llm_gateway(llm)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vs.STORE_DIR = tmp
+        for doc_id, path in enumerate(pdf_paths(), start=1):
+            vs.index_document(doc_id, path)
+        use_case = QueryRagUseCase(db=None, llm=llm)
+        questions = [q for q in QUESTIONS if use_case._retrieve(q)[2] is not None]
+        print(f"embedder={args.embedder}  LLM={args.llm_ms:.0f} ms  questions avec appel LLM={len(questions)}/{len(QUESTIONS)}")
+
+        app = _app()
+        for clients in args.clients:
+            for label, path in (("sync (threadpool)", "/legacy/query"), ("async", "/rag/query")):
+                rate, latencies = asyncio.run(_run(app, path, questions, clients, args.per_client))
+                print(
+                    f"clients={clients:4d}  {label:18s} {rate:7.1f} q/s  "
+                    f"p50={np.percentile(latencies, 50):7.0f} ms  p95={np.percentile(latencies, 95):7.0f} ms"
+                )
+    llm.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Débit et latence de l'embedder selon le backend : PyTorch, ONNX Runtime, ONNX int8.
+
+- débit : chunks du corpus docs_test/ encodés par lots (phrases / s) ;
+- latence d'une question seule (p50 / p95), comme une requête /rag/query hors cache ;
+- compatibilité : cosinus entre les vecteurs du backend et ceux de PyTorch (référence des index).
+
+Nécessite le modèle (téléchargé ou en cache) et, pour ONNX, l'extra `onnx` du projet.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_embedder
+    python -m benchmarks.bench_embedder --backends torch onnx-int8 --batch 32 --repeat 50
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Dict
+
+import numpy as np
+
+from app.core.config import settings
+from app.modules.rag.infrastructure.chunker import Chunker
+from app.modules.rag.infrastructure.embedder_st import SentenceTransformerEmbedder
+from benchmarks.corpus import QUESTIONS, load_pages
+
+BACKENDS: Dict[str, Dict[str, str]] = {
+    "torch": {"backend": "torch"},
+    "onnx": {"backend": "onnx"},
+    "onnx-int8": {"backend": "onnx", "onnx_file": "onnx/model_quint8_avx2.onnx"},
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="*", choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument("--batch", type=int, default=settings.rag_ingest_batch_size)
+    parser.add_argument("--repeat", type=int, default=20, help="Passes sur les questions (latence)")
+    args = parser.parse_args()
+
+    chunker = Chunker(settings.rag_chunk_max_tokens, settings.rag_chunk_overlap_tokens)
+    texts = [c for p in load_pages() for c in chunker.split(p["text"])]
+    print(f"modèle={settings.rag_embedding_model}  chunks={len(texts)}  lot={args.batch}")
+
+    reference = None
+    for name in args.backends:
+        embedder = SentenceTransformerEmbedder(
+            settings.rag_embedding_model,
+            settings.rag_embedding_dim,
+            **BACKENDS[name],
+        )
+        t0 = time.perf_counter()
+        try:
+            embedder.embed_texts(["warm-up"])
+        except Exception as e:
+            print(f"{name:10s} indisponible ({type(e).__name__}: {str(e).splitlines()[0]})")
+            continue
+        load_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        batches = [texts[i:i + args.batch] for i in range(0, len(texts), args.batch)]
+        emb = np.concatenate([embedder.embed_texts(batch) for batch in batches])
+        throughput = len(texts) / (time.perf_counter() - t0)
+
+        latencies = []
+        for _ in range(args.repeat):
+            for q in QUESTIONS:
+                t0 = time.perf_counter()
+                embedder.embed_query(q)
+                latencies.append((time.perf_counter() - t0) * 1000)
+
+        if reference is None and name == "torch":
+            reference = emb
+        compat = ""
+        if reference is not None and name != "torch":
+            cos = np.sum(reference * emb, axis=1)
+            compat = f"  cosinus vs torch min={cos.min():.4f} moyen={cos.mean():.4f}"
+
+        print(
+            f"{name:10s} chargement={load_s:5.1f}s  débit={throughput:7.1f} phrases/s  "
+            f"requête p50={np.percentile(latencies, 50):6.2f} ms p95={np.percentile(latencies, 95):6.2f} ms{compat}"
+        )
+
+
+if __name__ == "__main__":
+    main()
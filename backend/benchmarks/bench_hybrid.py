@@ -0,0 +1,112 @@
+"""
+Recherche dense vs hybride (dense + BM25, fusion RRF) sur les PDFs de docs_test/.
+
+- Latence de retrieve_context (p50 / p95), vecteur requête déjà en cache : on mesure la recherche,
+  pas le modèle. `--copies N` indexe N fois le corpus (documents distincts) pour grossir le namespace.
+- hit@k "phrases" : des phrases du corpus servent de requêtes (cf. bench_chunker).
+- précision@k "mots-clés" : mots-clés de RagBusinessPolicy, part des k chunks qui les contiennent.
+
+--embedder hash : proxy hors ligne (sac de mots haché) quand all-MiniLM-L6-v2 n'est pas disponible ;
+déjà lexical, il sous-estime le gain de l'hybride.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_hybrid
+    python -m benchmarks.bench_hybrid --embedder hash --copies 20 -k 5
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.modules.rag.domain.policy import BusinessPolicyConfig
+from app.modules.rag.infrastructure import embedding_service
+from app.modules.rag.infrastructure import vector_store_faiss as vs
+from app.modules.rag.infrastructure.sparse_index import analyze
+from benchmarks.bench_chunker import _HashEmbedder, _is_hit, _queries
+from benchmarks.corpus import pdf_paths
+
+
+class _HashQueryEmbedder(_HashEmbedder):
+    def embed_query(self, q: str) -> np.ndarray:
+        return self.embed_texts([q])
+
+
+def _latencies(queries: List[str], k: int, *, warm: bool = True, **options) -> List[float]:
+    if warm:
+        for q in queries:
+            vs.retrieve_context(q, k=k, **options)  # vecteur requête en cache
+    latencies = []
+    for q in queries:
+        t0 = time.perf_counter()
+        vs.retrieve_context(q, k=k, **options)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return latencies
+
+
+def _sentence_hit_rate(queries: List[Dict], k: int, **options) -> float:
+    hits = 0
+    for q in queries:
+        contexts, _ = vs.retrieve_context(q["text"], k=k, **options)
+        hits += any(_is_hit(q, {"source": c["source"], "page": c["page"], "text": c["text"]}) for c in contexts)
+    return hits / len(queries)
+
+
+def _keyword_precision(keywords: List[str], k: int, **options) -> float:
+    precisions = []
+    for kw in keywords:
+        term = analyze(kw)[0]
+        contexts, _ = vs.retrieve_context(kw, k=k, **options)
+        precisions.append(sum(term in analyze(c["text"]) for c in contexts) / k)
+    return float(np.mean(precisions))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embedder", choices=["model", "hash"], default="model")
+    parser.add_argument("--copies", type=int, default=1)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.embedder == "hash":
+        embedding_service.set_embedder(_HashQueryEmbedder())
+    else:
+        try:
+            embedding_service.get_embedder().embed_texts(["warm-up"])
+        except Exception as e:
+            print(f"Modèle indisponible ({type(e).__name__}) : relancer avec --embedder hash")
+            return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vs.STORE_DIR = tmp
+        doc_id = 0
+        for _ in range(args.copies):
+            for path in pdf_paths():
+                doc_id += 1
+                vs.index_document(doc_id, path)
+        snapshot = vs._load_store("default")
+        sparse_mb = sum(seg.sparse.nbytes for seg in snapshot.segments) / 1e6
+        print(
+            f"embedder={args.embedder}  chunks={snapshot.ntotal}  segments={len(snapshot.segments)}  "
+            f"index BM25={sparse_mb:.2f} Mo  k={args.k}"
+        )
+
+        sentences = _queries(args.queries)
+        keywords = [kw for kw in BusinessPolicyConfig().rule_keywords if analyze(kw)]
+        latency_queries = [q["text"] for q in sentences] + keywords
+
+        for mode in vs.RETRIEVAL_MODES:
+            lat = _latencies(latency_queries, args.k, mode=mode, rerank=False)
+            print(
+                f"{mode:7s} p50={np.percentile(lat, 50):6.2f} ms  p95={np.percentile(lat, 95):6.2f} ms  "
+                f"hit@{args.k} phrases={_sentence_hit_rate(sentences, args.k, mode=mode, rerank=False):.3f}  "
+                f"précision@{args.k} mots-clés={_keyword_precision(keywords, args.k, mode=mode, rerank=False):.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
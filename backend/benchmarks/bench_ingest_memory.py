@@ -0,0 +1,82 @@
+"""
+Benchmark mémoire de l'ingestion en flux : pic d'allocation Python (tracemalloc) selon la taille
+de lot, pour un flux synthétique de chunks (comme un très gros PDF).
+
+L'embedder est remplacé par des vecteurs aléatoires : on mesure le pipeline, pas le modèle.
+batch = total reproduit l'ancien comportement (tout le document encodé d'un bloc).
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_ingest_memory
+    python -m benchmarks.bench_ingest_memory --chunks 50000 --batch 32 256 50000
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.modules.rag.infrastructure import embedding_service
+from app.modules.rag.infrastructure import vector_store_faiss as vs
+
+
+class _RandomEmbedder:
+    def __init__(self, dim: int) -> None:
+        self.rng = np.random.default_rng(0)
+        self.dim = dim
+
+    def embed_texts(self, texts):
+        v = self.rng.standard_normal((len(texts), self.dim)).astype("float32")
+        return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+    def embed_query(self, q):
+        return self.embed_texts([q])
+
+
+def _chunks(n: int):
+    for i in range(n):
+        text = f"Article {i} : " + "règlement pédagogique, assiduité et validation des modules. " * 14
+        yield {
+            "document_id": 1,
+            "source": "synthetic.pdf",
+            "page": i // 4 + 1,
+            "chunk_index": i,
+            "text": text,
+            "content_hash": vs._content_hash(text),
+            "namespace": "bench",
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, nargs="*", default=[16, 64, 256])
+    args = parser.parse_args()
+
+    embedding_service.set_embedder(_RandomEmbedder(vs.EMB_DIM))
+    print(f"{args.chunks} chunks de ~900 caractères, dim={vs.EMB_DIM}")
+    for batch in [*args.batch, args.chunks]:
+        with tempfile.TemporaryDirectory() as root:
+            vs.STORE_DIR = root
+            vs.NAMESPACE_CACHE.invalidate()
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            stats = vs._ingest_chunks(
+                "bench",
+                _chunks(args.chunks),
+                owned=lambda m: m.get("document_id") == 1,
+                dedupe_scope=lambda m: m.get("document_id") == 1,
+                document_id=1,
+                batch_size=batch,
+            )
+            elapsed = time.perf_counter() - t0
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        label = "tout" if batch == args.chunks else str(batch)
+        print(f"lot={label:>6s}  pic={peak / 1024 / 1024:7.1f} MB  durée={elapsed:5.2f}s  vecteurs={stats['vectors']}")
+
+
+if __name__ == "__main__":
+    main()
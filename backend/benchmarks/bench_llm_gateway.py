@@ -0,0 +1,115 @@
+"""
+Surcoût par question du gateway LLM : `ollama run` (un processus par question) vs API REST (pool httpx).
+
+Hors ligne (défaut) : serveur local imitant /api/generate (réponse immédiate, ou après --gen-ms) et faux
+exécutable `ollama` : script sh qui envoie le prompt au même serveur avec curl, comme le vrai CLI
+(un processus + une connexion neuve par question). Sans chargement de modèle ni binaire Go à démarrer,
+c'est une borne basse du coût du vrai `ollama run`.
+Concurrence : --concurrency questions en parallèle (threads), comme des requêtes /rag/query simultanées.
+
+--real : vrai serveur Ollama (OLLAMA_BASE_URL / OLLAMA_MODEL) et vrai binaire `ollama` ;
+le temps mesuré inclut alors la génération.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_llm_gateway
+    python -m benchmarks.bench_llm_gateway --questions 200 --concurrency 1 8 --gen-ms 20
+    python -m benchmarks.bench_llm_gateway --real --questions 10
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+import numpy as np
+
+from app.core.config import settings
+from app.modules.rag.infrastructure.llm_gateway import ERROR_MESSAGE, LlmGateway, OllamaGateway, OllamaHttpGateway
+from benchmarks.corpus import QUESTIONS
+
+FAKE_OLLAMA = "#!/bin/sh\ncurl -s -X POST --data-binary @- {url}/api/generate\n"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # comme le serveur Go d'Ollama (sinon ~40 ms d'ACK retardé)
+    gen_s = 0.0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(self.gen_s)
+        payload = json.dumps({"response": "Réponse simulée", "done": True}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def _run(gateway: LlmGateway, questions: List[str], concurrency: int) -> List[float]:
+    def one(q: str) -> float:
+        t0 = time.perf_counter()
+        answer = gateway.generate(q)
+        assert answer != ERROR_MESSAGE, "gateway en échec"
+        return (time.perf_counter() - t0) * 1000
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        return list(pool.map(one, questions))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="*", default=[1, 8])
+    parser.add_argument("--gen-ms", type=float, default=0.0, help="Temps de génération simulé (serveur local)")
+    parser.add_argument("--real", action="store_true")
+    args = parser.parse_args()
+
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.questions)]
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.real:
+            base_url, model = settings.ollama_base_url, settings.ollama_model
+        else:
+            _StubHandler.gen_s = args.gen_ms / 1000.0
+            server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            base_url, model = f"http://127.0.0.1:{server.server_address[1]}", "stub"
+
+            fake = os.path.join(tmp, "ollama")
+            with open(fake, "w") as f:
+                f.write(FAKE_OLLAMA.format(url=base_url))
+            os.chmod(fake, os.stat(fake).st_mode | stat.S_IEXEC)
+            os.environ["PATH"] = tmp + os.pathsep + os.environ["PATH"]
+
+        print(f"{'réel' if args.real else 'simulé'}  modèle={model}  questions={len(questions)}")
+        gateways = {
+            "cli (ollama run)": OllamaGateway(model=model),
+            "http (pool)": OllamaHttpGateway(base_url, model, pool_size=max(args.concurrency)),
+        }
+        for concurrency in args.concurrency:
+            for name, gateway in gateways.items():
+                gateway.generate("warm-up")
+                t0 = time.perf_counter()
+                lat = _run(gateway, questions, concurrency)
+                wall = time.perf_counter() - t0
+                print(
+                    f"{name:17s} concurrence={concurrency:<3d} p50={np.percentile(lat, 50):7.2f} ms  "
+                    f"p95={np.percentile(lat, 95):7.2f} ms  débit={len(questions) / wall:7.1f} q/s"
+                )
+        for gateway in gateways.values():
+            gateway.close()
+
+
+if __name__ == "__main__":
+    main()
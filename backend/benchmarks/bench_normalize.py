@@ -0,0 +1,48 @@
+"""
+Micro-benchmark de normalize_text : implémentation historique (caractère par caractère)
+vs table str.translate, sur le texte brut extrait des PDFs de docs_test/ (chemin d'ingestion)
+et sur des chunks déjà normalisés (chemin de requête : _to_context).
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_normalize
+"""
+from __future__ import annotations
+
+import timeit
+
+from pypdf import PdfReader
+
+from app.modules.rag.infrastructure.text_utils import normalize_text
+from benchmarks.corpus import load_chunks, pdf_paths
+
+
+def _legacy(text: str) -> str:
+    if not text:
+        return ""
+    text = text.encode("utf-8", errors="ignore").decode("utf-8", errors="ignore")
+    text = "".join(c for c in text if c.isprintable() or c in "\n\t")
+    text = " ".join(text.split())
+    return text.strip()
+
+
+def _bench(name: str, texts: list[str], number: int) -> None:
+    assert [normalize_text(t) for t in texts] == [_legacy(t) for t in texts]
+    chars = sum(len(t) for t in texts)
+    old = min(timeit.repeat(lambda: [_legacy(t) for t in texts], number=number, repeat=5)) / number
+    new = min(timeit.repeat(lambda: [normalize_text(t) for t in texts], number=number, repeat=5)) / number
+    print(
+        f"{name:28s} {len(texts):4d} textes {chars / 1000:7.0f} k car.  "
+        f"ancien={old * 1000:7.2f} ms  nouveau={new * 1000:6.2f} ms  x{old / new:5.1f}"
+    )
+
+
+def main() -> None:
+    pages = [page.extract_text() or "" for path in pdf_paths() for page in PdfReader(path).pages]
+    chunks = [c["text"] for c in load_chunks()]
+    _bench("pages brutes (ingestion)", pages, 20)
+    _bench("chunks normalisés (requête)", chunks, 20)
+    _bench("top-5 chunks (une requête)", chunks[:5], 2000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark d'extraction PDF : séquentiel vs pool de processus, selon le nombre de workers.
+
+Le pool est démarré (et chauffé) avant la mesure, comme dans un serveur qui a déjà indexé.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_pdf_extract
+    python -m benchmarks.bench_pdf_extract --workers 1 2 4 8 --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+from app.modules.rag.infrastructure import pdf_reader
+from benchmarks.corpus import pdf_paths
+
+
+def _time(path: str, workers: int, repeat: int) -> tuple[float, list]:
+    best, out = float("inf"), []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = list(pdf_reader.iter_page_texts(path, workers=workers))
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> None:
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="*", default=sorted({1, 2, 4, cores}))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Toujours paralléliser dès 2 pages pour la mesure
+    pdf_reader.settings.rag_pdf_parallel_min_pages = 2
+
+    print(f"cœurs disponibles : {cores}")
+    totals = {w: 0.0 for w in args.workers}
+    for path in pdf_paths():
+        n_pages = pdf_reader.page_count(path)
+        baseline, expected = _time(path, 1, args.repeat)
+        totals[1] = totals.get(1, 0.0) + baseline
+        line = [f"{os.path.basename(path)[:40]:40s} {n_pages:4d} p  1w={baseline * 1000:7.0f} ms"]
+        for w in args.workers:
+            if w == 1:
+                continue
+            _time(path, w, 1)  # démarrage du pool hors mesure
+            elapsed, out = _time(path, w, args.repeat)
+            assert out == expected, "sortie différente de l'extraction séquentielle"
+            totals[w] += elapsed
+            line.append(f"{w}w={elapsed * 1000:7.0f} ms (x{baseline / elapsed:4.2f})")
+        print("  ".join(line))
+
+    base = totals[1]
+    print("total : " + "  ".join(f"{w}w={t:.2f}s (x{base / t:4.2f})" for w, t in sorted(totals.items()) if t))
+
+
+if __name__ == "__main__":
+    main()
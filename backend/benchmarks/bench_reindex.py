@@ -0,0 +1,92 @@
+"""
+Reconstruction complète (cli reindex) : débit selon le nombre de processus d'encodage.
+
+Référence : boucle index_document sur les mêmes PDFs (un seul processus, comme des uploads successifs).
+Puis reindex_all avec --workers N : staging, écriture, compaction et bascule comprises.
+`--copies N` multiplie les sources (documents distincts, mêmes PDFs).
+
+--embedder hash : proxy hors ligne ; `--cpu-ms-per-chunk` y ajoute un coût CPU simulé (boucle active,
+pas un sleep) pour approcher un modèle sur CPU. Le gain attendu est borné par le nombre de cœurs.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_reindex
+    python -m benchmarks.bench_reindex --embedder hash --cpu-ms-per-chunk 4 --copies 4 --workers 1 2 4
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from typing import List
+
+from app.modules.rag.infrastructure import embedding_service
+from app.modules.rag.infrastructure import vector_store_faiss as vs
+from app.modules.rag.infrastructure.bulk_reindex import ReindexSource, reindex_all
+from benchmarks.bench_hybrid import _HashQueryEmbedder
+from benchmarks.corpus import pdf_paths
+
+
+class _CpuHashEmbedder(_HashQueryEmbedder):
+    def __init__(self, cpu_ms_per_chunk: float) -> None:
+        self.cpu_ms_per_chunk = cpu_ms_per_chunk
+
+    def embed_texts(self, texts):
+        end = time.process_time() + self.cpu_ms_per_chunk * len(texts) / 1000.0
+        while time.process_time() < end:
+            pass
+        return super().embed_texts(texts)
+
+
+def _sources(copies: int) -> List[ReindexSource]:
+    paths = pdf_paths()
+    return [
+        ReindexSource(f"document:{i}", "default", paths[i % len(paths)], document_id=i)
+        for i in range(copies * len(paths))
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embedder", choices=["model", "hash"], default="model")
+    parser.add_argument("--cpu-ms-per-chunk", type=float, default=0.0, help="Coût simulé (--embedder hash)")
+    parser.add_argument("--copies", type=int, default=2)
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, 2, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    embedder = None
+    if args.embedder == "hash":
+        embedder = _CpuHashEmbedder(args.cpu_ms_per_chunk)
+        embedding_service.set_embedder(embedder)
+    else:
+        try:
+            embedding_service.get_embedder().embed_texts(["warm-up"])
+        except Exception as e:
+            print(f"Modèle indisponible ({type(e).__name__}) : relancer avec --embedder hash")
+            return
+
+    sources = _sources(args.copies)
+    print(f"embedder={args.embedder}  sources={len(sources)}  cœurs={os.cpu_count()}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vs.STORE_DIR = tmp
+        t0 = time.perf_counter()
+        for s in sources:
+            vs.index_document(s.document_id, s.file_path)
+        base_s = time.perf_counter() - t0
+        chunks = vs._load_store("default").ntotal
+        print(f"{'index_document':16s} {base_s:6.1f}s  {len(sources) / base_s:6.2f} sources/s  {chunks / base_s:7.1f} chunks/s")
+
+        for workers in args.workers:
+            t0 = time.perf_counter()
+            r = reindex_all(lambda: sources, workers=workers, restart=True, embedder=embedder)
+            elapsed = time.perf_counter() - t0
+            assert r["swapped"] and r["namespaces"]["default"] == chunks
+            print(
+                f"reindex w={workers:<3d}     {elapsed:6.1f}s  {len(sources) / elapsed:6.2f} sources/s  "
+                f"{chunks / elapsed:7.1f} chunks/s  x{base_s / elapsed:.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
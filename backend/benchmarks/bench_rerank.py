@@ -0,0 +1,118 @@
+"""
+Reranking cross-encoder : qualité et latence selon le budget par requête.
+
+Pour chaque budget : latence de retrieve_context(rerank=True) à froid (cache de scores vide)
+puis à chaud (mêmes questions), part des candidats effectivement notés dans le budget,
+hit@k "phrases" et précision@k "mots-clés" (cf. bench_hybrid). Référence : rerank=False.
+
+--reranker proxy : quand le cross-encoder n'est pas disponible (hors ligne), score = part des termes
+de la question présents dans le chunk, avec un coût simulé de --pair-ms par paire (ordre de grandeur
+d'un MiniLM-L12 sur CPU) : mesure le mécanisme de budget et de cache, pas la qualité du modèle.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_rerank
+    python -m benchmarks.bench_rerank --embedder hash --reranker proxy --budget-ms 25 50 150
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from typing import Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.modules.rag.domain.policy import BusinessPolicyConfig
+from app.modules.rag.infrastructure import embedding_service
+from app.modules.rag.infrastructure import reranker as rr
+from app.modules.rag.infrastructure import vector_store_faiss as vs
+from app.modules.rag.infrastructure.sparse_index import analyze
+from benchmarks.bench_chunker import _queries
+from benchmarks.bench_hybrid import _HashQueryEmbedder, _keyword_precision, _latencies, _sentence_hit_rate
+from benchmarks.corpus import pdf_paths
+
+
+class _ProxyReranker(rr.CrossEncoderReranker):
+    def __init__(self, pair_ms: float, **kwargs) -> None:
+        # Coût d'une paire connu d'avance (comme après le warm-up du vrai modèle)
+        super().__init__("proxy", initial_pair_ms=pair_ms, **kwargs)
+        self._model = True
+        self.pair_ms = pair_ms
+
+    def score_pairs(self, query: str, texts: Sequence[str]) -> np.ndarray:
+        time.sleep(self.pair_ms * len(texts) / 1000.0)
+        terms = set(analyze(query))
+        return np.array(
+            [8.0 * len(terms & set(analyze(t))) / max(len(terms), 1) - 4.0 for t in texts],
+            dtype="float32",
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embedder", choices=["model", "hash"], default="model")
+    parser.add_argument("--reranker", choices=["model", "proxy"], default="model")
+    parser.add_argument("--pair-ms", type=float, default=3.0)
+    parser.add_argument("--budget-ms", type=float, nargs="*", default=[25.0, 50.0, 150.0])
+    parser.add_argument("--candidates", type=int, default=settings.rag_rerank_candidates)
+    parser.add_argument("--mode", choices=list(vs.RETRIEVAL_MODES), default=settings.rag_retrieval_mode)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.embedder == "hash":
+        embedding_service.set_embedder(_HashQueryEmbedder())
+    if args.reranker == "model" and not rr.get_reranker().model:
+        print("Cross-encoder indisponible : relancer avec --reranker proxy")
+        return
+    settings.rag_rerank_candidates = args.candidates
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vs.STORE_DIR = tmp
+        for doc_id, path in enumerate(pdf_paths(), start=1):
+            vs.index_document(doc_id, path)
+
+        sentences = _queries(args.queries)
+        keywords = [kw for kw in BusinessPolicyConfig().rule_keywords if analyze(kw)]
+        questions = [q["text"] for q in sentences] + keywords
+        print(
+            f"embedder={args.embedder}  reranker={args.reranker}  mode={args.mode}  "
+            f"candidats={args.candidates}  k={args.k}  requêtes={len(questions)}"
+        )
+
+        base = dict(mode=args.mode, rerank=False)
+        lat = _latencies(questions, args.k, **base)
+        print(
+            f"{'sans reranking':18s} p50={np.percentile(lat, 50):7.2f} ms  p95={np.percentile(lat, 95):7.2f} ms  "
+            f"{'':27s}hit@{args.k}={_sentence_hit_rate(sentences, args.k, **base):.3f}  "
+            f"précision@{args.k}={_keyword_precision(keywords, args.k, **base):.3f}"
+        )
+
+        for budget in args.budget_ms:
+            settings.rag_rerank_budget_ms = budget
+            if args.reranker == "proxy":
+                reranker = _ProxyReranker(args.pair_ms, batch_size=settings.rag_rerank_batch_size)
+            else:
+                reranker = rr.get_reranker()
+                reranker.cache.clear()
+            rr.set_reranker(reranker)
+
+            options = dict(mode=args.mode, rerank=True)
+            cold = _latencies(questions, args.k, warm=False, **options)
+            # Paires notées dans le budget = entrées du cache de scores
+            scored = reranker.cache.stats()["size"] / (len(questions) * args.candidates)
+            warm = _latencies(questions, args.k, warm=False, **options)
+            reranker.cache.clear()
+            print(
+                f"budget {budget:5.0f} ms      p50={np.percentile(cold, 50):7.2f} ms  "
+                f"p95={np.percentile(cold, 95):7.2f} ms  notés={scored:5.1%}  "
+                f"cache p95={np.percentile(warm, 95):6.2f} ms  "
+                f"hit@{args.k}={_sentence_hit_rate(sentences, args.k, **options):.3f}  "
+                f"précision@{args.k}={_keyword_precision(keywords, args.k, **options):.3f}"
+            )
+        rr.set_reranker(None)
+
+
+if __name__ == "__main__":
+    main()
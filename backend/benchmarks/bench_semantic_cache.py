@@ -0,0 +1,148 @@
+"""
+Évaluation du cache sémantique : taux de reprise et précision selon le seuil de cosinus
+et la vérification de contexte (aucune, règle retrouvée, règle + sujets et entités de la question = production).
+
+Jeu étiqueté : PARAPHRASE_GROUPS (benchmarks/corpus.py), reformulations d'une même intention
+plus des quasi-doublons lexicaux d'intention différente ("justifier une absence" / "justifier un retard").
+Protocole en ligne, comme en production : les questions arrivent groupe par groupe en tourniquet ;
+une question reprise compte juste si la réponse en cache vient de son groupe, une question non
+reprise est ajoutée au cache. Seules les questions pour lesquelles une règle est trouvée
+(donc un appel au LLM) sont comptées.
+
+- reprise    : questions servies par le cache / questions comptées ;
+- précision  : reprises justes / reprises ;
+- rappel     : reprises justes / questions dont le groupe était déjà en cache.
+
+--embedder hash : proxy hors ligne (sac de mots haché) ; il ne rapproche que des reformulations
+qui partagent des mots, à relancer avec le modèle pour fixer RAG_SEMANTIC_CACHE_THRESHOLD.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_semantic_cache --embedder hash
+    python -m benchmarks.bench_semantic_cache --thresholds 0.8 0.85 0.9 0.95 --show-errors
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+from itertools import zip_longest
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from app.modules.rag.application.use_cases import QueryRagUseCase
+from app.modules.rag.infrastructure import embedding_service
+from app.modules.rag.infrastructure import vector_store_faiss as vs
+from app.modules.rag.infrastructure.embedding_service import embed_query_cached
+from app.modules.rag.infrastructure.semantic_cache import SemanticAnswerCache, signature
+from benchmarks.bench_hybrid import _HashQueryEmbedder
+from benchmarks.corpus import PARAPHRASE_GROUPS, pdf_paths
+
+
+def _stream() -> List[Tuple[str, str]]:
+    """
+    (groupe, question) en tourniquet : la première question de chaque groupe arrive d'abord.
+    """
+    rows = zip_longest(*[[(label, q) for q in qs] for label, qs in PARAPHRASE_GROUPS.items()])
+    return [item for row in rows for item in row if item is not None]
+
+
+CHECKS = ("cosinus seul", "+ règle", "+ règle + sujets + entités")
+
+_Item = Tuple[str, str, np.ndarray, Dict[str, str]]
+
+
+def _evaluate(items: List[_Item], path: str, threshold: float, check: str) -> Dict[str, Any]:
+    cache = SemanticAnswerCache(path, threshold=threshold, ttl_s=0)
+    seen = set()
+    errors: List[str] = []
+    hits = correct = repeats = 0
+    for label, question, vector, signatures in items:
+        sig = signatures[check]
+        repeats += label in seen
+        hit = cache.lookup(namespace="eval", model="eval", version="1", vector=vector, signature=sig)
+        if hit is not None:
+            hits += 1
+            correct += hit.answer == label
+            if hit.answer != label:
+                errors.append(f"{question!r} -> {hit.question!r} (cos={hit.similarity:.3f})")
+        else:
+            cache.put(namespace="eval", model="eval", version="1", question=question, vector=vector, signature=sig, answer=label)
+        seen.add(label)
+    cache.close()
+    return {
+        "reprise": hits / len(items),
+        "précision": (correct / hits) if hits else 1.0,
+        "rappel": (correct / repeats) if repeats else 0.0,
+        "erreurs": errors,
+    }
+
+
+def _similarities(items: List[_Item]) -> Tuple[List[float], List[float]]:
+    same, other = [], []
+    for i, (li, _, vi, _) in enumerate(items):
+        for lj, _, vj, _ in items[i + 1:]:
+            (same if li == lj else other).append(float(vi.reshape(-1) @ vj.reshape(-1)))
+    return same, other
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embedder", choices=["model", "hash"], default="model")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.6, 0.7, 0.8, 0.85, 0.9, 0.95])
+    parser.add_argument("--show-errors", action="store_true", help="Affiche les reprises fausses")
+    args = parser.parse_args()
+
+    if args.embedder == "hash":
+        embedding_service.set_embedder(_HashQueryEmbedder())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vs.STORE_DIR = os.path.join(tmp, "store")
+        for doc_id, path in enumerate(pdf_paths(), start=1):
+            vs.index_document(doc_id, path)
+        use_case = QueryRagUseCase(db=None, llm=None)
+
+        items = []
+        skipped = 0
+        for label, question in _stream():
+            _contexts, _sources, rule = use_case._retrieve(question)
+            if rule is None:
+                skipped += 1
+                continue
+            signatures = {
+                "cosinus seul": "",
+                "+ règle": signature([rule]),
+                "+ règle + sujets + entités": QueryRagUseCase._signature(question, rule),
+            }
+            items.append((label, question, embed_query_cached(question), signatures))
+
+        same, other = _similarities(items)
+        print(f"embedder={args.embedder}  questions={len(items)} (sans règle, pas d'appel LLM : {skipped})  "
+              f"groupes={len(PARAPHRASE_GROUPS)}")
+        print(f"cosinus même intention   : p10={np.percentile(same, 10):.3f}  médiane={np.median(same):.3f}")
+        print(f"cosinus intentions autres: médiane={np.median(other):.3f}  p99={np.percentile(other, 99):.3f}  "
+              f"max={max(other):.3f}")
+        rule_pairs = [
+            (a[0] == b[0], a[3]["+ règle"] == b[3]["+ règle"])
+            for i, a in enumerate(items) for b in items[i + 1:]
+        ]
+        same_rule = [r for s, r in rule_pairs if s]
+        print(f"même règle retrouvée     : même intention {np.mean(same_rule):.1%}  "
+              f"intentions autres {np.mean([r for s, r in rule_pairs if not s]):.1%}")
+
+        print(f"{'seuil':>6s}  {'vérification':26s} {'reprise':>8s} {'précision':>10s} {'rappel':>8s} {'erreurs':>8s}")
+        for threshold in args.thresholds:
+            for i, check in enumerate(CHECKS):
+                path = os.path.join(tmp, f"eval-{threshold}-{i}.sqlite3")
+                r = _evaluate(items, path, threshold, check)
+                print(
+                    f"{threshold:6.2f}  {check:26s} "
+                    f"{r['reprise']:8.1%} {r['précision']:10.1%} {r['rappel']:8.1%} {len(r['erreurs']):8d}"
+                )
+                if args.show_errors:
+                    for error in r["erreurs"]:
+                        print(f"        faux : {error}")
+
+
+if __name__ == "__main__":
+    main()
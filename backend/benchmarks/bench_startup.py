@@ -0,0 +1,55 @@
+"""
+Benchmark de démarrage : temps d'import et RSS du module RAG, puis coût du premier encodage.
+
+Chaque mesure tourne dans un sous-process neuf (comme un worker uvicorn).
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_startup
+"""
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+
+_PROBE = r"""
+import json, resource, time
+t0 = time.perf_counter()
+import app.modules.rag.api.router  # ce que fait app.main au démarrage
+t_import = time.perf_counter() - t0
+rss_import = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+t_embed = None
+if {embed}:
+    from app.modules.rag.infrastructure.embedding_service import get_embedder
+    t1 = time.perf_counter()
+    get_embedder().embed_query("règles d'absence")
+    t_embed = time.perf_counter() - t1
+
+print(json.dumps({{
+    "import_s": round(t_import, 3),
+    "rss_after_import_mb": round(rss_import / 1024, 1),
+    "first_embed_s": None if t_embed is None else round(t_embed, 3),
+    "rss_peak_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+}}))
+"""
+
+
+def _run(embed: bool) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(embed=embed)],
+        capture_output=True,
+        text=True,
+    )
+    if out.returncode != 0:
+        return {"error": out.stderr.strip().splitlines()[-1]}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    print("Démarrage worker (import seul) :", _run(embed=False))
+    print("Démarrage + premier encodage   :", _run(embed=True))
+
+
+if __name__ == "__main__":
+    main()
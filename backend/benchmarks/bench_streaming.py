@@ -0,0 +1,116 @@
+"""
+Latence perçue de /rag/query : réponse complète (execute) vs flux SSE (execute_stream + answer_events).
+
+Serveur local imitant Ollama : --tokens fragments, un toutes les --token-ms (génération CPU simulée).
+Mesures côté serveur, par question : temps jusqu'à l'événement `sources`, jusqu'au premier `token`
+et jusqu'à `done`, comparés au temps de la réponse bloquante (= son premier octet).
+La recherche tourne sur les PDFs de docs_test/ (--embedder hash : proxy hors ligne).
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_streaming --embedder hash
+    python -m benchmarks.bench_streaming --embedder hash --tokens 200 --token-ms 40
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+import numpy as np
+
+from app.core.config import settings
+from app.modules.rag.application.use_cases import QueryRagUseCase
+from app.modules.rag.infrastructure import embedding_service
+from app.modules.rag.infrastructure import vector_store_faiss as vs
+from app.modules.rag.infrastructure.llm_gateway import OllamaHttpGateway
+from app.shared.sse import answer_events, sse_event
+from benchmarks.bench_hybrid import _HashQueryEmbedder
+from benchmarks.corpus import QUESTIONS, pdf_paths
+
+
+class _StreamingStub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    tokens = 50
+    token_s = 0.02
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        parts = [" mot"] * self.tokens
+        if not body.get("stream"):
+            time.sleep(self.token_s * self.tokens)
+            payload = json.dumps({"response": "".join(parts), "done": True}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        self.send_response(200)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for part in [{"response": p, "done": False} for p in parts] + [{"done": True}]:
+            time.sleep(self.token_s if not part.get("done") else 0)
+            line = (json.dumps(part) + "\n").encode("utf-8")
+            self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, *args):
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embedder", choices=["model", "hash"], default="model")
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--token-ms", type=float, default=25.0)
+    args = parser.parse_args()
+    # chaque question passe par le LLM
+    settings.rag_answer_cache = settings.rag_semantic_cache = False
+
+    if args.embedder == "hash":
+        embedding_service.set_embedder(_HashQueryEmbedder())
+    _StreamingStub.tokens, _StreamingStub.token_s = args.tokens, args.token_ms / 1000.0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StreamingStub)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    llm = OllamaHttpGateway(f"http://127.0.0.1:{server.server_address[1]}", "stub")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vs.STORE_DIR = tmp
+        for doc_id, path in enumerate(pdf_paths(), start=1):
+            vs.index_document(doc_id, path)
+        use_case = QueryRagUseCase(db=None, llm=llm)
+        print(f"embedder={args.embedder}  fragments={args.tokens}  {args.token_ms:.0f} ms/fragment")
+
+        blocking: List[float] = []
+        marks: Dict[str, List[float]] = {"sources": [], "token": [], "done": []}
+        generated = 0
+        for q in QUESTIONS:
+            t0 = time.perf_counter()
+            answer = use_case.execute(q)
+            blocking.append((time.perf_counter() - t0) * 1000)
+
+            t0 = time.perf_counter()
+            result = use_case.execute_stream(q)
+            seen = set()
+            for event, data in answer_events(result.sources, [], result.tokens):
+                sse_event(event, data)
+                if event not in seen and event in marks:
+                    seen.add(event)
+                    marks[event].append((time.perf_counter() - t0) * 1000)
+            generated += answer.answer != "Je ne sais pas."
+
+        print(f"questions={len(QUESTIONS)}  avec appel LLM={generated}")
+        print(f"{'bloquant (1er octet = fin)':28s} p50={np.percentile(blocking, 50):8.1f} ms")
+        for event, values in marks.items():
+            if values:
+                print(f"{'flux : ' + event:28s} p50={np.percentile(values, 50):8.1f} ms  ({len(values)} questions)")
+    llm.close()
+
+
+if __name__ == "__main__":
+    main()
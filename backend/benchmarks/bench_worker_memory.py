@@ -0,0 +1,90 @@
+"""
+Mémoire par worker : index FAISS lus en copie privée vs mappés (mmap).
+
+Construit un namespace synthétique, puis lance N process "workers" qui chargent
+le namespace et exécutent des recherches (toutes les pages sont touchées).
+Rapport Linux (/proc) par worker :
+    RssAnon : mémoire privée (dupliquée dans chaque worker)
+    RssFile : pages du page cache (partagées entre workers)
+    Pss     : part proportionnelle (mémoire réellement attribuable au worker)
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_worker_memory --vectors 200000 --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import tempfile
+
+import numpy as np
+
+from app.modules.rag.infrastructure.segment_store import SegmentStore
+
+
+def _proc_kb(path: str, key: str) -> int:
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith(key + ":"):
+                    return int(line.split()[1])
+    except FileNotFoundError:
+        pass
+    return 0
+
+
+def _worker(root: str, dim: int, mmap: bool, barrier, out) -> None:
+    snapshot = SegmentStore(root, dim, mmap=mmap).load()
+    q = np.random.default_rng(1).standard_normal((1, dim)).astype("float32")
+    for _ in range(5):
+        snapshot.search(q, 5)
+
+    barrier.wait()  # tous les workers sont chargés en même temps
+    out.put({
+        "RssAnon": _proc_kb("/proc/self/status", "RssAnon") // 1024,
+        "RssFile": _proc_kb("/proc/self/status", "RssFile") // 1024,
+        "Pss": _proc_kb("/proc/self/smaps_rollup", "Pss") // 1024,
+    })
+    barrier.wait()
+
+
+def _run(root: str, dim: int, workers: int, mmap: bool) -> list[dict]:
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    out = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(root, dim, mmap, barrier, out)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    results = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vectors", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((args.vectors, args.dim)).astype("float32")
+        meta = [{"text": f"chunk {i}", "source": "synthetic.pdf", "page": 1} for i in range(args.vectors)]
+        SegmentStore(root, args.dim).commit(vectors=vectors, metadatas=meta)
+        del vectors, meta
+
+        size_mb = args.vectors * args.dim * 4 / 1024 / 1024
+        print(f"namespace : {args.vectors} vecteurs ({size_mb:.0f} MB float32), {args.workers} workers")
+        for mmap in (False, True):
+            results = _run(root, args.dim, args.workers, mmap)
+            label = "mmap   " if mmap else "privé  "
+            for i, r in enumerate(results):
+                print(f"{label} worker {i}: RssAnon={r['RssAnon']} MB RssFile={r['RssFile']} MB Pss={r['Pss']} MB")
+            total_pss = sum(r["Pss"] for r in results)
+            print(f"{label} total Pss (hôte) = {total_pss} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Corpus commun aux benchmarks : les PDFs de docs_test/ (racine du dépôt).
+"""
+from __future__ import annotations
+
+import os
+from typing import Dict, List
+
+from app.modules.rag.infrastructure.pdf_reader import extract_pages
+
+DOCS_TEST = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", "docs_test"))
+
+QUESTIONS = [
+    "Quelles sont les règles d'absence ?",
+    "Combien d'absences autorisées par module ?",
+    "Que se passe-t-il en cas de retard ?",
+    "Comment est calculée la validation d'un module ?",
+    "Quelles sont les conditions de rattrapage ?",
+    "Quel est l'emploi du temps du lundi ?",
+    "Quand a lieu le cours d'anglais ?",
+    "Quelle salle pour la séance de 08h30 ?",
+    "L'assiduité est-elle obligatoire ?",
+    "Comment justifier une absence ?",
+]
+
+# Reformulations étiquetées (même intention = même réponse attendue), pour évaluer le cache sémantique.
+# Les groupes "retards autorisés" / "justifier un retard" sont des quasi-doublons lexicaux d'autres groupes
+# mais demandent autre chose : une reprise entre eux est une erreur.
+PARAPHRASE_GROUPS: Dict[str, List[str]] = {
+    "absences autorisées": [
+        "Combien d'absences autorisées par module ?",
+        "Nombre maximum d'absences autorisées ?",
+        "Combien d'absences sont tolérées dans un module ?",
+        "Quel est le nombre d'absences autorisé par module ?",
+        "combien d'absences a-t-on le droit de faire",
+    ],
+    "justifier une absence": [
+        "Comment justifier une absence ?",
+        "Comment faire pour justifier mon absence ?",
+        "Quelle démarche pour justifier une absence ?",
+        "Justification d'une absence : comment faire ?",
+    ],
+    "retard": [
+        "Que se passe-t-il en cas de retard ?",
+        "Quelles sont les conséquences d'un retard ?",
+        "Que risque un étudiant en retard ?",
+        "Arriver en retard en cours : que se passe-t-il ?",
+    ],
+    "retards autorisés": [
+        "Combien de retards autorisés par module ?",
+        "Nombre maximum de retards autorisés ?",
+    ],
+    "justifier un retard": [
+        "Comment justifier un retard ?",
+        "Comment faire pour justifier mon retard ?",
+    ],
+    "validation": [
+        "Comment est calculée la validation d'un module ?",
+        "Comment valider un module ?",
+        "Quelles sont les conditions de validation d'un module ?",
+        "Calcul de la validation d'un module",
+    ],
+    "rattrapage": [
+        "Quelles sont les conditions de rattrapage ?",
+        "Qui peut passer le rattrapage ?",
+        "Conditions pour accéder au rattrapage ?",
+        "Comment fonctionne la session de rattrapage ?",
+    ],
+    "assiduité": [
+        "L'assiduité est-elle obligatoire ?",
+        "La présence en cours est-elle obligatoire ?",
+        "Est-on obligé d'assister aux cours ?",
+        "Assiduité obligatoire ou non ?",
+    ],
+}
+
+
+def pdf_paths() -> List[str]:
+    return sorted(
+        os.path.join(DOCS_TEST, name)
+        for name in os.listdir(DOCS_TEST)
+        if name.lower().endswith(".pdf")
+    )
+
+
+def load_pages() -> List[Dict]:
+    pages: List[Dict] = []
+    for path in pdf_paths():
+        for p in extract_pages(path):
+            pages.append({"source": path, **p})
+    return pages
+
+
+def load_chunks(size: int = 900) -> List[Dict]:
+    """
+    Découpage historique (tranches fixes de `size` caractères).
+    """
+    chunks: List[Dict] = []
+    for p in load_pages():
+        text = p["text"]
+        for i in range(0, len(text), size):
+            chunk = text[i:i + size].strip()
+            if chunk:
+                chunks.append({"source": p["source"], "page": p["page"], "text": chunk})
+    return chunks
@@ -0,0 +1,60 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+from app.modules.rag.infrastructure import embedding_service
+
+
+class FakeEmbedder:
+    """
+    Embedder déterministe (sac de mots haché), sans modèle à télécharger.
+    """
+
+    def __init__(self, emb_dim: int = 384) -> None:
+        self.emb_dim = emb_dim
+        self.calls = 0
+
+    def _vec(self, text: str) -> np.ndarray:
+        v = np.zeros(self.emb_dim, dtype="float32")
+        for word in text.lower().split():
+            h = int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16)
+            v[h % self.emb_dim] += 1.0
+        return v
+
+    def embed_texts(self, texts: list[str]) -> np.ndarray:
+        self.calls += 1
+        emb = np.stack([self._vec(t) for t in texts]) if texts else np.zeros((0, self.emb_dim), "float32")
+        norms = np.linalg.norm(emb, axis=1, keepdims=True) + 1e-12
+        return (emb / norms).astype("float32")
+
+    def embed_query(self, q: str) -> np.ndarray:
+        return self.embed_texts([q])
+
+
+@pytest.fixture
+def fake_embedder():
+    embedder = FakeEmbedder()
+    embedding_service.set_embedder(embedder)
+    yield embedder
+    embedding_service.set_embedder(None)
+
+
+@pytest.fixture
+def store_dir(tmp_path, monkeypatch):
+    from app.modules.rag.infrastructure import vector_store_faiss
+    from app.modules.rag.infrastructure.answer_cache import AnswerCache, set_answer_cache
+    from app.modules.rag.infrastructure.semantic_cache import SemanticAnswerCache, set_semantic_cache
+
+    monkeypatch.setattr(vector_store_faiss, "STORE_DIR", str(tmp_path))
+    vector_store_faiss.NAMESPACE_CACHE.invalidate()
+    cache = AnswerCache(str(tmp_path / "answer_cache.sqlite3"))
+    semantic = SemanticAnswerCache(cache.path)
+    set_answer_cache(cache)
+    set_semantic_cache(semantic)
+    yield tmp_path
+    set_answer_cache(None)
+    set_semantic_cache(None)
+    cache.close()
+    semantic.close()
+    vector_store_faiss.NAMESPACE_CACHE.invalidate()
@@ -0,0 +1,120 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from app.modules.rag.infrastructure import vector_store_faiss as vs
+from app.modules.rag.infrastructure.answer_cache import (
+    AnswerCache,
+    AnswerSlot,
+    get_answer_cache,
+    lookup_answer,
+    remember_answer,
+    set_answer_cache,
+)
+from app.modules.rag.infrastructure.llm_gateway import ERROR_MESSAGE, LlmGateway, set_llm_gateway
+from app.modules.timetable.rag.service import ask_timetable
+
+DOCS_TEST = Path(__file__).resolve().parents[2] / "docs_test"
+REGLEMENT_PDF = DOCS_TEST / "reglement_pedagogique.pdf"
+TIMETABLE_PDF = DOCS_TEST / "EMPLOIS DU TEMPS S1-2025-2026 5IIR 10.pdf"
+
+
+class CountingGateway(LlmGateway):
+    model = "counting"
+
+    def __init__(self, answer="Lundi 08h30"):
+        self.answer = answer
+        self.calls = 0
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        return self.answer
+
+
+@pytest.fixture
+def gateway():
+    gateway = CountingGateway()
+    set_llm_gateway(gateway)
+    yield gateway
+    set_llm_gateway(None)
+
+
+def test_timetable_answers_are_cached_across_restarts_until_ingest(store_dir, fake_embedder, gateway):
+    vs.index_pdf_for_namespace(file_path=str(TIMETABLE_PDF), namespace="timetable_group_10")
+
+    assert ask_timetable(question="Quel cours le lundi ?", group_id=10) == "Lundi 08h30"
+    # Même question normalisée : pas de nouvel appel au modèle
+    assert ask_timetable(question="  quel COURS le lundi ? ", group_id=10) == "Lundi 08h30"
+    assert gateway.calls == 1
+
+    # "Redémarrage" : nouveau cache sur le même fichier
+    path = get_answer_cache().path
+    get_answer_cache().close()
+    set_answer_cache(AnswerCache(path))
+    assert ask_timetable(question="Quel cours le lundi ?", group_id=10) == "Lundi 08h30"
+    assert gateway.calls == 1
+    assert get_answer_cache().stats()["hit_rate"] == 1.0
+
+    # Autre groupe, autre namespace : pas de réponse partagée
+    ask_timetable(question="Quel cours le lundi ?", group_id=11)
+
+    # Ingestion dans le namespace : nouvelle version d'index => régénération, anciennes entrées purgées
+    vs.index_pdf_for_namespace(file_path=str(REGLEMENT_PDF), namespace="timetable_group_10")
+    gateway.answer = "Mardi 10h"
+    assert ask_timetable(question="Quel cours le lundi ?", group_id=10) == "Mardi 10h"
+    assert gateway.calls == 2
+    assert get_answer_cache().stats()["entries"] == 2
+
+
+def test_unreadable_cache_is_a_miss(store_dir, fake_embedder, gateway):
+    vs.index_pdf_for_namespace(file_path=str(TIMETABLE_PDF), namespace="timetable_group_10")
+    get_answer_cache()._conn.close()  # ex. base corrompue ou verrouillée par un autre worker
+
+    slot, cached = lookup_answer("timetable_group_10", "Quel cours le lundi ?", gateway)
+    assert slot is not None and cached is None
+    assert ask_timetable(question="Quel cours le lundi ?", group_id=10) == "Lundi 08h30"
+    assert gateway.calls == 1
+
+
+def test_index_version_changes_on_ingest_and_delete(store_dir, fake_embedder):
+    assert vs.index_version("default") == "empty"
+    vs.index_document(1, str(REGLEMENT_PDF))
+    v1 = vs.index_version("default")
+    assert vs.index_version("default") == v1
+
+    vs.index_document(2, str(TIMETABLE_PDF))
+    v2 = vs.index_version("default")
+    vs.delete_document(2)
+    v3 = vs.index_version("default")
+    assert len({v1, v2, v3}) == 3
+
+
+def test_answer_cache_ttl_size_limits_and_failures(tmp_path):
+    cache = AnswerCache(str(tmp_path / "answers.sqlite3"), ttl_s=0.2, max_entries=3)
+
+    def put(key):
+        cache.put(key, namespace="default", version="1", question=key, payload={"answer": key})
+
+    for key in ("a", "b", "c"):
+        put(key)
+    assert cache.get("a") == {"answer": "a"}  # "a" redevient la plus récente
+    put("d")
+    assert cache.get("b") is None and cache.get("a") is not None
+    assert cache.stats()["entries"] == 3 and cache.evictions == 1
+
+    time.sleep(0.25)
+    assert cache.get("a") is None and cache.expired == 1
+    assert cache.purge_expired() == 2
+
+    # Échec d'appel au modèle : jamais mis en cache
+    set_answer_cache(cache)
+    try:
+        slot = AnswerSlot("k", "empty_ns", vs.index_version("empty_ns"), "q")
+        remember_answer(slot, answer=ERROR_MESSAGE, sources=[], contexts=[])
+        assert cache.get("k") is None
+        remember_answer(slot, answer="ok", sources=["s"], contexts=[])
+        assert cache.get("k") == {"answer": "ok", "sources": ["s"], "contexts": []}
+    finally:
+        set_answer_cache(None)
+        cache.close()
@@ -0,0 +1,141 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.models.document import Document
+from app.modules.rag.cli import collect_sources
+from app.modules.rag.infrastructure import bulk_reindex
+from app.modules.rag.infrastructure import embedding_service
+from app.modules.rag.infrastructure import vector_store_faiss as vs
+from app.modules.rag.infrastructure.bulk_reindex import ReindexSource, reindex_all
+from app.modules.rag.infrastructure.segment_store import LOCK_FILE
+from app.modules.timetable.infrastructure.repositories import SchedulePdfORM
+from tests.conftest import FakeEmbedder
+
+DOCS_TEST = Path(__file__).resolve().parents[2] / "docs_test"
+REGLEMENT_PDF = DOCS_TEST / "reglement_pedagogique.pdf"
+TIMETABLE_PDF = DOCS_TEST / "EMPLOIS DU TEMPS S1-2025-2026 5IIR 10.pdf"
+OTHER_TIMETABLE_PDF = DOCS_TEST / "4IIR 5.pdf"
+
+
+class SaltedEmbedder(FakeEmbedder):
+    """
+    "Nouveau modèle" : mêmes textes, autres vecteurs.
+    """
+
+    model_name = "salted"
+
+    def _vec(self, text: str) -> np.ndarray:
+        return super()._vec("sel " + text)
+
+
+SOURCES = [
+    ReindexSource("document:1", "default", str(REGLEMENT_PDF), document_id=1),
+    ReindexSource("document:2", "default", str(OTHER_TIMETABLE_PDF), document_id=2),
+    ReindexSource("schedule_pdf:1", "timetable_group_10", str(TIMETABLE_PDF), extra={"group_id": 10}),
+]
+
+
+def _index_live():
+    vs.index_document(1, str(REGLEMENT_PDF))
+    vs.index_document(2, str(OTHER_TIMETABLE_PDF))
+    vs.index_pdf_for_namespace(file_path=str(TIMETABLE_PDF), namespace="timetable_group_10", extra_metadata={"group_id": 10})
+
+
+def _content(namespace):
+    return sorted((m["document_id"] or 0, m["content_hash"]) for m in vs._load_store(namespace).rows(with_text=False))
+
+
+def test_collect_sources_enumerates_documents_and_schedule_pdfs():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Document.__table__, SchedulePdfORM.__table__])
+    with Session(engine) as db:
+        db.add(Document(title="Règlement", doc_type="reglement", file_path="uploads/reglement.pdf"))
+        db.add(SchedulePdfORM(group_id=10, title="S1", file_path="uploads/edt.pdf", uploaded_by=1))
+        db.commit()
+        sources = collect_sources(db)
+
+    assert [(s.key, s.namespace, s.document_id, s.extra) for s in sources] == [
+        ("document:1", "default", 1, {}),
+        ("schedule_pdf:1", "timetable_group_10", None, {"group_id": 10}),
+    ]
+
+
+def test_reindex_rebuilds_and_swaps_every_namespace(store_dir, fake_embedder):
+    _index_live()
+    before = {ns: _content(ns) for ns in ("default", "timetable_group_10")}
+    old_files = {p.name for p in (store_dir / "default").iterdir()}
+
+    embedding_service.set_embedder(SaltedEmbedder())
+    result = reindex_all(lambda: SOURCES, workers=1)
+
+    assert result["swapped"] and result["encoded"] == 3 and not result["failed"]
+    assert not (store_dir / bulk_reindex.STAGING_DIR).exists()
+    # Mêmes chunks, vecteurs du nouvel embedder
+    for ns in before:
+        assert _content(ns) == before[ns]
+        assert result["namespaces"][ns] == len(before[ns])
+    snapshot = vs._load_store("default")
+    row = next(snapshot.rows())
+    stored = vs._stored_vectors([(snapshot.segments[0], 0)])[0]
+    assert np.allclose(stored, SaltedEmbedder().embed_texts([row["text"]])[0], atol=1e-5)
+    # Anciens segments supprimés ; group_id conservé
+    assert not old_files & {p.name for p in (store_dir / "default").iterdir()} - {"manifest.json", LOCK_FILE}
+    assert {m["group_id"] for m in vs._load_store("timetable_group_10").rows(with_text=False)} == {10}
+
+
+def test_live_writes_during_reindex_are_not_lost(store_dir, fake_embedder, tmp_path):
+    pdf = tmp_path / "document2.pdf"
+    shutil.copy(OTHER_TIMETABLE_PDF, pdf)
+    sources = [SOURCES[0], ReindexSource("document:2", "default", str(pdf), document_id=2), SOURCES[2]]
+    _index_live()
+    vs.index_document(2, str(pdf))
+    # Namespace live dont la source a disparu de la base
+    vs.index_pdf_for_namespace(file_path=str(OTHER_TIMETABLE_PDF), namespace="timetable_group_11")
+
+    def api_reupload(done, total, source, outcome):
+        # Pendant la reconstruction, l'API réindexe le document 2 (PDF remplacé)
+        if done == 3 and not pdf.read_bytes() == REGLEMENT_PDF.read_bytes():
+            shutil.copy(REGLEMENT_PDF, pdf)
+            vs.index_document(2, str(pdf))
+
+    embedding_service.set_embedder(SaltedEmbedder())
+    result = reindex_all(lambda: sources, workers=1, report=api_reupload)
+
+    assert result["swapped"] and result["encoded"] == 4
+    live = _content("default")
+    assert {h for d, h in live if d == 2} == {h for d, h in live if d == 1}
+    assert _content("timetable_group_11") == []
+    assert result["namespaces"]["timetable_group_11"] == 0
+
+
+def test_interrupted_reindex_resumes_without_touching_live(store_dir, fake_embedder):
+    _index_live()
+    before = {ns: _content(ns) for ns in ("default", "timetable_group_10")}
+    live_version = vs._store("default").disk_version()
+
+    def crash_after_two(done, total, source, outcome):
+        if done == 2:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        reindex_all(lambda: SOURCES, workers=1, report=crash_after_two)
+    assert vs._store("default").disk_version() == live_version
+
+    # Autre configuration : pas de mélange de vecteurs
+    embedding_service.set_embedder(SaltedEmbedder())
+    with pytest.raises(ValueError):
+        reindex_all(lambda: SOURCES, workers=1)
+    embedding_service.set_embedder(fake_embedder)
+
+    # Reprise : les sources déjà écrites sont sautées ; document 2 supprimé de la base entre-temps
+    result = reindex_all(lambda: [SOURCES[0], SOURCES[2]], workers=1)
+    assert result["resumed"] == 2 and result["encoded"] == 1
+    assert result["dropped"] == ["document:2"]
+    assert _content("timetable_group_10") == before["timetable_group_10"]
+    assert _content("default") == [c for c in before["default"] if c[0] == 1]
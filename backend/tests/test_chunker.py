@@ -0,0 +1,35 @@
+from app.modules.rag.infrastructure.chunker import Chunker, approx_token_count, split_sentences
+
+
+def _words(texts):
+    return [len(t.split()) for t in texts]
+
+
+def test_chunks_respect_budget_and_sentence_boundaries():
+    sentences = [f"Phrase numéro {i} avec quelques mots de plus." for i in range(40)]
+    text = " ".join(sentences)
+    chunker = Chunker(max_tokens=30, overlap_tokens=10, count_tokens=_words)
+
+    chunks = chunker.split(text)
+
+    assert len(chunks) > 1
+    assert all(len(c.split()) <= 30 for c in chunks)
+    # Jamais de phrase coupée, et tout le texte est couvert
+    assert all(s in sentences for c in chunks for s in split_sentences(c))
+    assert {s for c in chunks for s in split_sentences(c)} == set(sentences)
+    # Chevauchement : la dernière phrase d'un chunk ouvre le suivant
+    for prev, nxt in zip(chunks, chunks[1:]):
+        assert split_sentences(nxt)[0] == split_sentences(prev)[-1]
+
+
+def test_overlong_sentence_is_split_between_words():
+    text = " ".join(f"mot{i}" for i in range(100))
+    chunks = Chunker(max_tokens=25, overlap_tokens=0, count_tokens=_words).split(text)
+
+    assert all(len(c.split()) <= 25 for c in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_approx_count_by_pieces_of_four_chars():
+    assert approx_token_count(["Règlement pédagogique : article 12."]) == [11]
+    assert approx_token_count([""]) == [0]
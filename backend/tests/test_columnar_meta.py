@@ -0,0 +1,43 @@
+import numpy as np
+
+from app.modules.rag.infrastructure.columnar_meta import ColumnarMeta
+
+ROWS = [
+    {
+        "chunk_id": 0,
+        "document_id": None,
+        "source": "storage/schedules/edt.pdf",
+        "page": 1,
+        "chunk_index": 0,
+        "text": "Séance 1 : 08h30 — Amphi A",
+        "content_hash": "ab" * 19 + "00",
+        "namespace": "timetable_group_10",
+        "group_id": 10,
+    },
+    {
+        "chunk_id": 1,
+        "document_id": 3,
+        "source": "storage/documents/reglement.pdf",
+        "page": 12,
+        "chunk_index": 4,
+        "text": "Toute absence doit être justifiée.",
+        "namespace": "default",
+    },
+]
+
+
+def test_roundtrip_through_mmap(tmp_path):
+    base = str(tmp_path / "seg_000001")
+    ColumnarMeta.from_rows(ROWS).write(base)
+
+    meta = ColumnarMeta.open(base)
+
+    assert isinstance(meta.cols, np.memmap)
+    assert len(meta) == 2
+    assert meta[0]["text"] == ROWS[0]["text"]
+    assert meta[0]["content_hash"] == ROWS[0]["content_hash"]
+    assert meta[0]["group_id"] == 10 and meta[0]["document_id"] is None
+    assert meta[1]["page"] == 12 and meta[1]["document_id"] == 3
+    assert list(meta.chunk_ids) == [0, 1]
+    # Sans texte : seules les colonnes sont lues
+    assert "text" not in meta.row(1, with_text=False)
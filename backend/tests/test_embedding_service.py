@@ -0,0 +1,93 @@
+from app.modules.rag.infrastructure import embedding_service
+from app.modules.rag.infrastructure.embedder_st import SentenceTransformerEmbedder
+
+
+def test_embedder_is_lazy_and_shared():
+    embedding_service.set_embedder(None)
+    try:
+        first = embedding_service.get_embedder()
+        assert isinstance(first, SentenceTransformerEmbedder)
+        # Aucun modèle chargé tant qu'on n'encode rien
+        assert not first.is_loaded
+        assert embedding_service.get_embedder() is first
+    finally:
+        embedding_service.set_embedder(None)
+
+
+def test_warm_up_uses_shared_embedder(fake_embedder):
+    embedding_service.warm_up_embedder(background=False)
+    assert fake_embedder.calls == 1
+
+
+def test_query_cache_skips_model_on_repeat(fake_embedder):
+    cache = embedding_service.QUERY_CACHE
+
+    first = embedding_service.embed_query_cached("Règles d'absence ?")
+    again = embedding_service.embed_query_cached("  Règles   d'absence ?")
+
+    assert fake_embedder.calls == 1
+    assert (first == again).all()
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    # Casse conservée : le modèle encode la question telle que posée
+    embedding_service.embed_query_cached("règles d'absence ?")
+    assert fake_embedder.calls == 2
+
+
+def test_query_cache_is_bounded():
+    cache = embedding_service.QueryEmbeddingCache(max_size=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, [[1.0, 0.0]])
+
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+    assert cache.stats()["size"] == 2
+
+
+def test_onnx_backend_is_selected_from_settings(monkeypatch):
+    import sentence_transformers
+
+    created = []
+
+    class RecordingModel:
+        def __init__(self, name, **kwargs):
+            created.append((name, kwargs))
+
+    monkeypatch.setattr(sentence_transformers, "SentenceTransformer", RecordingModel)
+    monkeypatch.setattr(embedding_service.settings, "rag_embedder_backend", "onnx")
+    monkeypatch.setattr(embedding_service.settings, "rag_embedder_onnx_file", "onnx/model_quint8_avx2.onnx")
+    embedding_service.set_embedder(None)
+    try:
+        embedder = embedding_service.get_embedder()
+        assert embedder.backend == "onnx"
+        embedder.model
+    finally:
+        embedding_service.set_embedder(None)
+
+    assert created == [(
+        embedder.model_name,
+        {"backend": "onnx", "model_kwargs": {"file_name": "onnx/model_quint8_avx2.onnx"}},
+    )]
+
+
+def test_compatibility_check_against_indexed_vectors(store_dir, fake_embedder):
+    import numpy as np
+    from pathlib import Path
+
+    from app.modules.rag.infrastructure import vector_store_faiss as vs
+
+    pdf = Path(__file__).resolve().parents[2] / "docs_test" / "reglement_pedagogique.pdf"
+    vs.index_document(1, str(pdf))
+    assert vs.check_embedder_compatibility("default", sample=20)["min_cosine"] > 0.999
+
+    # Backend qui s'écarte du modèle d'origine (ex: quantification trop agressive)
+    class DriftingEmbedder(type(fake_embedder)):
+        def embed_texts(self, texts):
+            emb = super().embed_texts(texts)
+            emb = emb + 0.1 * np.random.default_rng(0).standard_normal(emb.shape).astype("float32")
+            return emb / np.linalg.norm(emb, axis=1, keepdims=True)
+
+    embedding_service.set_embedder(DriftingEmbedder())
+    report = vs.check_embedder_compatibility("default", sample=20)
+    assert report["sample"] == 20
+    assert not report["ok"] and report["mean_cosine"] < 0.98
@@ -0,0 +1,143 @@
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models.index_job import IndexJob
+from app.db.repositories.index_job_repo import create_job, get_job, requeue_stale_jobs
+from app.modules.jobs.handlers import HANDLERS, TIMETABLE_PDF
+from app.modules.jobs.queue import JobQueue
+from tests.test_vector_store import TIMETABLE_PDF as TIMETABLE_PDF_PATH
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+    IndexJob.__table__.create(engine)
+    yield sessionmaker(bind=engine, autoflush=False)
+    engine.dispose()
+
+
+def _job(session_factory, job_id):
+    with session_factory() as db:
+        return get_job(db, job_id)
+
+
+def test_job_records_progress_result_and_timings(session_factory):
+    def handler(db, payload, progress):
+        progress("extraction", 0.2)
+        progress("embedding", 0.6)
+        return {"chunks": payload["n"]}
+
+    queue = JobQueue({"demo": handler}, session_factory)
+    with session_factory() as db:
+        job_id = create_job(db, "demo", {"n": 3}).id
+
+    assert queue.run_pending() == 1
+    job = _job(session_factory, job_id)
+    assert job.status == "succeeded"
+    assert job.progress == 1.0 and job.stage == "done"
+    assert json.loads(job.result) == {"chunks": 3}
+    assert set(json.loads(job.timings)) == {"extraction", "embedding"}
+    assert job.started_at and job.finished_at and job.attempts == 1
+
+
+def test_failure_is_recorded_not_swallowed(session_factory):
+    def handler(db, payload, progress):
+        raise ValueError("PDF vide ou illisible")
+
+    queue = JobQueue({"demo": handler}, session_factory, poll_interval_s=0.05)
+    job_id = queue.enqueue("demo", {})
+    try:
+        deadline = time.time() + 5
+        while _job(session_factory, job_id).status in ("queued", "running") and time.time() < deadline:
+            time.sleep(0.02)
+    finally:
+        queue.stop()
+
+    job = _job(session_factory, job_id)
+    assert job.status == "failed"
+    assert "PDF vide ou illisible" in job.error
+
+
+def test_stale_running_job_is_requeued(session_factory):
+    def handler(db, payload, progress):
+        return {}
+
+    queue = JobQueue({"demo": handler}, session_factory, workers=2, stale_after_s=60)
+    ids = [queue.enqueue("demo", {"i": i}) for i in range(5)]
+    queue.stop()
+
+    # Tâche "running" orpheline (process tué) : remise en file au démarrage
+    with session_factory() as db:
+        db.execute(
+            update(IndexJob)
+            .where(IndexJob.id == ids[0])
+            .values(status="running", heartbeat_at=datetime.utcnow() - timedelta(hours=1))
+        )
+        db.commit()
+
+    queue.start()
+    queue.stop()
+    queue.run_pending()
+    assert all(_job(session_factory, i).status == "succeeded" for i in ids)
+
+
+def test_job_crashing_the_worker_fails_after_max_attempts(session_factory):
+    with session_factory() as db:
+        job_id = create_job(db, "demo", {}).id
+
+    # Prise puis worker mort pendant la tâche, à chaque redémarrage
+    for attempt, expected in ((1, (1, 0)), (2, (0, 1))):
+        with session_factory() as db:
+            db.execute(
+                update(IndexJob)
+                .where(IndexJob.id == job_id)
+                .values(status="running", attempts=attempt, heartbeat_at=datetime.utcnow() - timedelta(hours=1))
+            )
+            db.commit()
+            assert requeue_stale_jobs(db, stale_after_s=60, max_attempts=2) == expected
+
+    job = _job(session_factory, job_id)
+    assert job.status == "failed" and "2 tentative" in job.error
+    assert JobQueue({"demo": lambda db, payload, progress: {}}, session_factory).run_pending() == 0
+
+
+def test_long_silent_job_is_not_requeued_while_running(session_factory):
+    requeued = []
+
+    def handler(db, payload, progress):
+        # Étape longue sans rapport d'avancement (construction FAISS, compaction)
+        deadline = time.time() + 1.5
+        while time.time() < deadline:
+            time.sleep(0.2)
+            # Un autre worker démarre pendant ce temps
+            with session_factory() as other:
+                requeued.append(requeue_stale_jobs(other, stale_after_s=0.5, max_attempts=3))
+        return {}
+
+    queue = JobQueue({"demo": handler}, session_factory, stale_after_s=0.5)
+    with session_factory() as db:
+        job_id = create_job(db, "demo", {}).id
+
+    assert queue.run_pending() == 1
+    assert set(requeued) == {(0, 0)}
+    job = _job(session_factory, job_id)
+    assert job.status == "succeeded" and job.attempts == 1
+
+
+def test_timetable_handler_indexes_pdf(session_factory, store_dir, fake_embedder):
+    queue = JobQueue(HANDLERS, session_factory)
+    with session_factory() as db:
+        job_id = create_job(
+            db, TIMETABLE_PDF, {"schedule_id": 1, "pdf_path": str(TIMETABLE_PDF_PATH), "group_id": 10}
+        ).id
+
+    queue.run_pending()
+    job = _job(session_factory, job_id)
+    assert job.status == "succeeded", job.error
+    assert json.loads(job.result)["namespace"] == "timetable_group_10"
+    assert {"extraction", "embedding", "ecriture"} <= set(json.loads(job.timings))
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.modules.rag.infrastructure.llm_gateway import ERROR_MESSAGE, OllamaHttpGateway
+
+
+class StubOllama(ThreadingHTTPServer):
+    """
+    Serveur local imitant POST /api/generate d'Ollama ; note les requêtes et les connexions reçues.
+    """
+
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.requests = []
+        self.connections = set()
+        self.delay_s = 0.0
+        self.status = 200
+        self.tokens = [" Lundi", " 08h30", ", salle", " B12."]
+        self.token_delay_s = 0.0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append((self.path, body))
+        self.server.connections.add(self.client_address)
+        time.sleep(self.server.delay_s)
+        if body.get("stream") and self.server.status == 200:
+            return self._stream(body)
+        if self.server.status != 200:
+            payload = json.dumps({"error": f"model '{body['model']}' not found"}).encode()
+        else:
+            payload = json.dumps({"model": body["model"], "response": f" Réponse à : {body.get('prompt', '')} ", "done": True}).encode("utf-8")
+        self.send_response(self.server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, body):
+        # Une ligne JSON par fragment, en chunked, comme Ollama avec stream=true
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        parts = [{"response": t, "done": False} for t in self.server.tokens] + [{"response": "", "done": True}]
+        for part in parts:
+            line = (json.dumps(part) + "\n").encode("utf-8")
+            self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+            self.wfile.flush()
+            time.sleep(self.server.token_delay_s)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_ollama():
+    server = StubOllama()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_gateway_reuses_one_connection_and_sends_settings(stub_ollama):
+    gateway = OllamaHttpGateway(
+        stub_ollama.url,
+        "mistral",
+        keep_alive="1h",
+        options={"temperature": 0, "num_predict": 64},
+    )
+    answers = [gateway.generate(f"question {i} é") for i in range(5)]
+    gateway.close()
+
+    assert answers[0] == "Réponse à : question 0 é"
+    # Connexion persistante : une seule connexion TCP pour toutes les questions
+    assert len(stub_ollama.connections) == 1
+    path, body = stub_ollama.requests[-1]
+    assert path == "/api/generate"
+    assert body == {
+        "model": "mistral",
+        "prompt": "question 4 é",
+        "stream": False,
+        "keep_alive": "1h",
+        "options": {"temperature": 0, "num_predict": 64},
+    }
+
+
+def test_http_gateway_errors_and_timeouts_fall_back(stub_ollama):
+    gateway = OllamaHttpGateway(stub_ollama.url, "absent", read_timeout_s=0.2)
+
+    stub_ollama.status = 404
+    assert gateway.generate("question") == ERROR_MESSAGE
+
+    stub_ollama.status = 200
+    stub_ollama.delay_s = 1.0
+    t0 = time.perf_counter()
+    assert gateway.generate("question") == ERROR_MESSAGE
+    assert time.perf_counter() - t0 < 0.9
+    gateway.close()
+
+    # Serveur absent : échec rapide à la connexion
+    assert OllamaHttpGateway("http://127.0.0.1:9", connect_timeout_s=0.5).generate("q") == ERROR_MESSAGE
+
+
+def test_http_gateway_preload_sends_model_without_prompt(stub_ollama):
+    gateway = OllamaHttpGateway(stub_ollama.url, "llama3.1", keep_alive="-1")
+    assert gateway.preload()
+    gateway.close()
+    assert stub_ollama.requests == [("/api/generate", {"model": "llama3.1", "keep_alive": "-1"})]
+
+
+def test_http_gateway_streams_tokens_as_they_are_generated(stub_ollama):
+    stub_ollama.token_delay_s = 0.1
+    gateway = OllamaHttpGateway(stub_ollama.url, "mistral")
+
+    t0 = time.perf_counter()
+    tokens = gateway.stream("Quel cours le lundi ?")
+    first = next(tokens)
+    first_s = time.perf_counter() - t0
+    rest = list(tokens)
+    total_s = time.perf_counter() - t0
+    gateway.close()
+
+    assert [first, *rest] == stub_ollama.tokens
+    assert stub_ollama.requests[-1][1]["stream"] is True
+    # Premier fragment reçu avant la fin de la génération
+    assert first_s < total_s - 0.2
+
+    stub_ollama.status = 404
+    assert list(OllamaHttpGateway(stub_ollama.url, "absent").stream("q")) == [ERROR_MESSAGE]
+
+
+def test_http_gateway_async_overlaps_requests_without_threads(stub_ollama):
+    stub_ollama.delay_s = 0.3
+    gateway = OllamaHttpGateway(stub_ollama.url, "mistral", pool_size=8)
+
+    async def scenario():
+        t0 = time.perf_counter()
+        answers = await asyncio.gather(*(gateway.generate_async(f"q{i}") for i in range(6)))
+        elapsed = time.perf_counter() - t0
+        tokens = [t async for t in gateway.stream_async("Quel cours le lundi ?")]
+        stub_ollama.status = 404
+        failed = await gateway.generate_async("q")
+        failed_stream = [t async for t in gateway.stream_async("q")]
+        await gateway.aclose()
+        return answers, elapsed, tokens, failed, failed_stream
+
+    answers, elapsed, tokens, failed, failed_stream = asyncio.run(scenario())
+
+    assert answers == [f"Réponse à : q{i}" for i in range(6)]
+    # Six attentes de 0,3 s en parallèle sur la boucle, pas en série
+    assert elapsed < 1.0
+    assert tokens == stub_ollama.tokens
+    assert failed == ERROR_MESSAGE and failed_stream == [ERROR_MESSAGE]
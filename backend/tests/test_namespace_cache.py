@@ -0,0 +1,52 @@
+import faiss
+import numpy as np
+
+from app.modules.rag.infrastructure.columnar_meta import ColumnarMeta
+from app.modules.rag.infrastructure.namespace_cache import NamespaceCache
+from app.modules.rag.infrastructure.segment_store import NamespaceSnapshot, Segment
+
+
+def _snapshot(n: int, d: int = 4) -> NamespaceSnapshot:
+    index = faiss.IndexFlatIP(d)
+    if n:
+        index.add(np.ones((n, d), dtype="float32"))
+    meta = [{"text": "x" * 10} for _ in range(n)]
+    return NamespaceSnapshot(segments=[Segment(name="seg", index=index, meta=ColumnarMeta.from_rows(meta))])
+
+
+def test_hit_and_version_invalidation():
+    cache = NamespaceCache(max_entries=4, max_bytes=10_000)
+    snapshot = _snapshot(2)
+    cache.put("default", (1, 1), snapshot)
+
+    assert cache.get("default", (1, 1)) is snapshot
+    # Fichiers modifiés sur disque => nouvelle version => miss
+    assert cache.get("default", (2, 1)) is None
+    assert cache.stats()["entries"] == 0
+    assert cache.hits == 1 and cache.misses == 1
+
+
+def test_lru_eviction_by_entries():
+    cache = NamespaceCache(max_entries=2, max_bytes=10_000)
+    for ns in ("a", "b"):
+        cache.put(ns, 1, _snapshot(1))
+
+    cache.get("a", 1)  # "a" devient le plus récent
+    cache.put("c", 1, _snapshot(1))
+
+    assert cache.stats()["namespaces"] == ["a", "c"]
+
+
+def test_eviction_by_bytes_budget():
+    one = _snapshot(1).nbytes
+    cache = NamespaceCache(max_entries=10, max_bytes=2 * one)
+    cache.put("a", 1, _snapshot(1))
+    cache.put("b", 1, _snapshot(1))
+    cache.put("c", 1, _snapshot(1))
+
+    assert cache.stats()["namespaces"] == ["b", "c"]
+    assert cache.stats()["bytes"] <= 2 * one
+
+    # Une entrée plus grosse que le budget n'est jamais retenue
+    cache.put("big", 1, _snapshot(10))
+    assert cache.get("big", 1) is None
@@ -0,0 +1,31 @@
+from pathlib import Path
+
+from app.modules.rag.infrastructure import pdf_reader
+
+REGLEMENT_PDF = Path(__file__).resolve().parents[2] / "docs_test" / "reglement_pedagogique.pdf"
+
+
+def test_parallel_extraction_matches_serial(monkeypatch):
+    monkeypatch.setattr(pdf_reader.settings, "rag_pdf_parallel_min_pages", 2)
+
+    serial = list(pdf_reader.iter_page_texts(str(REGLEMENT_PDF), workers=1))
+    parallel = list(pdf_reader.iter_page_texts(str(REGLEMENT_PDF), workers=2))
+
+    assert parallel == serial
+    assert [n for n, _ in parallel] == list(range(1, pdf_reader.page_count(str(REGLEMENT_PDF)) + 1))
+    assert pdf_reader.extract_pages(str(REGLEMENT_PDF), workers=2) == pdf_reader.extract_pages(
+        str(REGLEMENT_PDF), workers=1
+    )
+
+
+def test_pool_is_shared_across_documents_of_any_size(monkeypatch):
+    monkeypatch.setattr(pdf_reader.settings, "rag_pdf_parallel_min_pages", 2)
+    other = REGLEMENT_PDF.parent / "ensegid_reglementpedagogique_fise_2025-2026_vf.pdf"
+
+    list(pdf_reader.iter_page_texts(str(REGLEMENT_PDF), workers=2))
+    pool = pdf_reader._get_pool()
+    # Nombre de pages et de processus demandés différents : même pool, pas de nouveaux interpréteurs
+    pages = list(pdf_reader.iter_page_texts(str(other), workers=3))
+
+    assert pdf_reader._get_pool() is pool
+    assert [n for n, _ in pages] == list(range(1, pdf_reader.page_count(str(other)) + 1))
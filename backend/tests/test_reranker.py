@@ -0,0 +1,124 @@
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.modules.rag.infrastructure import reranker as rr
+from app.modules.rag.infrastructure import vector_store_faiss as vs
+
+DOCS_TEST = Path(__file__).resolve().parents[2] / "docs_test"
+REGLEMENT_PDF = DOCS_TEST / "reglement_pedagogique.pdf"
+
+
+class OverlapReranker(rr.CrossEncoderReranker):
+    """
+    Cross-encoder factice : score = mots communs avec la question, coût simulé par paire.
+    """
+
+    def __init__(self, pair_s: float = 0.0, **kwargs) -> None:
+        super().__init__("fake", **kwargs)
+        self._model = True
+        self.pair_s = pair_s
+        self.scored = 0
+
+    def score_pairs(self, query, texts):
+        time.sleep(self.pair_s * len(texts))
+        self.scored += len(texts)
+        words = set(query.lower().split())
+        return np.array([len(words & set(t.lower().split())) for t in texts], dtype="float32")
+
+
+def _hits(texts):
+    return [(1.0 - i / 100, {"text": t, "content_hash": f"h{i}"}) for i, t in enumerate(texts)]
+
+
+def test_rerank_reorders_candidates_and_caches_scores():
+    reranker = OverlapReranker()
+    hits = _hits(["emploi du temps", "salle B12", "absence justifiée sous 48h", "absence"])
+
+    ranked = reranker.rerank("absence justifiée", hits, 2, budget_ms=1000)
+    assert [m["text"] for _, m in ranked] == ["absence justifiée sous 48h", "absence"]
+    assert 0.5 < ranked[1][0] < ranked[0][0] < 1.0
+    assert reranker.scored == 4
+
+    # Mêmes paires : servies par le cache
+    assert reranker.rerank(" absence   justifiée", hits, 2, budget_ms=1000) == ranked
+    assert reranker.scored == 4
+    assert reranker.cache.stats()["hits"] == 4
+
+
+def test_rerank_stops_at_budget_and_keeps_search_order_for_the_rest():
+    reranker = OverlapReranker(pair_s=0.01, batch_size=4)
+    hits = _hits([f"chunk {i}" for i in range(20)] + ["chunk absence"])
+
+    t0 = time.perf_counter()
+    ranked = reranker.rerank("absence", hits, 21, budget_ms=60)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+
+    # Dépassement borné par un lot ; le candidat pertinent, en queue, n'a pas été noté
+    assert 4 <= reranker.scored < 21
+    assert elapsed_ms < 60 + 4 * 10 + 20
+    assert [m["text"] for _, m in ranked] == [m["text"] for _, m in hits]
+    assert ranked[-1][0] == 0.0
+
+
+class SlowLoadingReranker(OverlapReranker):
+    def __init__(self, load_s: float, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self._model = None
+        self.load_s = load_s
+
+    def _load_model(self):
+        time.sleep(self.load_s)
+        return True
+
+
+def test_rerank_budget_counts_model_loading_and_first_batch():
+    hits = _hits([f"chunk {i}" for i in range(20)] + ["chunk absence"])
+    reranker = SlowLoadingReranker(load_s=0.3, pair_s=0.02, batch_size=16, initial_pair_ms=20)
+
+    # Modèle pas prêt avant l'échéance : ordre de la recherche, sans attendre le chargement
+    t0 = time.perf_counter()
+    ranked = reranker.rerank("absence", hits, 5, budget_ms=50)
+    assert (time.perf_counter() - t0) * 1000 < 50 + 30
+    assert ranked == hits[:5] and reranker.scored == 0
+
+    reranker._loader.join()
+    # Coût d'une paire mesuré au chargement : premier lot dimensionné par le budget, pas par batch_size
+    assert reranker.scored == 1 and reranker._pair_s >= 0.02
+    t0 = time.perf_counter()
+    reranker.rerank("absence", hits, 5, budget_ms=60)
+    assert (time.perf_counter() - t0) * 1000 < 60 + 2 * 20 + 20
+    assert 1 < reranker.scored < 16
+
+    # Modèle fourni tel quel (pas de mesure) : estimation par défaut
+    cold = OverlapReranker(pair_s=0.02, batch_size=16, initial_pair_ms=20)
+    cold.rerank("absence", hits, 5, budget_ms=60)
+    assert 0 < cold.scored <= 3
+
+
+def test_retrieve_context_rerank_option(store_dir, fake_embedder, monkeypatch):
+    vs.index_document(1, str(REGLEMENT_PDF))
+    question = "assiduité obligatoire des élèves"
+    expected, _ = vs.retrieve_context(question, k=3, rerank=False)
+
+    # Modèle indisponible : ordre de la recherche inchangé
+    unavailable = rr.CrossEncoderReranker("fake")
+    unavailable._model = False
+    rr.set_reranker(unavailable)
+    try:
+        contexts, _ = vs.retrieve_context(question, k=3, rerank=True)
+        assert [c["text"] for c in contexts] == [c["text"] for c in expected]
+
+        reranker = OverlapReranker()
+        rr.set_reranker(reranker)
+        monkeypatch.setattr(vs.settings, "rag_rerank_candidates", 12)
+        contexts, _ = vs.retrieve_context(question, k=3, rerank=True)
+    finally:
+        rr.set_reranker(None)
+
+    assert reranker.scored == 12
+    assert len(contexts) == 3
+    assert [c["score"] for c in contexts] == sorted((c["score"] for c in contexts), reverse=True)
+    overlaps = [len(set(question.split()) & set(c["text"].lower().split())) for c in contexts]
+    assert overlaps == sorted(overlaps, reverse=True)
@@ -0,0 +1,152 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.modules.rag.application.use_cases import QueryRagUseCase
+from app.modules.rag.infrastructure import vector_store_faiss as vs
+from app.modules.rag.infrastructure.embedding_service import embed_query_cached
+from app.modules.rag.infrastructure.llm_gateway import LlmGateway, set_llm_gateway
+from app.modules.rag.infrastructure.semantic_cache import (
+    SemanticAnswerCache,
+    contexts_signature,
+    get_semantic_cache,
+    set_semantic_cache,
+)
+from app.modules.timetable.rag.service import ask_timetable
+
+DOCS_TEST = Path(__file__).resolve().parents[2] / "docs_test"
+TIMETABLE_PDF = DOCS_TEST / "EMPLOIS DU TEMPS S1-2025-2026 5IIR 10.pdf"
+
+
+def _unit(*values):
+    v = np.array(values, dtype="float32")
+    return v / np.linalg.norm(v)
+
+
+def test_old_cache_file_is_migrated_once(tmp_path):
+    path = str(tmp_path / "answers.sqlite3")
+    SemanticAnswerCache(path)._conn.executescript(
+        "CREATE INDEX semantic_answers_bucket ON semantic_answers (namespace, model, version);"
+        "PRAGMA user_version = 0;"
+    )
+
+    conn = SemanticAnswerCache(path)._conn
+    indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert "semantic_answers_bucket" not in indexes and "semantic_answers_bucket_age" in indexes
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 1
+
+    # Migration déjà appliquée : un index de même nom créé ensuite n'est plus touché
+    conn.execute("CREATE INDEX semantic_answers_bucket ON semantic_answers (namespace)")
+    conn = SemanticAnswerCache(path)._conn
+    assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'semantic_answers_bucket'").fetchone()
+
+
+def test_semantic_cache_needs_close_question_and_same_context(tmp_path):
+    path = str(tmp_path / "answers.sqlite3")
+    cache = SemanticAnswerCache(path, threshold=0.9, max_per_namespace=2)
+    bucket = {"namespace": "default", "model": "m", "version": "1"}
+
+    cache.put(**bucket, question="combien d'absences autorisées", vector=_unit(1, 0, 0), signature="regle-a", answer="3")
+    hit = cache.lookup(**bucket, vector=_unit(1, 0.2, 0), signature="regle-a")
+    assert hit is not None and hit.answer == "3" and hit.similarity > 0.95
+
+    # Question proche mais autre règle retrouvée : pas de reprise
+    assert cache.lookup(**bucket, vector=_unit(1, 0.2, 0), signature="regle-b") is None
+    assert cache.rejected == 1
+    # Question éloignée
+    assert cache.lookup(**bucket, vector=_unit(0, 1, 0), signature="regle-a") is None
+
+    # Persisté : relu par une nouvelle instance
+    cache.close()
+    cache = SemanticAnswerCache(path, threshold=0.9, max_per_namespace=2)
+    assert cache.lookup(**bucket, vector=_unit(1, 0, 0), signature="regle-a").answer == "3"
+
+    # Borne par namespace : la question la moins récemment servie sort
+    cache.put(**bucket, question="retard", vector=_unit(0, 1, 0), signature="regle-b", answer="exclu")
+    assert cache.lookup(**bucket, vector=_unit(1, 0, 0), signature="regle-a").answer == "3"
+    cache.put(**bucket, question="rattrapage", vector=_unit(0, 0, 1), signature="regle-c", answer="juin")
+    assert cache.lookup(**bucket, vector=_unit(0, 1, 0), signature="regle-b") is None
+    assert cache.lookup(**bucket, vector=_unit(1, 0, 0), signature="regle-a").answer == "3"
+
+    # Nouvelle version d'index : anciennes questions purgées
+    assert cache.lookup(**{**bucket, "version": "2"}, vector=_unit(1, 0, 0), signature="regle-a") is None
+    assert cache.stats()["entries"] == 0
+    cache.close()
+
+
+def test_rag_signature_separates_topics_under_same_rule():
+    rule = "Toute absence ou tout retard doit être justifié sous 48 heures."
+    sig = QueryRagUseCase._signature
+    assert sig("Comment justifier mon absence ?", rule) == sig("Justification d'une absence ?", rule)
+    assert sig("Comment justifier mon retard ?", rule) != sig("Comment justifier mon absence ?", rule)
+
+
+class CountingGateway(LlmGateway):
+    model = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        return f"réponse {self.calls}"
+
+
+@pytest.fixture
+def gateway():
+    gateway = CountingGateway()
+    set_llm_gateway(gateway)
+    yield gateway
+    set_llm_gateway(None)
+
+
+def test_timetable_paraphrase_reuses_answer(store_dir, fake_embedder, gateway):
+    vs.index_pdf_for_namespace(file_path=str(TIMETABLE_PDF), namespace="timetable_group_10")
+    # Embedder de test = sac de mots : seuil adapté aux reformulations qu'il sait rapprocher
+    semantic = SemanticAnswerCache(get_semantic_cache().path, threshold=0.8)
+    set_semantic_cache(semantic)
+    try:
+        assert ask_timetable(question="Quel cours le lundi ?", group_id=10) == "réponse 1"
+        assert ask_timetable(question="Quel cours a lieu le lundi ?", group_id=10) == "réponse 1"
+        assert gateway.calls == 1 and semantic.hits == 1
+
+        assert ask_timetable(question="Salle de la séance d'anglais ?", group_id=10) == "réponse 2"
+        assert gateway.calls == 2
+    finally:
+        semantic.close()
+
+
+def test_timetable_other_day_is_not_reused(store_dir, fake_embedder, gateway):
+    vs.index_pdf_for_namespace(file_path=str(TIMETABLE_PDF), namespace="timetable_group_10")
+    monday = "Quels sont les cours prévus le lundi matin pour mon groupe ?"
+    tuesday = monday.replace("lundi", "mardi")
+    assert float(embed_query_cached(monday).reshape(-1) @ embed_query_cached(tuesday).reshape(-1)) > 0.9
+    # Tout le namespace tient dans k chunks : mêmes contextes pour les deux jours
+    assert contexts_signature(vs.retrieve_context(monday, k=5, namespace="timetable_group_10")[0]) == \
+        contexts_signature(vs.retrieve_context(tuesday, k=5, namespace="timetable_group_10")[0])
+
+    assert ask_timetable(question=monday, group_id=10) == "réponse 1"
+    assert ask_timetable(question=tuesday, group_id=10) == "réponse 2"
+    assert ask_timetable(question="Quels cours sont prévus le lundi matin pour mon groupe ?", group_id=10) == "réponse 1"
+    assert gateway.calls == 2
+
+
+def test_semantic_cache_sees_other_workers_entries(tmp_path):
+    path = str(tmp_path / "answers.sqlite3")
+    worker_a = SemanticAnswerCache(path, max_per_namespace=2)
+    worker_b = SemanticAnswerCache(path, max_per_namespace=2)
+    bucket = {"namespace": "default", "model": "m", "version": "1"}
+    try:
+        assert worker_b.lookup(**bucket, vector=_unit(1, 0, 0), signature="s") is None  # seau chargé, vide
+        worker_a.put(**bucket, question="q1", vector=_unit(1, 0, 0), signature="s", answer="a1")
+        assert worker_b.lookup(**bucket, vector=_unit(1, 0, 0), signature="s").answer == "a1"
+
+        # Éviction par l'autre worker : seau rechargé
+        worker_a.put(**bucket, question="q2", vector=_unit(0, 1, 0), signature="s", answer="a2")
+        worker_a.put(**bucket, question="q3", vector=_unit(0, 0, 1), signature="s", answer="a3")
+        assert worker_b.lookup(**bucket, vector=_unit(0, 0, 1), signature="s").answer == "a3"
+        assert len(worker_b._buckets[("default", "m", "1")].ids) == 2
+    finally:
+        worker_a.close()
+        worker_b.close()
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import numpy as np
+
+from app.modules.rag.infrastructure import vector_store_faiss as vs
+from app.modules.rag.infrastructure.sparse_index import SparseIndex, analyze, idf_weights, rrf_fuse
+
+DOCS_TEST = Path(__file__).resolve().parents[2] / "docs_test"
+REGLEMENT_PDF = DOCS_TEST / "reglement_pedagogique.pdf"
+TIMETABLE_PDF = DOCS_TEST / "EMPLOIS DU TEMPS S1-2025-2026 5IIR 10.pdf"
+
+
+def test_analyze_folds_accents_plurals_and_stopwords():
+    assert analyze("Les absences sont-elles JUSTIFIÉES ?") == ["absence", "elle", "justifiee"]
+    assert analyze("L'assiduité est obligatoire") == analyze("assiduite OBLIGATOIRE")
+
+
+def test_bm25_ranks_keyword_rows_and_survives_persistence(tmp_path):
+    texts = [
+        "Emploi du temps du lundi, salle B12.",
+        "Toute absence doit être justifiée sous 48 heures.",
+        "Trois retards valent une absence non justifiée ; absence répétée => exclusion.",
+        "",
+    ]
+    sparse = SparseIndex.from_texts(texts)
+    sparse.write(str(tmp_path / "seg"))
+    reloaded = SparseIndex.open(str(tmp_path / "seg"))
+
+    for ix in (sparse, reloaded):
+        weights, avgdl = idf_weights("absences justifiées", [ix])
+        scores = ix.score(weights, avgdl)
+        assert scores[0] == scores[3] == 0
+        assert scores[2] > scores[1] > 0
+    assert reloaded.df("absence") == 2
+    assert reloaded.df("inconnu") == 0
+
+
+def test_rrf_fuse_rewards_agreement():
+    fused = rrf_fuse([["a", "b", "c"], ["c", "d", "a"]], k=3, rrf_k=60)
+    assert [key for _, key in fused] == ["a", "c", "b"]
+    assert fused[0][0] == 1 / 61 + 1 / 63
+
+
+def test_hybrid_retrieval_finds_exact_keyword_chunks(store_dir, fake_embedder):
+    vs.index_document(1, str(REGLEMENT_PDF))
+    vs.index_document(2, str(TIMETABLE_PDF))
+    snapshot = vs._load_store("default")
+
+    # Index lexical persisté avec chaque segment
+    for seg in vs._store("default").read_manifest()["segments"]:
+        assert all(Path(p).exists() for p in SparseIndex.files(str(store_dir / "default" / seg["name"])))
+    assert all(seg.sparse is not None for seg in snapshot.segments)
+
+    # Sans accent dans la requête
+    hits = snapshot.sparse_search("assiduite", 5)
+    assert hits and all("assiduité" in m["text"].lower() for _, m in hits)
+
+    contexts, _ = vs.retrieve_context("L'assiduité est-elle obligatoire ?", k=5, mode="hybrid")
+    assert any("assiduité" in c["text"].lower() for c in contexts)
+    assert [c["score"] for c in contexts] == sorted((c["score"] for c in contexts), reverse=True)
+
+
+def test_sparse_search_skips_deleted_chunks_and_old_segments(store_dir, fake_embedder):
+    vs.index_document(1, str(REGLEMENT_PDF))
+    vs.index_document(2, str(REGLEMENT_PDF))
+    vs.delete_document(1)
+
+    snapshot = vs._load_store("default")
+    hits = snapshot.sparse_search("absence", 50)
+    assert hits and all(m["document_id"] == 2 for _, m in hits)
+
+    # Segment écrit sans index lexical : reconstruit en mémoire, mêmes résultats
+    for seg in snapshot.segments:
+        for path in SparseIndex.files(str(store_dir / "default" / seg.name)):
+            Path(path).unlink()
+    vs.NAMESPACE_CACHE.invalidate()
+    rebuilt = vs._load_store("default")
+    assert all(seg.sparse is None for seg in rebuilt.segments)
+    assert [m["chunk_id"] for _, m in rebuilt.sparse_search("absence", 50)] == [m["chunk_id"] for _, m in hits]
+    assert np.isclose(
+        [s for s, _ in rebuilt.sparse_search("absence", 50)], [s for s, _ in hits]
+    ).all()
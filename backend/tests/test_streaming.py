@@ -0,0 +1,160 @@
+import asyncio
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.deps import get_db
+from app.core.security import get_current_user
+from app.modules.rag.api.router import router as rag_router
+from app.modules.rag.application.use_cases import QueryRagUseCase
+from app.modules.rag.infrastructure import vector_store_faiss as vs
+from app.modules.rag.infrastructure.answer_cache import get_answer_cache
+from app.modules.rag.infrastructure.llm_gateway import LlmGateway, set_llm_gateway
+from app.modules.rag.infrastructure.semantic_cache import get_semantic_cache
+from app.modules.timetable.api import router as timetable_api
+from app.modules.timetable.rag import service as timetable
+
+DOCS_TEST = Path(__file__).resolve().parents[2] / "docs_test"
+REGLEMENT_PDF = DOCS_TEST / "reglement_pedagogique.pdf"
+TIMETABLE_PDF = DOCS_TEST / "EMPLOIS DU TEMPS S1-2025-2026 5IIR 10.pdf"
+
+
+class StreamingGateway(LlmGateway):
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.prompts = []
+
+    def generate(self, prompt: str) -> str:
+        return "".join(self.tokens)
+
+    def stream(self, prompt: str):
+        self.prompts.append(prompt)
+        yield from self.tokens
+
+    async def stream_async(self, prompt: str):
+        self.prompts.append(prompt)
+        for token in self.tokens:
+            yield token
+
+
+@pytest.fixture
+def client(store_dir, fake_embedder, monkeypatch):
+    app = FastAPI()
+    app.include_router(rag_router)
+    app.include_router(timetable_api.router)
+    app.dependency_overrides[get_db] = lambda: None
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1, role="ETUDIANT")
+    monkeypatch.setattr(timetable_api, "get_student_by_user_id", lambda db, user_id: SimpleNamespace(groupe_id=10))
+    yield TestClient(app)
+    set_llm_gateway(None)
+
+
+def _events(response):
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+def test_rag_query_stream_sends_sources_then_tokens(client):
+    vs.index_document(1, str(REGLEMENT_PDF))
+    gateway = StreamingGateway(["Toute absence", " doit être", " justifiée."])
+    set_llm_gateway(gateway)
+
+    response = client.post("/rag/query/stream", json={"question": "Comment justifier une absence ?"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response)
+    assert [e for e, _ in events] == ["sources", "token", "token", "token", "done"]
+    sources = events[0][1]
+    assert sources["sources"] and sources["contexts"][0]["page"] >= 1
+    assert events[-1][1] == {"answer": "Toute absence doit être justifiée."}
+    assert "absence" in gateway.prompts[0].lower()
+
+
+def test_timetable_ask_stream_strips_and_falls_back(client, monkeypatch):
+    vs.index_pdf_for_namespace(file_path=str(TIMETABLE_PDF), namespace="timetable_group_10")
+
+    set_llm_gateway(StreamingGateway(["  ", " Lundi", " 08h30"]))
+    events = _events(client.post("/timetable/ask/stream", json={"question": "Quel cours le lundi ?"}))
+    assert events[0][0] == "sources" and events[0][1]["contexts"]
+    assert [d["text"] for e, d in events if e == "token"] == ["Lundi", " 08h30"]
+    assert events[-1] == ("done", {"answer": "Lundi 08h30"})
+
+    # Modèle muet : même repli que /ask
+    set_llm_gateway(StreamingGateway(["", " "]))
+    events = _events(client.post("/timetable/ask/stream", json={"question": "Quel cours le lundi ?"}))
+    assert events[-1] == ("done", {"answer": "Je ne sais pas."})
+
+    # Groupe sans emploi du temps indexé : pas d'appel au modèle
+    gateway = StreamingGateway(["jamais"])
+    set_llm_gateway(gateway)
+    monkeypatch.setattr(timetable_api, "get_student_by_user_id", lambda db, user_id: SimpleNamespace(groupe_id=99))
+    events = _events(client.post("/timetable/ask/stream", json={"question": "Quel cours le lundi ?"}))
+    assert events == [("sources", {"sources": [], "contexts": []}), ("token", {"text": "Je ne sais pas."}), ("done", {"answer": "Je ne sais pas."})]
+    assert gateway.prompts == []
+
+
+def test_blocking_routes_answer_through_async_use_cases(client):
+    vs.index_document(1, str(REGLEMENT_PDF))
+    vs.index_pdf_for_namespace(file_path=str(TIMETABLE_PDF), namespace="timetable_group_10")
+    set_llm_gateway(StreamingGateway(["  Lundi", " 08h30 "]))
+
+    rag = client.post("/rag/query", json={"question": "Comment justifier une absence ?"}).json()
+    assert rag["sources"] and rag["contexts"]
+
+    timetable = client.post("/timetable/ask", json={"question": "Quel cours le lundi ?"}).json()
+    assert timetable == {"question": "Quel cours le lundi ?", "answer": "Lundi 08h30"}
+
+
+async def _joined(tokens):
+    return "".join([t async for t in tokens])
+
+
+def test_sync_async_and_stream_variants_agree(store_dir, fake_embedder):
+    vs.index_document(1, str(REGLEMENT_PDF))
+    vs.index_pdf_for_namespace(file_path=str(TIMETABLE_PDF), namespace="timetable_group_10")
+    gateway = StreamingGateway(["  Toute absence", " doit être justifiée. "])
+    set_llm_gateway(gateway)
+    use_case = QueryRagUseCase(db=None, llm=gateway)
+    rag_question, timetable_question = "Comment justifier une absence ?", "Quel cours le lundi ?"
+
+    def rag_stream(stream):
+        return stream.answer if hasattr(stream, "answer") else "".join(stream.tokens), stream.sources
+
+    variants = {
+        "rag": [
+            lambda: rag_stream(use_case.execute(rag_question)),
+            lambda: rag_stream(asyncio.run(use_case.execute_async(rag_question))),
+            lambda: rag_stream(use_case.execute_stream(rag_question)),
+            lambda: (lambda s: (asyncio.run(_joined(s.tokens)), s.sources))(
+                asyncio.run(use_case.execute_stream_async(rag_question))
+            ),
+        ],
+        "timetable": [
+            lambda: timetable.ask_timetable(question=timetable_question, group_id=10),
+            lambda: asyncio.run(timetable.ask_timetable_async(question=timetable_question, group_id=10)),
+            lambda: "".join(timetable.ask_timetable_stream(question=timetable_question, group_id=10)[2]),
+            lambda: asyncio.run(_joined(
+                asyncio.run(timetable.ask_timetable_stream_async(question=timetable_question, group_id=10))[2]
+            )),
+        ],
+    }
+    try:
+        for kind, calls in variants.items():
+            results = []
+            for i, call in enumerate(calls):
+                get_answer_cache().clear()
+                get_semantic_cache().clear()
+                results.append(call())
+                # Seules les variantes non streamées alimentent le cache de réponses
+                assert get_answer_cache().stats()["entries"] == (1 if i < 2 else 0), (kind, i)
+            assert all(r == results[0] for r in results), kind
+    finally:
+        set_llm_gateway(None)
@@ -0,0 +1,56 @@
+import random
+import sys
+from pathlib import Path
+
+from pypdf import PdfReader
+
+from app.modules.rag.infrastructure.text_utils import normalize_question, normalize_text
+
+DOCS_TEST = Path(__file__).resolve().parents[2] / "docs_test"
+
+
+def _reference(text: str) -> str:
+    """
+    Implémentation historique (caractère par caractère), référence de sortie.
+    """
+    if not text:
+        return ""
+    text = text.encode("utf-8", errors="ignore").decode("utf-8", errors="ignore")
+    text = "".join(c for c in text if c.isprintable() or c in "\n\t")
+    text = " ".join(text.split())
+    return text.strip()
+
+
+def test_matches_reference_for_every_code_point():
+    for start in range(0, sys.maxunicode + 1, 4096):
+        block = "".join(chr(cp) for cp in range(start, min(start + 4096, sys.maxunicode + 1)))
+        assert normalize_text(block) == _reference(block)
+        spaced = " a ".join(block[::97])
+        assert normalize_text(spaced) == _reference(spaced)
+
+
+def test_matches_reference_on_random_mixes():
+    pool = (
+        "abcXYZ 019.,;:!?'\"-"
+        "éèêàçùôÉÀœ«»€°•–—’"
+        "\n\t\r\x00\x07\x0b\x0c\x1f\x7f\x85\xa0\xad"
+        " ​‎  　﻿�"
+        "𐀀\U0001f600\U000e0001\U0010ffff"
+        "\ud800\udfff"
+    )
+    rng = random.Random(0)
+    for _ in range(3000):
+        text = "".join(rng.choice(pool) for _ in range(rng.randint(0, 60)))
+        assert normalize_text(text) == _reference(text)
+
+
+def test_matches_reference_on_docs_test_pages():
+    for pdf in sorted(DOCS_TEST.glob("*.pdf")):
+        for page in PdfReader(str(pdf)).pages:
+            raw = page.extract_text() or ""
+            assert normalize_text(raw) == _reference(raw)
+
+
+def test_normalize_question_ignores_case_and_spacing():
+    assert normalize_question("  Règles   d'ABSENCE ?\n") == normalize_question("règles d'absence ?")
+    assert normalize_question(None) == ""
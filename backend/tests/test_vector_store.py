@@ -0,0 +1,310 @@
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from app.modules.rag.infrastructure import vector_store_faiss as vs
+
+DOCS_TEST = Path(__file__).resolve().parents[2] / "docs_test"
+TIMETABLE_PDF = DOCS_TEST / "EMPLOIS DU TEMPS S1-2025-2026 5IIR 10.pdf"
+OTHER_TIMETABLE_PDF = DOCS_TEST / "4IIR 5.pdf"
+
+
+def test_reindex_same_document_is_idempotent(store_dir, fake_embedder):
+    first = vs.index_document(1, str(TIMETABLE_PDF))
+    assert first["new"] == first["chunks"] > 0
+    assert first["unchanged"] == 0
+
+    calls = fake_embedder.calls
+    second = vs.index_document(1, str(TIMETABLE_PDF))
+
+    assert second["new"] == 0
+    assert second["unchanged"] == first["chunks"]
+    assert second["removed"] == 0
+    assert second["vectors"] == first["vectors"]
+    # Rien à embedder
+    assert fake_embedder.calls == calls
+
+
+def test_reuploaded_timetable_does_not_duplicate(store_dir, fake_embedder, tmp_path):
+    copy = tmp_path / "reupload.pdf"
+    copy.write_bytes(TIMETABLE_PDF.read_bytes())
+
+    first = vs.index_pdf_for_namespace(file_path=str(TIMETABLE_PDF), namespace="timetable_group_10")
+    second = vs.index_pdf_for_namespace(file_path=str(copy), namespace="timetable_group_10")
+
+    assert second["new"] == 0
+    assert second["vectors"] == first["vectors"]
+
+
+def test_changed_document_chunks_are_removed(store_dir, fake_embedder):
+    vs.index_document(1, str(TIMETABLE_PDF))
+    vs.index_document(2, str(OTHER_TIMETABLE_PDF))
+    before = vs._load_store("default").ntotal
+
+    # Le document 1 est remplacé par le contenu d'un autre PDF
+    result = vs.index_document(1, str(OTHER_TIMETABLE_PDF))
+
+    assert result["removed"] > 0
+    assert result["vectors"] == before - result["removed"] + result["new"]
+    rows = list(vs._load_store("default").rows())
+    assert len(rows) == result["vectors"]
+    assert all(m["source"] != str(TIMETABLE_PDF) for m in rows)
+
+
+def test_reindex_collapses_legacy_duplicates(store_dir, fake_embedder):
+    vs.index_document(1, str(TIMETABLE_PDF))
+    # Ancien double indexage : mêmes chunks ajoutés une seconde fois, sans dédoublonnage
+    chunks = [dict(m) for m in vs._load_store("default").rows()]
+    vs._ingest_chunks("default", chunks, owned=lambda m: False, dedupe_scope=lambda m: False, document_id=1)
+    assert vs._load_store("default").ntotal == 2 * len(chunks)
+
+    result = vs.index_document(1, str(TIMETABLE_PDF))
+
+    assert result["new"] == 0
+    assert result["removed"] == len(chunks)
+    assert result["vectors"] == len(chunks)
+    hashes = [m["content_hash"] for m in vs._load_store("default").rows(with_text=False)]
+    assert sorted(hashes) == sorted(m["content_hash"] for m in chunks)
+
+
+def test_ingestion_appends_segment_and_compaction_merges(store_dir, fake_embedder):
+    vs.index_document(1, str(TIMETABLE_PDF))
+    vs.index_document(2, str(OTHER_TIMETABLE_PDF))
+    vs.index_document(1, str(OTHER_TIMETABLE_PDF))  # tombstones les chunks du doc 1
+
+    store = vs._store("default")
+    manifest = store.read_manifest()
+    assert len(manifest["segments"]) == 3
+    assert manifest["tombstones"]
+    first_segment = store_dir / "default" / f"{manifest['segments'][0]['name']}.faiss"
+    mtime = first_segment.stat().st_mtime_ns
+
+    vs.index_document(3, str(TIMETABLE_PDF))
+    # Les segments existants ne sont jamais réécrits
+    assert first_segment.stat().st_mtime_ns == mtime
+
+    before = vs._load_store("default").ntotal
+    result = vs.compact_namespace("default")
+
+    manifest = store.read_manifest()
+    assert result["purged"] > 0
+    assert len(manifest["segments"]) == 1
+    assert manifest["tombstones"] == []
+    assert vs._load_store("default").ntotal == before
+    assert not first_segment.exists()
+
+
+def test_legacy_layout_is_read_then_migrated(store_dir, fake_embedder):
+    import faiss
+    import pickle
+
+    vectors = fake_embedder.embed_texts(["règles d'absence", "emploi du temps lundi"])
+    index = faiss.IndexFlatIP(vectors.shape[1])
+    index.add(vectors)
+    meta = [
+        {"document_id": 7, "source": "old.pdf", "page": 1, "text": "règles d'absence"},
+        {"document_id": 7, "source": "old.pdf", "page": 2, "text": "emploi du temps lundi"},
+    ]
+    faiss.write_index(index, str(store_dir / "index__default.faiss"))
+    with open(store_dir / "meta__default.pkl", "wb") as f:
+        pickle.dump(meta, f)
+
+    contexts, _ = vs.retrieve_context("règles d'absence", k=1)
+    assert contexts[0]["text"] == "règles d'absence"
+
+    vs.index_document(1, str(TIMETABLE_PDF))
+    assert vs._store("default").exists()
+    assert vs._load_store("default").ntotal > 2
+    contexts, _ = vs.retrieve_context("emploi du temps lundi", k=1)
+    assert contexts[0]["document_id"] == 7
+
+
+def test_namespace_index_kind_switch(store_dir, fake_embedder):
+    vs.index_document(1, str(TIMETABLE_PDF))
+    vs.index_document(2, str(OTHER_TIMETABLE_PDF))
+    expected, _ = vs.retrieve_context("Séance Amphi", k=3)
+
+    vs.set_index_kind("default", "hnsw")
+
+    manifest = vs._store("default").read_manifest()
+    assert manifest["index_kind"] == "hnsw"
+    assert [s["kind"] for s in manifest["segments"]] == ["hnsw"]
+    contexts, _ = vs.retrieve_context("Séance Amphi", k=3)
+    # Petit corpus : HNSW retrouve les mêmes scores que la recherche exacte (aux ex-aequo près)
+    assert [round(c["score"], 5) for c in contexts] == [round(c["score"], 5) for c in expected]
+
+
+def test_retrieve_multi_encodes_once_and_keeps_provenance(store_dir, fake_embedder):
+    vs.index_document(1, str(OTHER_TIMETABLE_PDF))
+    vs.index_pdf_for_namespace(file_path=str(TIMETABLE_PDF), namespace="timetable_group_10")
+    calls = fake_embedder.calls
+
+    contexts, sources = vs.retrieve_multi(
+        "Management de la qualité 5IIR 10",
+        [
+            vs.NamespaceQuery("default", k=2),
+            vs.NamespaceQuery("timetable_group_10", k=2, weight=2.0),
+        ],
+        k=3,
+    )
+
+    assert fake_embedder.calls == calls + 1
+    assert len(contexts) == 3
+    assert contexts[0]["namespace"] == "timetable_group_10"
+    assert {c["namespace"] for c in contexts} <= {"default", "timetable_group_10"}
+    assert [c["score"] for c in contexts] == sorted((c["score"] for c in contexts), reverse=True)
+    assert sources[0] == str(TIMETABLE_PDF)
+
+
+def test_delete_document_removes_only_its_vectors(store_dir, fake_embedder):
+    vs.index_document(1, str(TIMETABLE_PDF))
+    vs.index_document(2, str(OTHER_TIMETABLE_PDF))
+    before = vs._load_store("default").ntotal
+    doc1_chunks = vs._load_store("default").chunk_ids_for_document(1)
+
+    result = vs.delete_document(1)
+
+    assert result["removed"] == len(doc1_chunks) > 0
+    assert result["vectors"] == before - result["removed"]
+    snapshot = vs._load_store("default")
+    assert snapshot.ntotal == result["vectors"]
+    # Exclus par l'IDSelector FAISS : la recherche remplit quand même k avec les chunks restants
+    hits = snapshot.search(fake_embedder.embed_query("Séance Amphi"), before)
+    assert len(hits) == result["vectors"]
+    assert all(m["document_id"] == 2 for _, m in hits)
+
+    assert vs.delete_document(1)["removed"] == 0
+    assert vs.delete_document(1, namespace="inconnu")["removed"] == 0
+
+
+def test_deleted_chunks_excluded_for_every_index_kind(store_dir, fake_embedder):
+    vs.index_document(1, str(TIMETABLE_PDF))
+    vs.index_document(2, str(OTHER_TIMETABLE_PDF))
+    vs.delete_document(2)
+
+    for kind in ("flat", "hnsw", "ivf"):
+        vs.set_index_kind("default", kind, rebuild=False)
+        vs.compact_namespace("default", rebuild=True)
+        vs.index_document(3, str(OTHER_TIMETABLE_PDF))
+        vs.delete_document(3)
+
+        contexts, _ = vs.retrieve_context("Management de la qualité", k=3)
+        assert contexts and all(c["document_id"] == 1 for c in contexts)
+
+
+def _synthetic_chunks(document_id, n):
+    for i in range(n):
+        text = f"module {document_id} séance {i} salle {i % 97} cours {i % 13}"
+        yield {
+            "source": f"doc{document_id}.pdf",
+            "page": 1,
+            "chunk_index": i,
+            "text": text,
+            "content_hash": vs._content_hash(text),
+            "document_id": document_id,
+            "namespace": "default",
+        }
+
+
+def test_concurrent_searches_with_tombstones(store_dir, fake_embedder):
+    for doc in (1, 2):
+        vs._ingest_chunks(
+            "default",
+            _synthetic_chunks(doc, 3000),
+            owned=lambda m, d=doc: m.get("document_id") == d,
+            dedupe_scope=lambda m, d=doc: m.get("document_id") == d,
+            document_id=doc,
+        )
+
+    def search(_):
+        contexts, _ = vs.retrieve_context("séance salle cours", k=3)
+        return {c["document_id"] for c in contexts}
+
+    for kind in ("flat", "hnsw"):
+        vs.set_index_kind("default", kind, rebuild=False)
+        vs.index_document(3, str(TIMETABLE_PDF))
+        # Un seul segment mêlant vivants et tombstones
+        vs.compact_namespace("default", rebuild=True)
+        vs.delete_document(2)
+        # Même snapshot (NAMESPACE_CACHE) partagé par tous les threads
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            assert 2 not in set().union(*pool.map(search, range(400)))
+        vs.index_document(2, str(OTHER_TIMETABLE_PDF))
+
+
+def _ingest_synthetic(store_dir, documents):
+    vs.STORE_DIR = str(store_dir)
+    for doc in documents:
+        vs._ingest_chunks(
+            "default",
+            _synthetic_chunks(doc, 200),
+            owned=lambda m, d=doc: m.get("document_id") == d,
+            dedupe_scope=lambda m, d=doc: m.get("document_id") == d,
+            document_id=doc,
+        )
+
+
+def test_concurrent_writers_in_separate_processes(store_dir, fake_embedder):
+    # Deux workers (processus) écrivent dans le même namespace
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_ingest_synthetic, args=(store_dir, docs)) for docs in ((1, 2, 3), (4, 5, 6))]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert [w.exitcode for w in workers] == [0, 0]
+
+    rows = list(vs._load_store("default", use_cache=False).rows(with_text=False))
+    assert sorted({r["document_id"] for r in rows}) == [1, 2, 3, 4, 5, 6]
+    chunk_ids = [r["chunk_id"] for r in rows]
+    assert len(chunk_ids) == len(set(chunk_ids)) == 6 * 200
+
+
+def test_streaming_ingest_embeds_in_batches(store_dir, fake_embedder, monkeypatch):
+    monkeypatch.setattr(vs.settings, "rag_ingest_batch_size", 1000)
+    reference = vs.index_document(1, str(TIMETABLE_PDF), namespace="ref")
+    expected, _ = vs.retrieve_context("Séance Amphi", k=3, namespace="ref")
+
+    monkeypatch.setattr(vs.settings, "rag_ingest_batch_size", 1)
+    calls = fake_embedder.calls
+    result = vs.index_document(1, str(TIMETABLE_PDF))
+
+    # Un appel d'embedding par lot, même contenu indexé qu'en un seul lot
+    assert fake_embedder.calls - calls == result["new"] == reference["new"]
+    contexts, _ = vs.retrieve_context("Séance Amphi", k=3)
+    assert [(c["text"], c["page"]) for c in contexts] == [(c["text"], c["page"]) for c in expected]
+    assert not list(store_dir.glob("**/*.tmp"))
+
+
+def test_convert_namespace_to_compressed_kinds(store_dir, fake_embedder):
+    pdfs = sorted(DOCS_TEST.glob("*.pdf"))
+    doc_id = 0
+    for _ in range(4):  # assez de vecteurs pour entraîner les codebooks PQ
+        for pdf in pdfs:
+            doc_id += 1
+            vs.index_document(doc_id, str(pdf))
+    deleted = {1}
+    vs.delete_document(1)
+    flat = vs.namespace_report("default")
+    vectors = flat["vectors"]
+
+    for doc, (kind, max_bytes) in enumerate((("fp16", 800), ("sq8", 420), ("pq", 80)), start=2):
+        result = vs.convert_namespace("default", kind, sample=50, k=5)
+
+        assert result["segments"] == [kind]
+        assert result["vectors"] == vectors
+        assert result["recall@5"] > 0.6
+        report = vs.namespace_report("default")
+        assert report["kinds"] == [kind]
+        assert report["memory_bytes_per_vector"] < max_bytes < flat["memory_bytes_per_vector"]
+
+        # Tombstones exclus, y compris sans IDSelector (PQ : sur-échantillonnage)
+        vectors -= vs.delete_document(doc)["removed"]
+        deleted.add(doc)
+        contexts, _ = vs.retrieve_context("Management de la qualité", k=5, mode="dense")
+        assert len(contexts) == 5
+        assert all(c["document_id"] not in deleted for c in contexts)
+
+    # Namespace trop petit pour PQ : repli sur sq8
+    vs.index_pdf_for_namespace(file_path=str(TIMETABLE_PDF), namespace="timetable_group_10")
+    assert vs.convert_namespace("timetable_group_10", "pq")["segments"] == ["sq8"]